@@ -62,6 +62,15 @@ ATTRIBUTES_EXCLUDED_FROM_CHECK = [ALL_ATTRIBUTES, ALL_OPERATIONAL_ATTRIBUTES, NO
 CASE_INSENSITIVE_ATTRIBUTE_NAMES = True
 CASE_INSENSITIVE_SCHEMA_NAMES = True
 
+# search filters
+FILTER_CACHE_SIZE = 256  # number of compiled search filters kept in the filter cache, 0 disables the cache
+
+# attribute names
+ATTRIBUTE_NAMES_TABLE_SIZE = 4096  # number of received attribute names kept in the canonicalization table, 0 disables the table
+
+# formatters
+FORMATTER_TABLES_SIZE = 8  # number of formatter tables of custom formatters kept in each schema, for servers with different formatters sharing the schema
+
 # modify type
 MODIFY_ADD = 0
 MODIFY_DELETE = 1
@@ -74,8 +83,10 @@ STRATEGY_ASYNC_THREADED = 1
 STRATEGY_LDIF_PRODUCER = 2
 STRATEGY_SYNC_RESTARTABLE = 3
 STRATEGY_REUSABLE_THREADED = 4
+STRATEGY_ASYNCIO = 5
+STRATEGY_MULTIPLEXED = 6
 
-CLIENT_STRATEGIES = [STRATEGY_SYNC, STRATEGY_ASYNC_THREADED, STRATEGY_LDIF_PRODUCER, STRATEGY_SYNC_RESTARTABLE, STRATEGY_REUSABLE_THREADED]
+CLIENT_STRATEGIES = [STRATEGY_SYNC, STRATEGY_ASYNC_THREADED, STRATEGY_LDIF_PRODUCER, STRATEGY_SYNC_RESTARTABLE, STRATEGY_REUSABLE_THREADED, STRATEGY_ASYNCIO, STRATEGY_MULTIPLEXED]
 
 # communication
 SESSION_TERMINATED_BY_SERVER = 0
@@ -83,6 +94,8 @@ RESPONSE_COMPLETE = -1
 RESPONSE_SLEEPTIME = 0.02  # seconds to wait while waiting for a response in asynchronous strategies
 RESPONSE_WAITING_TIMEOUT = 10  # waiting timeout for receiving a response in asynchronous strategies
 SOCKET_SIZE = 4096  # socket byte size
+RECEIVE_MAX_SIZE = 1048576  # max bytes requested to the socket in a single receive when the length of the incoming message is known
+PIPELINE_WINDOW = 64  # default number of requests in flight in Connection.pipeline()
 
 # restartable strategy
 RESTARTABLE_SLEEPTIME = 2  # time to wait in a restartable strategy before retrying the request
@@ -92,8 +105,18 @@ RESTARTABLE_TRIES = 50  # number of times to retry in a restartable strategy bef
 TERMINATE_REUSABLE = -1
 REUSABLE_THREADED_POOL_SIZE = 10
 REUSABLE_THREADED_LIFETIME = 3600  # 1 hour
+REUSABLE_THREADED_PIPELINE = 1  # requests sent on each pooled connection without waiting for the previous responses
+REUSABLE_THREADED_IDLE_TIMEOUT = 300  # seconds a pooled connection is kept when idle and the pool is larger than its minimum size
+REUSABLE_THREADED_GROW_QUEUE_DEPTH = 1  # the pool grows when this number of requests is waiting for a connection
+REUSABLE_THREADED_GROW_WAIT_TIME = 0.5  # the pool grows when a request has been waiting in queue for this number of seconds
 DEFAULT_THREADED_POOL_NAME = 'connection_threaded_pool'
 
+# reusable strategy dispatch of the requests to the pooled connections
+POOL_DISPATCH_SHARED = 0  # a single FIFO queue shared by all the pooled connections
+POOL_DISPATCH_LEAST_OUTSTANDING = 1  # to the pooled connection with less requests outstanding
+POOL_DISPATCH_SERVER_AFFINITY = 2  # to the least loaded pooled connection of the server with the shortest response time
+POOL_DISPATCHES = [POOL_DISPATCH_SHARED, POOL_DISPATCH_LEAST_OUTSTANDING, POOL_DISPATCH_SERVER_AFFINITY]
+
 
 # LDAP protocol
 LDAP_MAX_INT = 2147483647
@@ -163,6 +186,12 @@ GET_DSA_INFO = 1
 GET_SCHEMA_INFO = 2
 GET_ALL_INFO = 3
 
+# bundled schema snapshots, loaded without reading the server
+OFFLINE_SCHEMA_OPENLDAP = 10
+OFFLINE_SCHEMA_DS389 = 11
+OFFLINE_SCHEMA_AD = 12
+OFFLINE_SCHEMA_EDIR = 13
+
 # OID database definition
 OID_CONTROL = 0
 OID_EXTENSION = 1
@@ -250,7 +279,9 @@ from .core.server import Server
 from .core.connection import Connection
 from .core.tls import Tls
 from .core.pooling import ServerPool
+from .strategy.ioLoop import IoLoop
 from .abstract import ObjectDef, AttrDef, Attribute, Entry, Reader, OperationalAttribute
+from .utils.filterBuilder import F
 from .core.exceptions import LDAPException, LDAPExceptionError, LDAPSocketCloseError, LDAPReferralError, LDAPAttributeError, LDAPBindError, LDAPCertificateError, LDAPChangesError, LDAPCommunicationError, LDAPConnectionIsReadOnlyError, \
     LDAPConnectionPoolNameIsMandatoryError, LDAPConnectionPoolNotStartedError, LDAPControlsError, LDAPEntryError, LDAPInvalidDereferenceAliasesError, LDAPInvalidFilterError, LDAPInvalidScopeError, LDAPInvalidServerError, LDAPKeyError, LDAPLDIFError, \
     LDAPMetricsError, LDAPObjectClassError, LDAPObjectError, LDAPPasswordIsMandatoryError, LDAPReaderError, LDAPSASLBindInProgressError, LDAPSASLMechanismNotSupportedError, LDAPSASLPrepError, LDAPSchemaError, LDAPServerPoolError, \
@@ -30,6 +30,7 @@ from .. import SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_SCOPE_SINGLE_LEVEL, SEARCH_DER
 from .attribute import Attribute
 from .entry import Entry
 from ..core.exceptions import LDAPReaderError
+from ..utils.attributeNames import attribute_names
 from .operationalAttribute import OperationalAttribute
 
 
@@ -301,13 +302,10 @@ class Reader(object):
 
         """
         attributes = dict()
-        used_attribute_names = []
+        used_attribute_names = set()
+        result_names = dict((attribute_names.lower(attr_name), attr_name) for attr_name in result['attributes'])  # lowercase name -> name in result
         for attr_def in attr_defs:
-            name = None
-            for attr_name in result['attributes']:
-                if attr_def.name.lower() == attr_name.lower():
-                    name = attr_name
-                    break
+            name = result_names.get(attribute_names.lower(attr_def.name))
 
             if name or attr_def.default:  # attribute value found in result or default value present
                 attribute = Attribute(attr_def, entry)
@@ -330,7 +328,7 @@ class Reader(object):
 
                 # noinspection PyUnresolvedReferences
                 attributes[attribute.key] = attribute
-                used_attribute_names.append(name)
+                used_attribute_names.add(name)
 
         for name in result['attributes']:
             if name not in used_attribute_names:
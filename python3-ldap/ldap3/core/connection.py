@@ -24,39 +24,62 @@
 # If not, see <http://www.gnu.org/licenses/>.
 
 from os import linesep
+from threading import local
 from pyasn1.codec.ber import encoder
 
 from .. import AUTH_ANONYMOUS, AUTH_SIMPLE, AUTH_SASL, MODIFY_ADD, MODIFY_DELETE, MODIFY_REPLACE, SEARCH_DEREFERENCE_ALWAYS, SEARCH_SCOPE_WHOLE_SUBTREE, STRATEGY_ASYNC_THREADED, STRATEGY_SYNC, CLIENT_STRATEGIES, RESULT_SUCCESS, \
     RESULT_COMPARE_TRUE, NO_ATTRIBUTES, ALL_ATTRIBUTES, ALL_OPERATIONAL_ATTRIBUTES, MODIFY_INCREMENT, STRATEGY_LDIF_PRODUCER, SASL_AVAILABLE_MECHANISMS, STRATEGY_SYNC_RESTARTABLE, POOLING_STRATEGY_ROUND_ROBIN, \
-    STRATEGY_REUSABLE_THREADED, DEFAULT_THREADED_POOL_NAME, AUTO_BIND_NONE, AUTO_BIND_TLS_BEFORE_BIND, AUTO_BIND_TLS_AFTER_BIND, AUTO_BIND_NO_TLS
+    STRATEGY_REUSABLE_THREADED, DEFAULT_THREADED_POOL_NAME, AUTO_BIND_NONE, AUTO_BIND_TLS_BEFORE_BIND, AUTO_BIND_TLS_AFTER_BIND, AUTO_BIND_NO_TLS, STRATEGY_ASYNCIO, STRATEGY_MULTIPLEXED, PIPELINE_WINDOW, POOL_DISPATCHES
 from ..extend import ExtendedOperationsRoot
 from .pooling import ServerPool
 from .server import Server
 from ..strategy.reusableThreaded import ReusableThreadedStrategy
 from ..operation.abandon import abandon_operation
-from ..operation.add import add_operation
+from ..operation.add import add_operation, fast_add_operation
 from ..operation.bind import bind_operation
 from ..operation.compare import compare_operation
 from ..operation.delete import delete_operation
 from ..operation.extended import extended_operation
-from ..operation.modify import modify_operation
+from ..operation.modify import modify_operation, fast_modify_operation
 from ..operation.modifyDn import modify_dn_operation
-from ..operation.search import search_operation
+from ..operation.search import search_operation, fast_search_operation, prepare_search_operation
+from ..utils.filterOptimizer import FilterOptimizer
 from ..protocol.rfc2849 import operation_to_ldif, add_ldif_header
 from ..protocol.sasl.digestMd5 import sasl_digest_md5
 from ..protocol.sasl.external import sasl_external
-from ..strategy.asyncThreaded import AsyncThreadedStrategy
+from ..strategy.asyncThreaded import AsyncThreadedStrategy, Future
+from ..strategy.multiplexed import MultiplexedStrategy
 from ..strategy.ldifProducer import LdifProducerStrategy
 from ..strategy.syncWait import SyncWaitStrategy
 from ..strategy.syncWaitRestartable import SyncWaitRestartableStrategy
 from ..operation.unbind import unbind_operation
 from ..protocol.rfc2696 import RealSearchControlValue, Cookie, Size
 from .usage import ConnectionUsage
+from .prepared import PreparedSearch
+from .pipeline import Pipeline
 from .tls import Tls
-from .exceptions import LDAPUnknownStrategyError, LDAPBindError, LDAPUnknownAuthenticationMethodError, LDAPInvalidServerError, LDAPSASLMechanismNotSupportedError, LDAPObjectClassError, LDAPConnectionIsReadOnlyError, LDAPChangesError, LDAPExceptionError
+from .exceptions import LDAPUnknownStrategyError, LDAPBindError, LDAPUnknownAuthenticationMethodError, LDAPInvalidServerError, LDAPSASLMechanismNotSupportedError, LDAPObjectClassError, LDAPConnectionIsReadOnlyError, LDAPChangesError, LDAPExceptionError, LDAPStartTLSError, LDAPConnectionPoolSizeError, LDAPSSLConfigurationError
 from ..utils.conv import prepare_for_stream
 
 
+class OperationState(object):
+    """
+    Request, response and result of the last operation of the connection
+    """
+    request = None
+    response = None
+    result = None
+
+
+class ThreadOperationState(local):
+    """
+    Request, response and result of the last operation of the connection performed by each thread
+    """
+    request = None
+    response = None
+    result = None
+
+
 # noinspection PyProtectedMember
 class Connection(object):
     """Main ldap connection class.
@@ -84,7 +107,7 @@ class Connection(object):
     :param authentication: type of authentication
     :type authentication: int, can be one of AUTH_ANONYMOUS, AUTH_SIMPLE or AUTH_SASL, as specified in ldap3
     :param client_strategy: communication strategy used in the Connection
-    :type client_strategy: can be one of STRATEGY_SYNC, STRATEGY_ASYNC_THREADED, STRATEGY_LDIF_PRODUCER, STRATEGY_SYNC_RESTARTABLE, STRATEGY_REUSABLE_THREADED as specified in ldap3
+    :type client_strategy: can be one of STRATEGY_SYNC, STRATEGY_ASYNC_THREADED, STRATEGY_LDIF_PRODUCER, STRATEGY_SYNC_RESTARTABLE, STRATEGY_REUSABLE_THREADED, STRATEGY_ASYNCIO, STRATEGY_MULTIPLEXED as specified in ldap3
     :param auto_referrals: specify if the connection object must automatically follow referrals
     :type auto_referrals: bool
     :param sasl_mechanism: mechanism for SASL authentication, can be one of 'EXTERNAL', 'DIGEST-MD5'
@@ -107,6 +130,30 @@ class Connection(object):
     :type pool_size: int
     :param pool_lifetime: pool lifetime for pooled strategies
     :type pool_size: int
+    :param pool_min_size: minimum size of pooled strategies, idle connections are closed down to this size (defaults to pool_size)
+    :type pool_min_size: int
+    :param pool_max_size: maximum size of pooled strategies, the pool grows up to this size when requests are waiting (defaults to pool_size)
+    :type pool_max_size: int
+    :param pool_idle_timeout: seconds a connection of pooled strategies is kept when idle and the pool is larger than pool_min_size
+    :type pool_idle_timeout: int
+    :param pool_dispatch: how requests are dispatched to the connections of pooled strategies
+    :type pool_dispatch: can be one of POOL_DISPATCH_SHARED, POOL_DISPATCH_LEAST_OUTSTANDING, POOL_DISPATCH_SERVER_AFFINITY as specified in ldap3
+    :param pool_pipeline: requests in flight on each connection of pooled strategies
+    :type pool_pipeline: int
+    :param fast_decoder: decode search responses with the internal BER decoder instead of pyasn1
+    :type fast_decoder: bool
+    :param fast_encoder: encode search, add and modify requests with the internal BER encoder instead of pyasn1
+    :type fast_encoder: bool
+    :param lazy_attributes: decode and format the attributes of search entries only when they are accessed
+    :type lazy_attributes: bool
+    :param optimize_filters: flatten nested AND and OR, remove duplicate assertions and single element AND and OR from search filters before sending them
+    :type optimize_filters: bool
+    :param indexed_attributes: attributes indexed in the server, assertions on these attributes are sent first in AND and OR of optimized filters
+    :type indexed_attributes: list
+    :param return_futures: operations of STRATEGY_ASYNC_THREADED return a concurrent.futures.Future instead of the message id
+    :type return_futures: bool
+    :param io_loop: responses of STRATEGY_ASYNC_THREADED and STRATEGY_MULTIPLEXED are received by the thread of this IoLoop, shared by many connections
+    :type io_loop: IoLoop
 
     """
 
@@ -128,7 +175,19 @@ class Connection(object):
                  raise_exceptions=False,
                  pool_name=None,
                  pool_size=None,
-                 pool_lifetime=None):
+                 pool_lifetime=None,
+                 pool_min_size=None,
+                 pool_max_size=None,
+                 pool_idle_timeout=None,
+                 pool_dispatch=None,
+                 pool_pipeline=None,
+                 fast_decoder=False,
+                 fast_encoder=False,
+                 lazy_attributes=False,
+                 optimize_filters=False,
+                 indexed_attributes=None,
+                 return_futures=False,
+                 io_loop=None):
 
         if client_strategy not in CLIENT_STRATEGIES:
             self.last_error = 'unknown client connection strategy'
@@ -148,6 +207,7 @@ class Connection(object):
             raise LDAPUnknownAuthenticationMethodError(self.last_error)
         self.version = version
         self.auto_referrals = True if auto_referrals else False
+        self._state = OperationState()
         self.request = None
         self.response = None
         self.result = None
@@ -178,9 +238,22 @@ class Connection(object):
         self.pool_name = pool_name if pool_name else DEFAULT_THREADED_POOL_NAME
         self.pool_size = pool_size
         self.pool_lifetime = pool_lifetime
+        self.pool_min_size = pool_min_size
+        self.pool_max_size = pool_max_size
+        self.pool_idle_timeout = pool_idle_timeout
+        self.pool_dispatch = pool_dispatch
+        self.pool_pipeline = pool_pipeline
         self.starting_tls = False
         self.check_names = check_names
         self.raise_exceptions = raise_exceptions
+        self.fast_decoder = fast_decoder
+        self.fast_encoder = fast_encoder
+        self.lazy_attributes = lazy_attributes
+        self.optimize_filters = optimize_filters
+        self.indexed_attributes = indexed_attributes
+        self._filter_optimizer = FilterOptimizer(indexed_attributes) if optimize_filters else None
+        self.return_futures = True if return_futures else False
+        self.io_loop = io_loop
         self.extend = ExtendedOperationsRoot(self)
 
         if isinstance(server, str):
@@ -196,6 +269,38 @@ class Connection(object):
             self.server_pool = None
             self.server = server
 
+        if self.strategy_type == STRATEGY_ASYNCIO and (self.lazy or self.auto_bind or self.authentication == AUTH_SASL):
+            self.last_error = 'lazy, auto_bind and SASL are not available with the asyncio strategy'
+            raise LDAPUnknownStrategyError(self.last_error)
+
+        if self.strategy_type == STRATEGY_MULTIPLEXED and (self.lazy or Future is None):
+            self.last_error = 'lazy is not available with the multiplexed strategy' + (', concurrent.futures not available' if Future is None else '')
+            raise LDAPUnknownStrategyError(self.last_error)
+
+        if self.return_futures and (self.strategy_type != STRATEGY_ASYNC_THREADED or Future is None):
+            self.last_error = 'return_futures is available only with the async threaded strategy' + (', concurrent.futures not available' if Future is None else '')
+            raise LDAPUnknownStrategyError(self.last_error)
+
+        if (self.pool_min_size is not None and self.pool_min_size < 1) or (self.pool_min_size and self.pool_max_size and self.pool_max_size < self.pool_min_size):
+            self.last_error = 'pool_min_size must be at least 1 and not greater than pool_max_size'
+            raise LDAPConnectionPoolSizeError(self.last_error)
+
+        if self.io_loop is not None and self.strategy_type not in [STRATEGY_ASYNC_THREADED, STRATEGY_MULTIPLEXED]:
+            self.last_error = 'io_loop is available only with the async threaded and multiplexed strategies'
+            raise LDAPUnknownStrategyError(self.last_error)
+
+        if self.io_loop is not None and any(pool_server.ssl for pool_server in (self.server_pool.servers if self.server_pool else [self.server])):  # the loop receives from blocking sockets, an ssl record could stall it
+            self.last_error = 'ssl not available with io_loop'
+            raise LDAPSSLConfigurationError(self.last_error)
+
+        if self.pool_dispatch is not None and self.pool_dispatch not in POOL_DISPATCHES:
+            self.last_error = 'unknown pool dispatch'
+            raise LDAPUnknownStrategyError(self.last_error)
+
+        if self.pool_pipeline is not None and (self.pool_pipeline < 1 or (self.pool_pipeline > 1 and Future is None)):
+            self.last_error = 'pool_pipeline must be at least 1' + (', concurrent.futures not available for more than 1' if Future is None else '')
+            raise LDAPUnknownStrategyError(self.last_error)
+
         if self.strategy_type == STRATEGY_SYNC:
             self.strategy = SyncWaitStrategy(self)
         elif self.strategy_type == STRATEGY_ASYNC_THREADED:
@@ -206,10 +311,18 @@ class Connection(object):
             self.strategy = SyncWaitRestartableStrategy(self)
         elif self.strategy_type == STRATEGY_REUSABLE_THREADED:
             self.strategy = ReusableThreadedStrategy(self)
+        elif self.strategy_type == STRATEGY_ASYNCIO:
+            from ..strategy.asyncIo import AsyncIoStrategy  # requires Python 3.5, imported only when used
+            self.strategy = AsyncIoStrategy(self)
+        elif self.strategy_type == STRATEGY_MULTIPLEXED:
+            self.strategy = MultiplexedStrategy(self)
         else:
             self.last_error = 'unknown strategy'
             raise LDAPUnknownStrategyError(self.last_error)
 
+        if self.strategy.thread_safe:
+            self._state = ThreadOperationState()
+
         # map strategy functions to connection functions
         self.send = self.strategy.send
         self.open = self.strategy.open
@@ -269,6 +382,18 @@ class Connection(object):
         r += '' if (self.pool_name is None or self.pool_name == DEFAULT_THREADED_POOL_NAME) else ', pool_name={0.pool_name!r}'.format(self)
         r += '' if self.pool_size is None else ', pool_size={0.pool_size!r}'.format(self)
         r += '' if self.pool_lifetime is None else ', pool_lifetime={0.pool_lifetime!r}'.format(self)
+        r += '' if self.pool_min_size is None else ', pool_min_size={0.pool_min_size!r}'.format(self)
+        r += '' if self.pool_max_size is None else ', pool_max_size={0.pool_max_size!r}'.format(self)
+        r += '' if self.pool_idle_timeout is None else ', pool_idle_timeout={0.pool_idle_timeout!r}'.format(self)
+        r += '' if self.pool_dispatch is None else ', pool_dispatch={0.pool_dispatch!r}'.format(self)
+        r += '' if self.pool_pipeline is None else ', pool_pipeline={0.pool_pipeline!r}'.format(self)
+        r += '' if not self.fast_decoder else ', fast_decoder={0.fast_decoder!r}'.format(self)
+        r += '' if not self.fast_encoder else ', fast_encoder={0.fast_encoder!r}'.format(self)
+        r += '' if not self.lazy_attributes else ', lazy_attributes={0.lazy_attributes!r}'.format(self)
+        r += '' if not self.optimize_filters else ', optimize_filters={0.optimize_filters!r}'.format(self)
+        r += '' if self.indexed_attributes is None else ', indexed_attributes={0.indexed_attributes!r}'.format(self)
+        r += '' if not self.return_futures else ', return_futures={0.return_futures!r}'.format(self)
+        r += '' if self.io_loop is None else ', io_loop={0.io_loop!r}'.format(self)
         r += ')'
 
         return r
@@ -285,6 +410,39 @@ class Connection(object):
         if self.strategy.can_stream:
             self.strategy.set_stream(value)
 
+    @property
+    def request(self):
+        return self._state.request
+
+    @request.setter
+    def request(self, value):
+        self._state.request = value
+
+    @property
+    def response(self):
+        return self._state.response
+
+    @response.setter
+    def response(self, value):
+        self._state.response = value
+
+    @property
+    def result(self):
+        return self._state.result
+
+    @result.setter
+    def result(self, value):
+        self._state.result = value
+
+    @property
+    def _check_names_schema(self):
+        """
+        Schema used to check the names of attributes and object classes in requests, None if names are not checked
+        """
+        if self.server and self.check_names and self.server.schema and not self.server.schema.partial:
+            return self.server.schema
+        return None
+
     @property
     def usage(self):
         """Usage statistics for the connection.
@@ -293,10 +451,13 @@ class Connection(object):
         if not self._usage:
             return None
         if self.strategy.pooled:
+            filter_cache_hits, filter_cache_misses = self._usage.filter_cache_hits, self._usage.filter_cache_misses  # filters are compiled in this connection, not in the pooled ones
             self._usage.reset()
             for connection in self.strategy.pool.connections:
                 self._usage += connection.connection.usage
             self._usage += self.strategy.pool.terminated_usage
+            self._usage.filter_cache_hits += filter_cache_hits
+            self._usage.filter_cache_misses += filter_cache_misses
         return self._usage
 
     def __enter__(self):
@@ -357,21 +518,27 @@ class Connection(object):
                 self.last_error = 'unknown authentication method'
                 raise LDAPUnknownAuthenticationMethodError(self.last_error)
 
+            if self.strategy.coroutines:  # the returned coroutine completes the bind and refreshes the server info
+                return self.strategy.complete(response, lambda response: self._bind_result(self.result), refresh_info=not self.strategy.pooled)
+
             if not self.strategy.sync and self.authentication != AUTH_SASL:  # get response if async except for sasl that return the bind result even for async
                 response, result = self.get_response(response)
             else:
                 result = self.result
 
-            if result is None:
-                self.bound = True if self.strategy_type == STRATEGY_REUSABLE_THREADED else False
-            else:
-                self.bound = True if result['result'] == RESULT_SUCCESS else False
+            if self._bind_result(result) and not self.strategy.pooled:
+                self.refresh_dsa_info()
 
-            if not self.bound and result and result['description']:
-                self.last_error = result['description']
+        return self.bound
 
-            if self.bound and not self.strategy.pooled:
-                self.refresh_dsa_info()
+    def _bind_result(self, result):
+        if result is None:
+            self.bound = True if self.strategy_type == STRATEGY_REUSABLE_THREADED else False
+        else:
+            self.bound = True if result['result'] == RESULT_SUCCESS else False
+
+        if not self.bound and result and result['description']:
+            self.last_error = result['description']
 
         return self.bound
 
@@ -441,15 +608,63 @@ class Connection(object):
                 controls = []
             controls.append(('1.2.840.113556.1.4.319', paged_criticality if isinstance(paged_criticality, bool) else False, encoder.encode(real_search_control_value)))
 
-        request = search_operation(search_base, search_filter, search_scope, dereference_aliases, attributes, size_limit, time_limit, types_only, self.server.schema if self.server and self.check_names else None)
+        if self.fast_encoder:
+            request = fast_search_operation(search_base, search_filter, search_scope, dereference_aliases, attributes, size_limit, time_limit, types_only, self._check_names_schema, self._usage, self._filter_optimizer)
+        else:
+            request = search_operation(search_base, search_filter, search_scope, dereference_aliases, attributes, size_limit, time_limit, types_only, self._check_names_schema, self._usage, self._filter_optimizer)
 
         response = self.post_send_search(self.send('searchRequest', request, controls))
         if isinstance(response, int):
             return response
-        if self.result['type'] == 'searchResDone' and len(response) > 0:
-            return True
 
-        return False
+        return self._operation_result(response, lambda response: self.result['type'] == 'searchResDone' and len(response) > 0)
+
+    def prepare_search(self,
+                       search_base,
+                       filter_template,
+                       search_scope=SEARCH_SCOPE_WHOLE_SUBTREE,
+                       dereference_aliases=SEARCH_DEREFERENCE_ALWAYS,
+                       attributes=None,
+                       size_limit=0,
+                       time_limit=0,
+                       types_only=False,
+                       get_operational_attributes=False,
+                       controls=None):
+        """
+        Prepare an ldap search to be performed many times with different values:
+
+        - Each %s in filter_template is a parameter of the search and
+          can be used only in assertion values, as in '(uid=%s)'
+        - The filter is parsed, checked and encoded in BER only once
+        - Returns a PreparedSearch, call its search() method with a value
+          for each parameter, values are matched literally and need no escaping
+        """
+        if not attributes:
+            attributes = [NO_ATTRIBUTES]
+        elif attributes == ALL_ATTRIBUTES:
+            attributes = ['*']
+
+        if get_operational_attributes:
+            attributes = list(attributes) + [ALL_OPERATIONAL_ATTRIBUTES]
+
+        request_template = prepare_search_operation(search_base, filter_template, search_scope, dereference_aliases, attributes, size_limit, time_limit, types_only, self._check_names_schema, self._filter_optimizer)
+        return PreparedSearch(self, request_template, list(controls) if controls else None)
+
+    def pipeline(self,
+                 window=PIPELINE_WINDOW,
+                 stop_on_error=False):
+        """
+        Returns a Pipeline to be used as a context manager:
+
+        - Operations performed in the context are sent without waiting
+          for the responses of the previous ones, with up to window
+          requests in flight, and return the messageId
+        - When the context is exited the results attribute of the
+          Pipeline has a (response, result) tuple for each operation
+        - If stop_on_error is True no more requests are sent after
+          an unsuccessful result
+        """
+        return Pipeline(self, window, stop_on_error)
 
     def compare(self,
                 dn,
@@ -460,11 +675,11 @@ class Connection(object):
         Perform a compare operation
         """
         self._fire_deferred()
-        request = compare_operation(dn, attribute, value, self.server.schema if self.server and self.check_names else None)
+        request = compare_operation(dn, attribute, value, self._check_names_schema)
         response = self.post_send_single_response(self.send('compareRequest', request, controls))
         if isinstance(response, int):
             return response
-        return True if self.result['type'] == 'compareResponse' and self.result['result'] == RESULT_COMPARE_TRUE else False
+        return self._operation_result(response, lambda response: self.result['type'] == 'compareResponse' and self.result['result'] == RESULT_COMPARE_TRUE)
 
     def add(self,
             dn,
@@ -502,13 +717,16 @@ class Connection(object):
             self.last_error = 'ObjectClass attribute is mandatory'
             raise LDAPObjectClassError(self.last_error)
 
-        request = add_operation(dn, attributes, self.server.schema if self.server and self.check_names else None)
+        if self.fast_encoder:
+            request = fast_add_operation(dn, attributes, self._check_names_schema)
+        else:
+            request = add_operation(dn, attributes, self._check_names_schema)
         response = self.post_send_single_response(self.send('addRequest', request, controls))
 
         if isinstance(response, (int, str)):
             return response
 
-        return True if self.result['type'] == 'addResponse' and self.result['result'] == RESULT_SUCCESS else False
+        return self._operation_result(response, lambda response: self.result['type'] == 'addResponse' and self.result['result'] == RESULT_SUCCESS)
 
     def delete(self,
                dn,
@@ -527,7 +745,7 @@ class Connection(object):
         if isinstance(response, (int, str)):
             return response
 
-        return True if self.result['type'] == 'delResponse' and self.result['result'] == RESULT_SUCCESS else False
+        return self._operation_result(response, lambda response: self.result['type'] == 'delResponse' and self.result['result'] == RESULT_SUCCESS)
 
     def modify(self,
                dn,
@@ -561,13 +779,16 @@ class Connection(object):
                 self.last_error = 'unknown change type'
                 raise LDAPChangesError(self.last_error)
 
-        request = modify_operation(dn, changes, self.server.schema if self.server and self.check_names else None)
+        if self.fast_encoder:
+            request = fast_modify_operation(dn, changes, self._check_names_schema)
+        else:
+            request = modify_operation(dn, changes, self._check_names_schema)
         response = self.post_send_single_response(self.send('modifyRequest', request, controls))
 
         if isinstance(response, (int, str)):
             return response
 
-        return True if self.result['type'] == 'modifyResponse' and self.result['result'] == RESULT_SUCCESS else False
+        return self._operation_result(response, lambda response: self.result['type'] == 'modifyResponse' and self.result['result'] == RESULT_SUCCESS)
 
     def modify_dn(self,
                   dn,
@@ -594,7 +815,7 @@ class Connection(object):
         if isinstance(response, (int, str)):
             return response
 
-        return True if self.result['type'] == 'modDNResponse' and self.result['result'] == RESULT_SUCCESS else False
+        return self._operation_result(response, lambda response: self.result['type'] == 'modDNResponse' and self.result['result'] == RESULT_SUCCESS)
 
     def abandon(self,
                 message_id,
@@ -625,9 +846,27 @@ class Connection(object):
         response = self.post_send_single_response(self.send('extendedReq', request, controls))
         if isinstance(response, int):
             return response
-        return True if self.result['type'] == 'extendedResp' and self.result['result'] == RESULT_SUCCESS else False
+        return self._operation_result(response, lambda response: self.result['type'] == 'extendedResp' and self.result['result'] == RESULT_SUCCESS)
+
+    def _operation_result(self, response, result_function):
+        """
+        Returns the value computed by result_function from the response of the operation
+        For strategies with coroutines returns a coroutine that must be awaited to get the value
+        With return_futures returns the Future of the operation
+        """
+        if self.strategy.coroutines:
+            return self.strategy.complete(response, result_function)
+
+        if self.return_futures:  # the Future is completed by the receiver thread
+            return response
+
+        return result_function(response)
 
     def start_tls(self):  # as per RFC4511. Removal of TLS is defined as MAY in RFC4511 so the client can't implement a generic stop_tls method0
+        if self.strategy.coroutines or self.strategy.thread_safe or self.io_loop is not None:
+            self.last_error = 'start_tls not available with the asyncio and multiplexed strategies and with io_loop' + ('' if self.io_loop is not None else ', use ssl')
+            raise LDAPStartTLSError(self.last_error)
+
         if not self.server.tls:
             self.server.tls = Tls()
 
@@ -658,6 +897,9 @@ class Connection(object):
         return response
 
     def refresh_dsa_info(self):
+        if self.strategy.coroutines:  # returns a coroutine that reads the server info
+            return self.strategy.refresh_dsa_info()
+
         if not self.closed:
             previous_response = self.response
             previous_result = self.result
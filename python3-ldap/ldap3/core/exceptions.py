@@ -461,6 +461,10 @@ class LDAPObjectClassError(LDAPExceptionError):
     pass
 
 
+class LDAPPipelineError(LDAPExceptionError):
+    pass
+
+
 # communication exceptions
 class LDAPCommunicationError(LDAPExceptionError):
     pass
@@ -507,6 +511,10 @@ class LDAPConnectionPoolNotStartedError(LDAPExceptionError):
     pass
 
 
+class LDAPConnectionPoolSizeError(LDAPExceptionError):
+    pass
+
+
 # restartable strategy
 class LDAPMaximumRetriesError(LDAPExceptionError):
     def __str__(self):
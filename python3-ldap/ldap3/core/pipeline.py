@@ -0,0 +1,120 @@
+"""
+"""
+
+# Created on 2014.09.22
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+from collections import deque
+
+from .. import DO_NOT_RAISE_EXCEPTIONS
+from .exceptions import LDAPPipelineError, LDAPException
+
+
+class Pipeline(object):
+    """
+    Returned by Connection.pipeline(), operations performed on the connection in its context are sent without waiting
+    for the responses of the previous ones, up to window requests in flight
+    Responses are matched by messageId, operations return the messageId and results has a (response, result) tuple
+    for each operation, in the same order, when the context is exited
+    If stop_on_error is True no more requests are sent after an unsuccessful result, their operations return 0 and their results are None
+    With raise_exceptions in the connection the first unsuccessful result raises LDAPOperationResult as in the operations outside the pipeline
+    """
+
+    def __init__(self, connection, window, stop_on_error=False):
+        if window < 1:
+            raise LDAPPipelineError('window must be at least 1')
+
+        self.connection = connection
+        self.window = window
+        self.stop_on_error = stop_on_error
+        self.results = []
+        self.error = None  # index in results of the first unsuccessful operation
+        self._in_flight = deque()  # (index, messageId) of the requests without response
+        self._connection_functions = None
+
+    def __repr__(self):
+        return 'Pipeline(window={0.window!r}, stop_on_error={0.stop_on_error!r})'.format(self)
+
+    def __enter__(self):
+        if self.connection.strategy.no_real_dsa or self.connection.strategy.coroutines or self.connection.strategy.thread_safe:
+            raise LDAPPipelineError('pipeline not available with ' + self.connection.strategy.__class__.__name__)
+        if self._connection_functions:
+            raise LDAPPipelineError('pipeline already in use')
+
+        self.results = []
+        self.error = None
+        self._connection_functions = (self.connection.send, self.connection.post_send_search, self.connection.post_send_single_response)
+        self.connection.send = self._send
+        self.connection.post_send_search = self._queue
+        self.connection.post_send_single_response = self._queue
+        return self
+
+    # noinspection PyUnusedLocal
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.connection.send, self.connection.post_send_search, self.connection.post_send_single_response = self._connection_functions
+        self._connection_functions = None
+        try:
+            while self._in_flight:
+                self._complete_oldest()
+        except LDAPException:
+            if exc_type is None:
+                raise
+            for index, message_id in self._in_flight:  # don't hide the original exception, responses of the requests in flight are dropped
+                self.connection.strategy._discard(message_id)
+            self._in_flight.clear()
+
+        return False
+
+    @property
+    def stopped(self):
+        return self.stop_on_error and self.error is not None
+
+    def _send(self, message_type, request, controls=None):
+        if message_type in ['bindRequest', 'unbindRequest'] or self.connection.starting_tls:
+            raise LDAPPipelineError('bind, unbind and start_tls cannot be pipelined')
+
+        if self.stopped:
+            return 0  # messageId 0 is never used in requests, the operation is not sent
+
+        return self._connection_functions[0](message_type, request, controls)
+
+    def _queue(self, message_id):
+        """
+        Used as post_send_search and post_send_single_response of the connection, waits for the oldest responses when the window is full
+        """
+        self.results.append(None)
+        if message_id:
+            self._in_flight.append((len(self.results) - 1, message_id))
+            while len(self._in_flight) >= self.window:
+                self._complete_oldest()
+
+        return message_id
+
+    def _complete_oldest(self):
+        index, message_id = self._in_flight.popleft()
+        response, result = self.connection.get_response(message_id)
+        if result is None:
+            raise LDAPPipelineError('no response received for the pipelined operation ' + str(index))
+
+        self.results[index] = (response, result)
+        if self.error is None and result['result'] not in DO_NOT_RAISE_EXCEPTIONS:
+            self.error = index
@@ -0,0 +1,52 @@
+"""
+"""
+
+# Created on 2014.09.08
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+
+
+class PreparedSearch(object):
+    """
+    Search returned by Connection.prepare_search(), the request is parsed and encoded only once
+    Each search() sends the encoded request with the parameter values spliced in and a new messageID
+    """
+
+    def __init__(self, connection, request_template, controls=None):
+        self.connection = connection
+        self.request_template = request_template
+        self.controls = controls
+
+    def __repr__(self):
+        return 'PreparedSearch(' + repr(self.request_template.request_dict) + ')'
+
+    def search(self, *parameters):
+        """
+        Perform the prepared search with a value for each parameter of the filter template
+        Values are matched literally, no escaping is needed
+        """
+        self.connection._fire_deferred()
+        response = self.connection.post_send_search(self.connection.send('searchRequest', self.request_template.request(parameters), self.controls))
+        if isinstance(response, int):
+            return response
+
+        return self.connection._operation_result(response, lambda response: self.connection.result['type'] == 'searchResDone' and len(response) > 0)
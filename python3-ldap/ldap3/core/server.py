@@ -25,12 +25,50 @@
 
 import socket
 from threading import Lock
-from .. import GET_NO_INFO, GET_DSA_INFO, GET_SCHEMA_INFO, GET_ALL_INFO, ALL_ATTRIBUTES, SEARCH_SCOPE_BASE_OBJECT, LDAP_MAX_INT
+from weakref import WeakValueDictionary
+from .. import GET_NO_INFO, GET_DSA_INFO, GET_SCHEMA_INFO, GET_ALL_INFO, ALL_ATTRIBUTES, SEARCH_SCOPE_BASE_OBJECT, LDAP_MAX_INT, RECEIVE_MAX_SIZE
 from .exceptions import LDAPInvalidPort
 from ..core.exceptions import LDAPInvalidServerError
 from ..protocol.rfc4512 import SchemaInfo, DsaInfo
+from ..protocol.offlineSchema import is_offline_schema, offline_dsa_info, offline_schema_info
+from ..utils.schemaCache import load_cached_schema, save_cached_schema
 from .tls import Tls
 
+SCHEMA_ATTRIBUTES = ['objectClasses',  # requests specific subschema attributes
+                     'attributeTypes',
+                     'ldapSyntaxes',
+                     'matchingRules',
+                     'matchingRuleUse',
+                     'dITContentRules',
+                     'dITStructureRules',
+                     'nameForms',
+                     'createTimestamp',
+                     'modifyTimestamp',
+                     '*']  # requests all remaining attributes (other)
+
+
+# SchemaInfo objects shared between servers, kept while used by at least one server
+# a registered SchemaInfo is read only, it's used by the connections of all the servers that share it
+schema_registry = WeakValueDictionary()
+schema_registry_lock = Lock()
+
+
+def registered_schema(key):
+    with schema_registry_lock:
+        return schema_registry.get(key)
+
+
+def register_schema(key, schema_info):
+    """
+    Registers the schema, returns the schema already registered with the same key if present
+    """
+    with schema_registry_lock:
+        registered_schema_info = schema_registry.get(key)
+        if registered_schema_info is None:
+            schema_registry[key] = schema_info
+            registered_schema_info = schema_info
+        return registered_schema_info
+
 
 class Server(object):
     """
@@ -47,6 +85,28 @@ class Server(object):
     Per RFC 4516. Use ('*', False) to allow any host with anonymous
     bind, use ('*', True) to allow any host with same authentication of
     Server.
+
+    receive_buffer_size sets the SO_RCVBUF option of the socket (None
+    keeps the OS default), max_receive_size is the max number of bytes
+    requested in a single receive when the length of the incoming
+    message is known.
+
+    If schema_cache is a directory the schema read from the server is
+    saved there and reused until the modifyTimestamp of the subschema
+    entry changes.
+
+    If lazy_schema is True the definitions in the schema are parsed
+    only when first used.
+
+    If shared_schema is True servers that return the same subschema
+    entry with the same modifyTimestamp and vendor share a single
+    SchemaInfo object, read only by the first connection. The shared
+    SchemaInfo is used by all the connections of these servers and
+    must not be modified.
+
+    If get_info is one of the OFFLINE_SCHEMA_* constants the DSA info
+    and the schema are loaded from a snapshot bundled with the library
+    and the server is never read.
     """
 
     _message_counter = 0
@@ -59,7 +119,12 @@ class Server(object):
                  allowed_referral_hosts=None,
                  get_info=GET_NO_INFO,
                  tls=None,
-                 formatter=None):
+                 formatter=None,
+                 receive_buffer_size=None,
+                 max_receive_size=RECEIVE_MAX_SIZE,
+                 schema_cache=None,
+                 lazy_schema=False,
+                 shared_schema=False):
 
         url_given = False
         if host.startswith('ldap://'):
@@ -135,6 +200,14 @@ class Server(object):
         self.lock = Lock()
         self.custom_formatter = formatter
         self._address_info = None  # property self.address_info resolved at open time (or when you call check_availability)
+        self.receive_buffer_size = receive_buffer_size
+        self.max_receive_size = max_receive_size
+        self.schema_cache = schema_cache
+        self.lazy_schema = lazy_schema
+        self.shared_schema = shared_schema
+        if is_offline_schema(get_info):
+            self._dsa_info = offline_dsa_info(get_info)
+            self._schema_info = offline_schema_info(get_info, lazy_schema)
 
     @staticmethod
     def _is_ipv6(host):
@@ -156,6 +229,11 @@ class Server(object):
         r += '' if not self.allowed_referral_hosts else ', allowed_referral_hosts={0.allowed_referral_hosts!r}'.format(self)
         r += '' if self.tls is None else ', tls={0.tls!r}'.format(self)
         r += '' if not self.get_info else ', get_info={0.get_info!r}'.format(self)
+        r += '' if self.receive_buffer_size is None else ', receive_buffer_size={0.receive_buffer_size!r}'.format(self)
+        r += '' if self.max_receive_size == RECEIVE_MAX_SIZE else ', max_receive_size={0.max_receive_size!r}'.format(self)
+        r += '' if self.schema_cache is None else ', schema_cache={0.schema_cache!r}'.format(self)
+        r += '' if not self.lazy_schema else ', lazy_schema={0.lazy_schema!r}'.format(self)
+        r += '' if not self.shared_schema else ', shared_schema={0.shared_schema!r}'.format(self)
         r += ')'
 
         return r
@@ -199,8 +277,9 @@ class Server(object):
             Server._message_counter += 1
             if Server._message_counter >= LDAP_MAX_INT:
                 Server._message_counter = 1
+            message_id = Server._message_counter  # read inside the lock, another thread could increment the counter
 
-        return Server._message_counter
+        return message_id
 
     def _get_dsa_info(self, connection):
         """
@@ -234,21 +313,29 @@ class Server(object):
                     schema_entry = results[0]['attributes']['subschemaSubentry'][0]
 
         result = None
+        modify_timestamp = None
+        registry_key = None
+        if schema_entry and (self.schema_cache or self.shared_schema):
+            modify_timestamp = self._get_schema_modify_timestamp(connection, schema_entry)
+            schema_info = None
+            if modify_timestamp:
+                if self.shared_schema:
+                    registry_key = self._schema_registry_key(schema_entry, modify_timestamp)
+                    schema_info = registered_schema(registry_key)
+                if not schema_info and self.schema_cache:
+                    schema_info = load_cached_schema(self.schema_cache, self.name, schema_entry, modify_timestamp)
+                    if schema_info and registry_key:
+                        schema_info = register_schema(registry_key, schema_info)
+            if schema_info:
+                with self.lock:
+                    self._schema_info = schema_info
+                return
+
         if schema_entry:
             result = connection.search(schema_entry,
                                        search_filter='(objectClass=subschema)',
                                        search_scope=SEARCH_SCOPE_BASE_OBJECT,
-                                       attributes=['objectClasses',  # requests specific subschema attributes
-                                                   'attributeTypes',
-                                                   'ldapSyntaxes',
-                                                   'matchingRules',
-                                                   'matchingRuleUse',
-                                                   'dITContentRules',
-                                                   'dITStructureRules',
-                                                   'nameForms',
-                                                   'createTimestamp',
-                                                   'modifyTimestamp',
-                                                   '*'],  # requests all remaining attributes (other)
+                                       attributes=list(SCHEMA_ATTRIBUTES),
                                        get_operational_attributes=True
                                        )
 
@@ -256,11 +343,40 @@ class Server(object):
             self._schema_info = None
             if result:
                 if isinstance(result, bool):  # sync request
-                    self._schema_info = SchemaInfo(schema_entry, connection.response[0]['attributes']) if result else None
+                    self._schema_info = SchemaInfo(schema_entry, connection.response[0]['attributes'], self.lazy_schema) if result else None
                 else:  # async request, must check if attributes in response
                     results, _ = connection.get_response(result)
                     if len(results) == 1 and 'attributes' in results[0]:
-                        self._schema_info = SchemaInfo(schema_entry, results[0]['attributes'])
+                        self._schema_info = SchemaInfo(schema_entry, results[0]['attributes'], self.lazy_schema)
+            if self._schema_info and modify_timestamp:
+                if self.schema_cache:
+                    save_cached_schema(self.schema_cache, self.name, schema_entry, modify_timestamp, self._schema_info)
+                if registry_key:
+                    self._schema_info = register_schema(registry_key, self._schema_info)
+
+    def _schema_registry_key(self, schema_entry, modify_timestamp):
+        """
+        Servers with the same subschema entry, modifyTimestamp and vendor share the same SchemaInfo
+        """
+        vendor = None
+        if self._dsa_info:
+            vendor = (tuple(self._dsa_info.vendor_name or []), tuple(self._dsa_info.vendor_version or []))
+        return schema_entry, tuple(modify_timestamp), vendor, self.lazy_schema
+
+    def _get_schema_modify_timestamp(self, connection, schema_entry):
+        """
+        Read only the modifyTimestamp of the subschema entry, used to check if the cached schema is still valid
+        The raw value is used because formatting depends on the schema already loaded in the server
+        """
+        result = connection.search(schema_entry, '(objectClass=subschema)', SEARCH_SCOPE_BASE_OBJECT, attributes=['modifyTimestamp'])
+        if isinstance(result, bool):  # sync request
+            return connection.response[0]['raw_attributes'].get('modifyTimestamp') if result else None
+        elif result:  # async request, must check if modifyTimestamp in attributes
+            results, _ = connection.get_response(result)
+            if len(results) == 1 and 'raw_attributes' in results[0]:
+                return results[0]['raw_attributes'].get('modifyTimestamp')
+
+        return None
 
     def get_info_from_server(self, connection):
         """
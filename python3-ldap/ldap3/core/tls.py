@@ -136,20 +136,29 @@ class Tls(object):
         r = 'Tls(' + r[2:] + ')'
         return r
 
+    def ssl_context(self):
+        """
+        Returns the SSLContext used to wrap sockets, the server name is checked after the handshake
+        """
+        if not use_ssl_context:
+            raise LDAPSSLNotSupportedError('SSLContext not available')
+
+        ssl_context = create_default_context(purpose=Purpose.SERVER_AUTH, cafile=self.ca_certs_file, capath=self.ca_certs_path, cadata=self.ca_certs_data)
+        if self.private_key_file:
+            ssl_context.load_cert_chain(self.certificate_file, keyfile=self.private_key_file, password=self.private_key_password)
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = self.validate
+        if not self.version is None:  # if version is present overrides the default context version
+            ssl_context.protocol = self.version
+        return ssl_context
+
     def wrap_socket(self, connection, do_handshake=False):
         """
         Adds TLS to the connection socket
         """
 
         if use_ssl_context:
-            ssl_context = create_default_context(purpose=Purpose.SERVER_AUTH, cafile=self.ca_certs_file, capath=self.ca_certs_path, cadata=self.ca_certs_data)
-            if self.private_key_file:
-                ssl_context.load_cert_chain(self.certificate_file, keyfile=self.private_key_file, password=self.private_key_password)
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = self.validate
-            if not self.version is None:  # if version is present overrides the default context version
-                ssl_context.protocol = self.version
-            wrapped_socket = ssl_context.wrap_socket(connection.socket, server_side=False, do_handshake_on_connect=do_handshake)
+            wrapped_socket = self.ssl_context().wrap_socket(connection.socket, server_side=False, do_handshake_on_connect=do_handshake)
         else:
             if self.version is None:
                 self.version = ssl.PROTOCOL_SSLv23
@@ -57,6 +57,8 @@ class ConnectionUsage(object):
         self.restartable_failures = 0
         self.restartable_successes = 0
         self.servers_from_pool = 0
+        self.filter_cache_hits = 0
+        self.filter_cache_misses = 0
 
     def __init__(self):
         self.initial_connection_start_time = None
@@ -85,6 +87,8 @@ class ConnectionUsage(object):
         self.restartable_failures = 0
         self.restartable_successes = 0
         self.servers_from_pool = 0
+        self.filter_cache_hits = 0
+        self.filter_cache_misses = 0
 
     def __repr__(self):
         r = 'Connection Usage:' + linesep
@@ -119,6 +123,9 @@ class ConnectionUsage(object):
         r += '  Restartable tries:     ' + str(self.restartable_failures + self.restartable_successes) + linesep
         r += '    Failed restarts:     ' + str(self.restartable_failures) + linesep
         r += '    Successful restarts: ' + str(self.restartable_successes) + linesep
+        r += '  Filter cache:          ' + str(self.filter_cache_hits + self.filter_cache_misses) + linesep
+        r += '    Hits:                ' + str(self.filter_cache_hits) + linesep
+        r += '    Misses:              ' + str(self.filter_cache_misses) + linesep
         return r
 
     def __str__(self):
@@ -151,6 +158,8 @@ class ConnectionUsage(object):
         self.restartable_failures += other.restartable_failures
         self.restartable_successes += other.restartable_successes
         self.servers_from_pool += other.servers_from_pool
+        self.filter_cache_hits += other.filter_cache_hits
+        self.filter_cache_misses += other.filter_cache_misses
         return self
 
     def transmitted_message(self, message, length):
@@ -25,6 +25,8 @@
 
 from ..protocol.rfc4511 import AddRequest, LDAPDN, AttributeList, Attribute, AttributeDescription, ValsAtLeast1, ResultCode
 from ..protocol.convert import referrals_to_list, attributes_to_dict, validate_attribute_value
+from ..protocol.berEncoder import EncodedRequest, encode_add_request, to_octets
+from ..protocol.berDecoder import to_unicode
 
 # AddRequest ::= [APPLICATION 8] SEQUENCE {
 #     entry           LDAPDN,
@@ -55,6 +57,25 @@ def add_operation(dn,
     return request
 
 
+def fast_add_operation(dn,
+                       attributes,
+                       schema=None):
+    """
+    Same as add_operation() but the request is directly encoded in BER without building the pyasn1 objects
+    """
+    encoded_attributes = []
+    request_attributes = dict()
+    for attribute in attributes:
+        if isinstance(attributes[attribute], (list, tuple)):
+            values = [to_octets(validate_attribute_value(schema, attribute, value)) for value in attributes[attribute]]
+        else:
+            values = [to_octets(validate_attribute_value(schema, attribute, attributes[attribute]))]
+        encoded_attributes.append((attribute, values))
+        request_attributes[attribute] = [to_unicode(bytes(value)) for value in values]
+
+    return EncodedRequest(encode_add_request(dn, encoded_attributes), {'entry': dn, 'attributes': request_attributes})
+
+
 def add_request_to_dict(request):
     return {'entry': str(request['entry']),
             'attributes': attributes_to_dict(request['attributes'])}
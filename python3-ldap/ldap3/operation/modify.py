@@ -26,6 +26,8 @@
 from ..protocol.rfc4511 import ModifyRequest, LDAPDN, Changes, Change, Operation, PartialAttribute, AttributeDescription, Vals, ResultCode
 from ..operation.bind import referrals_to_list
 from ..protocol.convert import changes_to_list, validate_attribute_value
+from ..protocol.berEncoder import EncodedRequest, encode_modify_request, to_octets
+from ..protocol.berDecoder import to_unicode
 
 
 # ModifyRequest ::= [APPLICATION 6] SEQUENCE {
@@ -70,6 +72,25 @@ def modify_operation(dn,
     return request
 
 
+def fast_modify_operation(dn,
+                          changes,
+                          schema=None):
+    """
+    Same as modify_operation() but the request is directly encoded in BER without building the pyasn1 objects
+    """
+    encoded_changes = []
+    request_changes = []
+    for attribute in changes:
+        if isinstance(changes[attribute][1], (list, tuple)):
+            values = [to_octets(validate_attribute_value(schema, attribute, value)) for value in changes[attribute][1]]
+        else:
+            values = [to_octets(validate_attribute_value(schema, attribute, changes[attribute][1]))]
+        encoded_changes.append((changes[attribute][0], attribute, values))
+        request_changes.append({'operation': int(changes[attribute][0]), 'attribute': {'type': attribute, 'value': [to_unicode(bytes(value)) for value in values]}})
+
+    return EncodedRequest(encode_modify_request(dn, encoded_changes), {'entry': dn, 'changes': request_changes})
+
+
 def modify_request_to_dict(request):
     return {'entry': str(request['object']),
             'changes': changes_to_list(request['changes'])}
@@ -25,15 +25,24 @@
 
 from string import whitespace
 from os import linesep
+from collections import OrderedDict
+from threading import Lock
+import re
 
 from .. import SEARCH_NEVER_DEREFERENCE_ALIASES, SEARCH_SCOPE_BASE_OBJECT, SEARCH_SCOPE_SINGLE_LEVEL, SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_IN_SEARCHING, SEARCH_DEREFERENCE_FINDING_BASE_OBJECT, SEARCH_DEREFERENCE_ALWAYS, NO_ATTRIBUTES, \
-    ATTRIBUTES_EXCLUDED_FROM_CHECK, CASE_INSENSITIVE_ATTRIBUTE_NAMES
+    ATTRIBUTES_EXCLUDED_FROM_CHECK, CASE_INSENSITIVE_ATTRIBUTE_NAMES, FILTER_CACHE_SIZE
 from ..core.exceptions import LDAPInvalidFilterError, LDAPAttributeError, LDAPInvalidScopeError, LDAPInvalidDereferenceAliasesError
 from ..utils.caseInsensitiveDictionary import CaseInsensitiveDict
+from ..utils.attributeNames import attribute_names
+from ..utils.lazyDictionary import LazyDict
+from ..utils.conv import escape_filter_chars, escape_bytes
 from ..protocol.rfc4511 import SearchRequest, LDAPDN, Scope, DerefAliases, Integer0ToMax, TypesOnly, AttributeSelection, Selector, EqualityMatch, AttributeDescription, AssertionValue, Filter, Not, And, Or, ApproxMatch, GreaterOrEqual, LessOrEqual, \
     ExtensibleMatch, Present, SubstringFilter, Substrings, Final, Initial, Any, ResultCode, Substring, MatchingRule, Type, MatchValue, DnAttributes
 from ..operation.bind import referrals_to_list
-from ..protocol.convert import ava_to_dict, attributes_to_list, search_refs_to_list, validate_assertion_value, format_attribute_values
+from ..protocol.convert import ava_to_dict, attributes_to_list, search_refs_to_list, validate_assertion_value
+from ..protocol.berDecoder import to_unicode
+from ..protocol.berEncoder import EncodedRequest, EncodingTemplate, SubstringsTemplate, build_encoding_template, to_octets, encode_sequence, encode_octet_string, encode_tlv, encode_attribute_value_assertion, encode_search_request, FILTER_AND, FILTER_OR, FILTER_NOT, FILTER_EQUALITY_MATCH, FILTER_SUBSTRINGS, \
+    FILTER_GREATER_OR_EQUAL, FILTER_LESS_OR_EQUAL, FILTER_PRESENT, FILTER_APPROX_MATCH, FILTER_EXTENSIBLE_MATCH, SUBSTRING_INITIAL, SUBSTRING_ANY, SUBSTRING_FINAL, MATCHING_RULE, MATCHING_TYPE, MATCHING_VALUE, MATCHING_DN_ATTRIBUTES
 
 
 # SearchRequest ::= [APPLICATION 3] SEQUENCE {
@@ -71,6 +80,53 @@ SEARCH_OPEN_OR_CLOSE = 21
 SEARCH_MATCH_OR_CLOSE = 22
 SEARCH_MATCH_OR_CONTROL = 23
 
+# parameters in filter templates of prepared searches
+PARAMETER_PLACEHOLDER = '%s'
+PARAMETER_MARKER = '\x00\x1bP%d\x1b\x00'
+PARAMETER_MARKER_START = '\x00\x1bP'
+PARAMETER_PATTERN = re.compile(b'\x00\x1bP(\\d+)\x1b\x00')
+
+
+# kind of compiled filters in the filter cache
+COMPILED_FILTER = 0  # pyasn1 Filter object
+ENCODED_FILTER = 1  # BER octets
+
+
+class FilterCache(object):
+    """
+    Bounded LRU cache of compiled filters, keyed by kind, filter string and schema
+    The schema is part of the key because it's used to check attribute names and values while parsing
+    """
+
+    def __init__(self, size=FILTER_CACHE_SIZE):
+        self.size = size
+        self._filters = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._filters)
+
+    def get(self, key):
+        with self._lock:
+            compiled_filter = self._filters.pop(key, None)
+            if compiled_filter is not None:
+                self._filters[key] = compiled_filter  # most recently used filters are at the end
+            return compiled_filter
+
+    def add(self, key, compiled_filter):
+        if self.size > 0:
+            with self._lock:
+                self._filters[key] = compiled_filter
+                while len(self._filters) > self.size:
+                    self._filters.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._filters.clear()
+
+
+filter_cache = FilterCache()
+
 
 class FilterNode():
     def __init__(self, tag=None, assertion=None):
@@ -84,8 +140,8 @@ class FilterNode():
         self.elements.append(filter_node)
         return filter_node
 
-    def __str__(self, pos=0):
-        self.__repr__(pos)
+    def __str__(self):
+        return filter_node_to_string(self)
 
     def __repr__(self, pos=0):
         node_tags = ['ROOT', 'AND', 'OR', 'NOT', 'MATCH_APPROX', 'MATCH_GREATER_OR_EQUAL', 'MATCH_LESS_OR_EQUAL', 'MATCH_EXTENSIBLE', 'MATCH_PRESENT', 'MATCH_SUBSTRING', 'MATCH_EQUAL']
@@ -101,7 +157,7 @@ def evaluate_match(match, schema):
     match = match.strip()
     if '~=' in match:
         tag = MATCH_APPROX
-        left_part, _, right_part = match.split('~=')
+        left_part, _, right_part = match.partition('~=')
         left_part = left_part.strip()
         right_part = right_part.strip()
         assertion = {'attr': left_part, 'value': validate_assertion_value(schema, left_part, right_part)}
@@ -304,8 +360,152 @@ def compile_filter(filter_node):
     return compiled_filter
 
 
-def build_filter(search_filter, schema):
-    return compile_filter(parse_filter(search_filter, schema).elements[0])
+def encode_filter(filter_node):
+    """
+    Encode the filter node in BER, the octets are the same of the pyasn1 encoding of compile_filter(filter_node)
+    """
+    if filter_node.tag == AND:
+        return encode_sequence([encode_filter(element) for element in filter_node.elements], FILTER_AND)
+    elif filter_node.tag == OR:
+        return encode_sequence([encode_filter(element) for element in filter_node.elements], FILTER_OR)
+    elif filter_node.tag == NOT:
+        return encode_tlv(FILTER_NOT, encode_filter(filter_node.elements[0]))
+    elif filter_node.tag == MATCH_APPROX:
+        return encode_attribute_value_assertion(FILTER_APPROX_MATCH, filter_node.assertion)
+    elif filter_node.tag == MATCH_GREATER_OR_EQUAL:
+        return encode_attribute_value_assertion(FILTER_GREATER_OR_EQUAL, filter_node.assertion)
+    elif filter_node.tag == MATCH_LESS_OR_EQUAL:
+        return encode_attribute_value_assertion(FILTER_LESS_OR_EQUAL, filter_node.assertion)
+    elif filter_node.tag == MATCH_EXTENSIBLE:
+        components = []
+        if filter_node.assertion['matchingRule']:
+            components.append(encode_octet_string(filter_node.assertion['matchingRule'], MATCHING_RULE))
+        if filter_node.assertion['attr']:
+            components.append(encode_octet_string(filter_node.assertion['attr'], MATCHING_TYPE))
+        components.append(encode_octet_string(filter_node.assertion['value'], MATCHING_VALUE))
+        if filter_node.assertion['dnAttributes']:  # dnAttributes is DEFAULT FALSE
+            components.append(encode_tlv(MATCHING_DN_ATTRIBUTES, b'\x01'))
+        return encode_sequence(components, FILTER_EXTENSIBLE_MATCH)
+    elif filter_node.tag == MATCH_PRESENT:
+        return encode_octet_string(filter_node.assertion['attr'], FILTER_PRESENT)
+    elif filter_node.tag == MATCH_SUBSTRING:
+        substrings = []
+        if filter_node.assertion['initial']:
+            substrings.append(encode_octet_string(filter_node.assertion['initial'], SUBSTRING_INITIAL))
+        if filter_node.assertion['any']:
+            for substring in filter_node.assertion['any']:
+                substrings.append(encode_octet_string(substring, SUBSTRING_ANY))
+        if filter_node.assertion['final']:
+            substrings.append(encode_octet_string(filter_node.assertion['final'], SUBSTRING_FINAL))
+        return encode_sequence([encode_octet_string(filter_node.assertion['attr']), encode_sequence(substrings)], FILTER_SUBSTRINGS)
+    elif filter_node.tag == MATCH_EQUAL:
+        return encode_attribute_value_assertion(FILTER_EQUALITY_MATCH, filter_node.assertion)
+    else:
+        raise LDAPInvalidFilterError('unknown filter node tag')
+
+
+def escape_assertion_value(value):
+    if str != bytes:  # Python 3
+        try:
+            return escape_filter_chars(value.decode('utf-8'))
+        except UnicodeDecodeError:
+            return escape_bytes(value)
+    return escape_filter_chars(value)
+
+
+def filter_node_to_string(filter_node):
+    """
+    Returns the filter string (RFC4515) of the filter node, assertion values are escaped
+    """
+    if filter_node.tag == ROOT:
+        return ''.join([filter_node_to_string(element) for element in filter_node.elements])
+    elif filter_node.tag == AND:
+        return '(&' + ''.join([filter_node_to_string(element) for element in filter_node.elements]) + ')'
+    elif filter_node.tag == OR:
+        return '(|' + ''.join([filter_node_to_string(element) for element in filter_node.elements]) + ')'
+    elif filter_node.tag == NOT:
+        return '(!' + filter_node_to_string(filter_node.elements[0]) + ')'
+    elif filter_node.tag == MATCH_APPROX:
+        return '(' + filter_node.assertion['attr'] + '~=' + escape_assertion_value(filter_node.assertion['value']) + ')'
+    elif filter_node.tag == MATCH_GREATER_OR_EQUAL:
+        return '(' + filter_node.assertion['attr'] + '>=' + escape_assertion_value(filter_node.assertion['value']) + ')'
+    elif filter_node.tag == MATCH_LESS_OR_EQUAL:
+        return '(' + filter_node.assertion['attr'] + '<=' + escape_assertion_value(filter_node.assertion['value']) + ')'
+    elif filter_node.tag == MATCH_EXTENSIBLE:
+        filter_string = '(' + (filter_node.assertion['attr'] or '')
+        if filter_node.assertion['dnAttributes']:
+            filter_string += ':dn'
+        if filter_node.assertion['matchingRule']:
+            filter_string += ':' + filter_node.assertion['matchingRule']
+        return filter_string + ':=' + escape_assertion_value(filter_node.assertion['value']) + ')'
+    elif filter_node.tag == MATCH_PRESENT:
+        return '(' + filter_node.assertion['attr'] + '=*)'
+    elif filter_node.tag == MATCH_SUBSTRING:
+        substrings = [filter_node.assertion['initial'] or b''] + list(filter_node.assertion['any'] or []) + [filter_node.assertion['final'] or b'']
+        return '(' + filter_node.assertion['attr'] + '=' + '*'.join([escape_assertion_value(substring) for substring in substrings]) + ')'
+    elif filter_node.tag == MATCH_EQUAL:
+        return '(' + filter_node.assertion['attr'] + '=' + escape_assertion_value(filter_node.assertion['value']) + ')'
+    else:
+        raise LDAPInvalidFilterError('unknown filter node tag')
+
+
+def validate_filter_node(filter_node, schema):
+    """
+    Checks the attribute names of a filter not built from a string
+    """
+    if schema and schema.attribute_types is not None:
+        if filter_node.assertion and filter_node.assertion['attr'] and filter_node.assertion['attr'].lower() not in schema.attribute_types:
+            raise LDAPAttributeError('invalid attribute type in assertion: ' + filter_node.assertion['attr'])
+        for element in filter_node.elements:
+            validate_filter_node(element, schema)
+
+
+def cached_filter(kind, compile_function, search_filter, schema, usage, optimizer=None):
+    """
+    Returns the compiled filter from the filter cache, the filter is parsed and compiled only if not in cache
+    If optimizer is given the parsed filter is optimized before compiling it
+    """
+    if isinstance(search_filter, FilterNode):  # filter built with the filter builder, the canonical form is the key
+        validate_filter_node(search_filter, schema)
+        key = (kind, optimizer.canonical(search_filter), schema, optimizer)
+    else:
+        key = (kind, search_filter, schema, optimizer)
+    compiled_filter = filter_cache.get(key)
+    if compiled_filter is None:
+        filter_node = filter_tree(search_filter, schema)
+        if optimizer:
+            filter_node = optimizer.optimize(filter_node)
+        compiled_filter = compile_function(filter_node)
+        filter_cache.add(key, compiled_filter)
+        if usage:
+            usage.filter_cache_misses += 1
+    elif usage:
+        usage.filter_cache_hits += 1
+
+    return compiled_filter
+
+
+def filter_tree(search_filter, schema):
+    """
+    Returns the filter node to compile, filters built with the filter builder need no parsing
+    """
+    if isinstance(search_filter, FilterNode):
+        return search_filter.elements[0] if search_filter.tag == ROOT else search_filter
+    return parse_filter(search_filter, schema).elements[0]
+
+
+def build_filter(search_filter, schema, usage=None, optimizer=None):
+    if isinstance(search_filter, FilterNode) and not optimizer:  # filter built with the filter builder, no parsing needed
+        validate_filter_node(search_filter, schema)
+        return compile_filter(search_filter)
+    return cached_filter(COMPILED_FILTER, compile_filter, search_filter, schema, usage, optimizer)
+
+
+def build_encoded_filter(search_filter, schema, usage=None, optimizer=None):
+    if isinstance(search_filter, FilterNode) and not optimizer:  # filter built with the filter builder, no parsing needed
+        validate_filter_node(search_filter, schema)
+        return encode_filter(search_filter)
+    return cached_filter(ENCODED_FILTER, lambda filter_node: bytes(encode_filter(filter_node)), search_filter, schema, usage, optimizer)
 
 
 def build_attribute_selection(attribute_list, schema):
@@ -327,7 +527,9 @@ def search_operation(search_base,
                      size_limit,
                      time_limit,
                      types_only,
-                     schema=None):
+                     schema=None,
+                     usage=None,
+                     optimizer=None):
     request = SearchRequest()
     request['baseObject'] = LDAPDN(search_base)
 
@@ -354,7 +556,7 @@ def search_operation(search_base,
     request['sizeLimit'] = Integer0ToMax(size_limit)
     request['timeLimit'] = Integer0ToMax(time_limit)
     request['typesOnly'] = TypesOnly(True) if types_only else TypesOnly(False)
-    request['filter'] = build_filter(search_filter, schema)  # parse the searchFilter string and compile it starting from the root node
+    request['filter'] = build_filter(search_filter, schema, usage, optimizer)  # parse the searchFilter string and compile it starting from the root node
     if not isinstance(attributes, (list, tuple)):
         attributes = [NO_ATTRIBUTES]
 
@@ -363,6 +565,150 @@ def search_operation(search_base,
     return request
 
 
+def validate_search_parameters(search_scope, dereference_aliases, attributes, schema):
+    """
+    Checks the parameters of the search request built without pyasn1, returns the attributes list
+    """
+    if search_scope not in [SEARCH_SCOPE_BASE_OBJECT, SEARCH_SCOPE_SINGLE_LEVEL, SEARCH_SCOPE_WHOLE_SUBTREE]:
+        raise LDAPInvalidScopeError('invalid scope type')
+
+    if dereference_aliases not in [SEARCH_NEVER_DEREFERENCE_ALIASES, SEARCH_DEREFERENCE_IN_SEARCHING, SEARCH_DEREFERENCE_FINDING_BASE_OBJECT, SEARCH_DEREFERENCE_ALWAYS]:
+        raise LDAPInvalidDereferenceAliasesError('invalid dereference aliases type')
+
+    if not isinstance(attributes, (list, tuple)):
+        attributes = [NO_ATTRIBUTES]
+
+    for attribute in attributes:
+        if schema and schema.attribute_types is not None:
+            if not attribute.lower() in schema.attribute_types and attribute not in ATTRIBUTES_EXCLUDED_FROM_CHECK:
+                raise LDAPAttributeError('invalid attribute type in attribute list: ' + attribute)
+
+    return list(attributes)
+
+
+def fast_search_operation(search_base,
+                          search_filter,
+                          search_scope,
+                          dereference_aliases,
+                          attributes,
+                          size_limit,
+                          time_limit,
+                          types_only,
+                          schema=None,
+                          usage=None,
+                          optimizer=None):
+    """
+    Same as search_operation() but the request is directly encoded in BER without building the pyasn1 objects
+    """
+    attributes = validate_search_parameters(search_scope, dereference_aliases, attributes, schema)
+    encoded_filter = build_encoded_filter(search_filter, schema, usage, optimizer)
+    return EncodedRequest(encode_search_request(search_base, search_scope, dereference_aliases, size_limit, time_limit, types_only, encoded_filter, attributes),
+                          {'base': search_base,
+                           'scope': search_scope,
+                           'dereferenceAlias': dereference_aliases,
+                           'sizeLimit': size_limit,
+                           'timeLimit': time_limit,
+                           'typeOnly': bool(types_only),
+                           'filter': str(search_filter) if isinstance(search_filter, FilterNode) else search_filter.strip(),
+                           'attributes': attributes})
+
+
+class SearchRequestTemplate(object):
+    """
+    A searchRequest encoded in BER only once, the values of the filter template parameters are spliced in the encoded octets
+    """
+
+    def __init__(self, encoding_template, request_dict, filter_parts):
+        self.encoding_template = encoding_template
+        self.request_dict = request_dict
+        self.filter_parts = filter_parts
+        self.parameters = len(filter_parts) - 1
+
+    def __repr__(self):
+        return 'SearchRequestTemplate(' + repr(self.request_dict) + ')'
+
+    def request(self, parameters):
+        """
+        Returns the EncodedRequest for the parameters values
+        Values are sent as they are, characters with a special meaning in filters are escaped only in the filter of the request dict
+        """
+        if len(parameters) != self.parameters:
+            raise LDAPInvalidFilterError('filter template requires %d parameters, %d given' % (self.parameters, len(parameters)))
+
+        if isinstance(self.encoding_template, EncodingTemplate):
+            encoded = self.encoding_template.encode([to_octets(parameter) for parameter in parameters])
+        else:  # no parameters
+            encoded = self.encoding_template
+
+        search_filter = self.filter_parts[0]
+        for parameter, filter_part in zip(parameters, self.filter_parts[1:]):
+            search_filter += escape_filter_chars(parameter) + filter_part
+        request_dict = dict(self.request_dict)
+        request_dict['filter'] = search_filter
+        request_dict['attributes'] = list(self.request_dict['attributes'])
+        return EncodedRequest(encoded, request_dict)
+
+
+def check_filter_parameters(filter_node):
+    if filter_node.assertion:
+        for name in ['attr', 'matchingRule']:
+            if filter_node.assertion.get(name) and PARAMETER_MARKER_START in filter_node.assertion[name]:
+                raise LDAPInvalidFilterError('parameters are allowed only in assertion values')
+    for element in filter_node.elements:
+        check_filter_parameters(element)
+
+
+def substrings_templates(template):
+    """
+    Returns the template with the substrings filters containing parameters replaced by SubstringsTemplates
+    """
+    if not isinstance(template, EncodingTemplate):
+        return template
+    if template.tag == FILTER_SUBSTRINGS:
+        return SubstringsTemplate(template)
+    return EncodingTemplate(template.tag, [substrings_templates(part) for part in template.parts])
+
+
+def prepare_search_operation(search_base,
+                             filter_template,
+                             search_scope,
+                             dereference_aliases,
+                             attributes,
+                             size_limit,
+                             time_limit,
+                             types_only,
+                             schema=None,
+                             optimizer=None):
+    """
+    Parse, check and encode the search request only once, returns a SearchRequestTemplate
+    Each %s in filter_template is a parameter, parameters are allowed only in assertion values
+    Substrings left empty by the parameters are omitted, as in a filter string
+    """
+    attributes = validate_search_parameters(search_scope, dereference_aliases, attributes, schema)
+    filter_parts = filter_template.strip().split(PARAMETER_PLACEHOLDER)
+    marked_filter = filter_parts[0]
+    for index, filter_part in enumerate(filter_parts[1:]):
+        marked_filter += PARAMETER_MARKER % index + filter_part
+    filter_node = parse_filter(marked_filter, schema).elements[0]
+    check_filter_parameters(filter_node)
+    if optimizer:
+        filter_node = optimizer.optimize(filter_node)
+    encoded = encode_search_request(search_base, search_scope, dereference_aliases, size_limit, time_limit, types_only, encode_filter(filter_node), attributes)
+    if len(PARAMETER_PATTERN.findall(bytes(encoded))) != len(filter_parts) - 1:
+        raise LDAPInvalidFilterError('invalid parameters in filter template')
+
+    return SearchRequestTemplate(substrings_templates(build_encoding_template(encoded, PARAMETER_PATTERN)),
+                                 {'base': search_base,
+                                  'scope': search_scope,
+                                  'dereferenceAlias': dereference_aliases,
+                                  'sizeLimit': size_limit,
+                                  'timeLimit': time_limit,
+                                  'typeOnly': bool(types_only),
+                                  'filter': filter_template.strip(),
+                                  'attributes': attributes},
+                                 filter_parts)
+
+
 def decode_vals(vals):
     return [str(val) for val in vals if val] if vals else None
 
@@ -370,7 +716,7 @@ def decode_vals(vals):
 def attributes_to_dict(attribute_list):
     attributes = CaseInsensitiveDict() if CASE_INSENSITIVE_ATTRIBUTE_NAMES else dict()
     for attribute in attribute_list:
-        attributes[str(attribute['type'])] = decode_vals(attribute['vals'])
+        attributes[attribute_names.canonical(str(attribute['type']))] = decode_vals(attribute['vals'])
 
     return attributes
 
@@ -382,7 +728,7 @@ def decode_raw_vals(vals):
 def raw_attributes_to_dict(attribute_list):
     attributes = CaseInsensitiveDict() if CASE_INSENSITIVE_ATTRIBUTE_NAMES else dict()
     for attribute in attribute_list:
-        attributes[str(attribute['type'])] = decode_raw_vals(attribute['vals'])
+        attributes[attribute_names.canonical(str(attribute['type']))] = decode_raw_vals(attribute['vals'])
 
     return attributes
 
@@ -391,9 +737,11 @@ def checked_attributes_to_dict(attribute_list, schema=None, custom_formatter=Non
     if not schema:
         return None
 
+    formatter_table = schema.formatter_table(custom_formatter)
     checked_attributes = CaseInsensitiveDict() if CASE_INSENSITIVE_ATTRIBUTE_NAMES else dict()
     for attribute in attribute_list:
-        checked_attributes[str(attribute['type'])] = format_attribute_values(schema, str(attribute['type']), decode_raw_vals(attribute['vals']) or [], custom_formatter)
+        attribute_type = attribute_names.canonical(str(attribute['type']))
+        checked_attributes[attribute_type] = formatter_table.format(attribute_type, decode_raw_vals(attribute['vals']) or [])
     return checked_attributes
 
 
@@ -459,9 +807,18 @@ def search_request_to_dict(request):
             'attributes': attributes_to_list(request['attributes'])}
 
 
-def search_result_entry_response_to_dict(response, schema, custom_formatter, check_names):
+def search_result_entry_response_to_dict(response, schema, custom_formatter, check_names, lazy=False):
     entry = dict()
     entry['dn'] = str(response['object'])
+    if lazy:
+        attribute_list = [(attribute_names.canonical(str(attribute['type'])), attribute['vals']) for attribute in response['attributes']]
+        entry['raw_attributes'] = LazyDict(attribute_list, lambda attribute_type, vals: decode_raw_vals(vals), CASE_INSENSITIVE_ATTRIBUTE_NAMES)
+        if check_names and schema:
+            entry['attributes'] = LazyDict(attribute_list, lambda attribute_type, vals: schema.formatter_table(custom_formatter).format(attribute_type, decode_raw_vals(vals) or []), CASE_INSENSITIVE_ATTRIBUTE_NAMES)
+        else:
+            entry['attributes'] = LazyDict(attribute_list, lambda attribute_type, vals: decode_vals(vals), CASE_INSENSITIVE_ATTRIBUTE_NAMES)
+        return entry
+
     entry['raw_attributes'] = raw_attributes_to_dict(response['attributes'])
     if check_names and schema:
         entry['attributes'] = checked_attributes_to_dict(response['attributes'], schema, custom_formatter)
@@ -471,6 +828,56 @@ def search_result_entry_response_to_dict(response, schema, custom_formatter, che
     return entry
 
 
+def decoded_attributes_to_dict(attribute_list):
+    attributes = CaseInsensitiveDict() if CASE_INSENSITIVE_ATTRIBUTE_NAMES else dict()
+    for attribute_type, vals in attribute_list:
+        attributes[attribute_type] = [to_unicode(val) for val in vals if val] if vals else None
+
+    return attributes
+
+
+def decoded_raw_attributes_to_dict(attribute_list):
+    attributes = CaseInsensitiveDict() if CASE_INSENSITIVE_ATTRIBUTE_NAMES else dict()
+    for attribute_type, vals in attribute_list:
+        attributes[attribute_type] = vals or None
+
+    return attributes
+
+
+def decoded_checked_attributes_to_dict(attribute_list, schema=None, custom_formatter=None):
+    if not schema:
+        return None
+
+    formatter_table = schema.formatter_table(custom_formatter)
+    checked_attributes = CaseInsensitiveDict() if CASE_INSENSITIVE_ATTRIBUTE_NAMES else dict()
+    for attribute_type, vals in attribute_list:
+        checked_attributes[attribute_type] = formatter_table.format(attribute_type, vals)
+    return checked_attributes
+
+
+def decoded_search_result_entry_to_dict(dn, attribute_list, schema, custom_formatter, check_names, lazy=False):
+    """
+    Same as search_result_entry_response_to_dict for the (type, values) list returned by the fast BER decoder
+    """
+    entry = dict()
+    entry['dn'] = dn
+    if lazy:
+        entry['raw_attributes'] = LazyDict(attribute_list, lambda attribute_type, vals: vals or None, CASE_INSENSITIVE_ATTRIBUTE_NAMES)
+        if check_names and schema:
+            entry['attributes'] = LazyDict(attribute_list, lambda attribute_type, vals: schema.formatter_table(custom_formatter).format(attribute_type, vals), CASE_INSENSITIVE_ATTRIBUTE_NAMES)
+        else:
+            entry['attributes'] = LazyDict(attribute_list, lambda attribute_type, vals: [to_unicode(val) for val in vals if val] if vals else None, CASE_INSENSITIVE_ATTRIBUTE_NAMES)
+        return entry
+
+    entry['raw_attributes'] = decoded_raw_attributes_to_dict(attribute_list)
+    if check_names and schema:
+        entry['attributes'] = decoded_checked_attributes_to_dict(attribute_list, schema, custom_formatter)
+    else:
+        entry['attributes'] = decoded_attributes_to_dict(attribute_list)
+
+    return entry
+
+
 def search_result_done_response_to_dict(response):
     return {'result': int(response[0]),
             'description': ResultCode().getNamedValues().getName(response[0]),
@@ -0,0 +1,219 @@
+"""
+"""
+
+# Created on 2014.09.02
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# Table driven BER decoder for the LDAP messages received in bulk from the server (searchResEntry, searchResRef and searchResDone)
+# The LDAPMessage envelope is decoded here, every other protocolOp is left to the pyasn1 decoder
+# Only the definite length form is accepted as per RFC4511 (5.1)
+
+from .rfc4511 import ResultCode
+from ..utils.attributeNames import attribute_names
+
+# Universal tags
+TAG_BOOLEAN = 0x01
+TAG_INTEGER = 0x02
+TAG_OCTET_STRING = 0x04
+TAG_ENUMERATED = 0x0A
+TAG_SEQUENCE = 0x30
+TAG_SET = 0x31
+
+# LDAPResult referral [3]
+TAG_REFERRAL = 0xA3
+
+# LDAPMessage controls [0]
+TAG_CONTROLS = 0xA0
+
+# protocolOp application tags
+SEARCH_RESULT_ENTRY = 0x64  # [APPLICATION 4] constructed
+SEARCH_RESULT_DONE = 0x65  # [APPLICATION 5] constructed
+SEARCH_RESULT_REFERENCE = 0x73  # [APPLICATION 19] constructed
+
+RESULT_CODES = ResultCode.namedValues
+
+
+class BERDecodingError(Exception):
+    """
+    Raised when the fast decoder cannot handle the received octets, the message is then decoded with pyasn1
+    """
+    pass
+
+
+if str != bytes:  # Python 3
+    def to_unicode(value):
+        return value.decode('utf-8', 'ignore')
+else:  # Python 2, pyasn1 returns the raw octets
+    def to_unicode(value):
+        return value
+
+
+def decode_length(data, pos):
+    """
+    Returns the length of the value starting at pos and the position of the first octet of the value
+    """
+    length = data[pos]
+    pos += 1
+    if length & 0x80:
+        octets = length & 0x7F
+        if not octets:
+            raise BERDecodingError('indefinite length form not allowed')
+        length = 0
+        for _ in range(octets):
+            length = (length << 8) | data[pos]
+            pos += 1
+
+    return length, pos
+
+
+def decode_tag(data, pos, expected_tag):
+    """
+    Checks the tag at pos, returns the start and stop positions of the value
+    """
+    if data[pos] != expected_tag:
+        raise BERDecodingError('unexpected tag %d at position %d' % (data[pos], pos))
+    length, start = decode_length(data, pos + 1)
+    stop = start + length
+    if stop > len(data):
+        raise BERDecodingError('value exceeds message length')
+
+    return start, stop
+
+
+def decode_integer(data, start, stop):
+    if start == stop:
+        raise BERDecodingError('empty integer')
+    value = data[start]
+    if value & 0x80:
+        value -= 0x100
+    for pos in range(start + 1, stop):
+        value = (value << 8) | data[pos]
+
+    return value
+
+
+def decode_sequence(data, start, stop, expected_tag):
+    """
+    Returns the list of (start, stop) positions of the values in the sequence
+    """
+    values = []
+    pos = start
+    while pos < stop:
+        value_start, value_stop = decode_tag(data, pos, expected_tag)
+        values.append((value_start, value_stop))
+        pos = value_stop
+
+    return values
+
+
+def decode_search_result_entry(message, data, start, stop):
+    """
+    Returns the entry DN and a list of (type, [values]) tuples with the raw octets of the values
+    """
+    dn_start, dn_stop = decode_tag(data, start, TAG_OCTET_STRING)
+    attributes_start, attributes_stop = decode_tag(data, dn_stop, TAG_SEQUENCE)
+    attributes = []
+    for attribute_start, attribute_stop in decode_sequence(data, attributes_start, attributes_stop, TAG_SEQUENCE):
+        type_start, type_stop = decode_tag(data, attribute_start, TAG_OCTET_STRING)
+        vals_start, vals_stop = decode_tag(data, type_stop, TAG_SET)
+        attributes.append((attribute_names.canonical(message[type_start: type_stop]), [message[value_start: value_stop] for value_start, value_stop in decode_sequence(data, vals_start, vals_stop, TAG_OCTET_STRING)]))
+
+    return to_unicode(message[dn_start: dn_stop]), attributes
+
+
+def decode_ldap_result(message, data, start, stop):
+    """
+    Returns the LDAPResult in the same form of the pyasn1 based *_response_to_dict functions
+    """
+    code_start, code_stop = decode_tag(data, start, TAG_ENUMERATED)
+    result_code = decode_integer(data, code_start, code_stop)
+    matched_start, matched_stop = decode_tag(data, code_stop, TAG_OCTET_STRING)
+    message_start, message_stop = decode_tag(data, matched_stop, TAG_OCTET_STRING)
+    referrals = None
+    if message_stop < stop and data[message_stop] == TAG_REFERRAL:
+        referrals_start, referrals_stop = decode_tag(data, message_stop, TAG_REFERRAL)
+        referrals = [to_unicode(message[uri_start: uri_stop]) for uri_start, uri_stop in decode_sequence(data, referrals_start, referrals_stop, TAG_OCTET_STRING) if uri_stop > uri_start] or None
+
+    return {'result': result_code,
+            'description': RESULT_CODES.getName(result_code),
+            'message': to_unicode(message[message_start: message_stop]),
+            'dn': to_unicode(message[matched_start: matched_stop]),
+            'referrals': referrals}
+
+
+def decode_search_result_reference(message, data, start, stop):
+    return {'uri': [to_unicode(message[uri_start: uri_stop]) for uri_start, uri_stop in decode_sequence(data, start, stop, TAG_OCTET_STRING) if uri_stop > uri_start] or None}
+
+
+def decode_paged_results_control_value(value):
+    data = bytearray(value) if str == bytes else value
+    start, stop = decode_tag(data, 0, TAG_SEQUENCE)
+    size_start, size_stop = decode_tag(data, start, TAG_INTEGER)
+    cookie_start, cookie_stop = decode_tag(data, size_stop, TAG_OCTET_STRING)
+    return {'size': decode_integer(data, size_start, size_stop), 'cookie': value[cookie_start: cookie_stop]}
+
+
+def decode_controls(message, data, start, stop):
+    """
+    Returns a list of (controlType, criticality, controlValue) tuples
+    """
+    controls = []
+    for control_start, control_stop in decode_sequence(data, start, stop, TAG_SEQUENCE):
+        type_start, pos = decode_tag(data, control_start, TAG_OCTET_STRING)
+        control_type = to_unicode(message[type_start: pos])
+        criticality = False
+        control_value = b''
+        if pos < control_stop and data[pos] == TAG_BOOLEAN:
+            criticality_start, pos = decode_tag(data, pos, TAG_BOOLEAN)
+            criticality = bool(data[criticality_start])
+        if pos < control_stop:
+            value_start, pos = decode_tag(data, pos, TAG_OCTET_STRING)
+            control_value = message[value_start: pos]
+        controls.append((control_type, criticality, control_value))
+
+    return controls
+
+
+def decode_message_fast(message):
+    """
+    Decode the LDAPMessage envelope
+    Returns a dict with the messageID, the protocolOp tag, the boundaries of the protocolOp value and the controls
+    """
+    data = bytearray(message) if str == bytes else message  # Python 2 indexing must return int
+    start, stop = decode_tag(data, 0, TAG_SEQUENCE)
+    if stop != len(data):
+        raise BERDecodingError('unprocessed substrate')
+    id_start, id_stop = decode_tag(data, start, TAG_INTEGER)
+    protocol_op = data[id_stop]
+    op_start, op_stop = decode_tag(data, id_stop, protocol_op)
+    controls = None
+    if op_stop < stop:
+        controls_start, controls_stop = decode_tag(data, op_stop, TAG_CONTROLS)
+        controls = decode_controls(message, data, controls_start, controls_stop)
+
+    return {'messageID': decode_integer(data, id_start, id_stop),
+            'protocolOp': protocol_op,
+            'start': op_start,
+            'stop': op_stop,
+            'controls': controls,
+            'message': message,
+            'data': data}
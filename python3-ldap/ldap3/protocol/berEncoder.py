@@ -0,0 +1,327 @@
+"""
+"""
+
+# Created on 2014.09.05
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# BER encoder for the most frequent LDAP requests, octets are written directly in a bytearray without building the pyasn1 objects
+# The produced octets are the same produced by the pyasn1 encoder for the objects defined in rfc4511
+
+from ..core.exceptions import LDAPControlsError
+from .berDecoder import decode_length
+
+# Universal tags
+TAG_BOOLEAN = 0x01
+TAG_INTEGER = 0x02
+TAG_OCTET_STRING = 0x04
+TAG_ENUMERATED = 0x0A
+TAG_SEQUENCE = 0x30
+TAG_SET = 0x31
+
+# LDAPMessage controls [0]
+TAG_CONTROLS = 0xA0
+
+# protocolOp application tags
+SEARCH_REQUEST = 0x63  # [APPLICATION 3] constructed
+MODIFY_REQUEST = 0x66  # [APPLICATION 6] constructed
+ADD_REQUEST = 0x68  # [APPLICATION 8] constructed
+
+# Filter choices
+FILTER_AND = 0xA0
+FILTER_OR = 0xA1
+FILTER_NOT = 0xA2
+FILTER_EQUALITY_MATCH = 0xA3
+FILTER_SUBSTRINGS = 0xA4
+FILTER_GREATER_OR_EQUAL = 0xA5
+FILTER_LESS_OR_EQUAL = 0xA6
+FILTER_PRESENT = 0x87  # implicit tag of an OCTET STRING keeps the primitive form
+FILTER_APPROX_MATCH = 0xA8
+FILTER_EXTENSIBLE_MATCH = 0xA9
+
+# SubstringFilter choices
+SUBSTRING_INITIAL = 0x80
+SUBSTRING_ANY = 0x81
+SUBSTRING_FINAL = 0x82
+
+# MatchingRuleAssertion components
+MATCHING_RULE = 0x81
+MATCHING_TYPE = 0x82
+MATCHING_VALUE = 0x83
+MATCHING_DN_ATTRIBUTES = 0x84
+
+BOOLEAN_TRUE = bytes(bytearray((TAG_BOOLEAN, 1, 1)))
+BOOLEAN_FALSE = bytes(bytearray((TAG_BOOLEAN, 1, 0)))
+
+
+class EncodedRequest(object):
+    """
+    A protocolOp already encoded in BER, can be sent in place of the pyasn1 request object
+    request_dict is the request in the same form returned by BaseStrategy.decode_request()
+    """
+
+    def __init__(self, encoded, request_dict):
+        self.encoded = encoded
+        self.request_dict = request_dict
+
+    def __repr__(self):
+        return 'EncodedRequest(' + repr(self.request_dict) + ')'
+
+
+class EncodingTemplate(object):
+    """
+    A TLV whose value contains parameters, the parts without parameters are encoded only once
+    parts is a list of octets, nested EncodingTemplates and parameter indexes
+    """
+
+    def __init__(self, tag, parts):
+        self.tag = tag
+        self.parts = parts
+
+    def __repr__(self):
+        return 'EncodingTemplate(' + repr(self.tag) + ', ' + repr(self.parts) + ')'
+
+    def encode(self, parameters):
+        """
+        parameters is a list of octets, only the lengths of the TLVs containing parameters are computed again
+        """
+        value = bytearray()
+        for part in self.parts:
+            if isinstance(part, EncodingTemplate):
+                value += part.encode(parameters)
+            elif isinstance(part, int):
+                value += parameters[part]
+            else:
+                value += part
+        return encode_tlv(self.tag, value)
+
+
+class SubstringsTemplate(EncodingTemplate):
+    """
+    A substrings filter with parameters, the components left empty by the parameters are omitted
+    When all the components are empty the filter is encoded as a present filter, as (attr=*) in a filter string
+    """
+
+    def __init__(self, template):
+        EncodingTemplate.__init__(self, template.tag, template.parts)
+
+    def encode(self, parameters):
+        attribute_type, substrings = self.parts  # the type can't contain parameters, so it's already encoded
+        value = bytearray()
+        for part in substrings.parts:
+            if isinstance(part, EncodingTemplate):
+                component = part.encode(parameters)
+                if component[1]:  # length of the component value
+                    value += component
+            else:
+                value += part
+        if not value:
+            length, value_start = decode_length(attribute_type, 1)
+            return encode_tlv(FILTER_PRESENT, attribute_type[value_start: value_start + length])
+        return encode_tlv(self.tag, attribute_type + encode_tlv(substrings.tag, value))
+
+
+if str != bytes:  # Python 3
+    def to_octets(value):
+        if isinstance(value, (bytes, bytearray)):
+            return value
+        return str(value).encode('utf-8')
+else:  # Python 2
+    def to_octets(value):
+        if isinstance(value, (str, bytearray)):
+            return value
+        if isinstance(value, unicode):
+            return value.encode('utf-8')
+        return str(value)
+
+
+def encode_length(length):
+    if length < 0x80:
+        return bytearray((length, ))
+    octets = bytearray()
+    while length:
+        octets.insert(0, length & 0xFF)
+        length >>= 8
+    octets.insert(0, 0x80 | len(octets))
+    return octets
+
+
+def encode_tlv(tag, value):
+    encoded = bytearray((tag, ))
+    encoded += encode_length(len(value))
+    encoded += value
+    return encoded
+
+
+def encode_integer(value, tag=TAG_INTEGER):
+    """
+    Minimal two's complement form, as in the pyasn1 encoder
+    """
+    value = int(value)
+    octets = bytearray()
+    while True:
+        octets.insert(0, value & 0xFF)
+        if value == 0 or value == -1:
+            break
+        value >>= 8
+    if value == 0 and octets[0] & 0x80:
+        octets.insert(0, 0)
+    while len(octets) > 1 and (octets[0] == 0 and not octets[1] & 0x80 or octets[0] == 0xFF and octets[1] & 0x80):
+        del octets[0]
+
+    return encode_tlv(tag, octets)
+
+
+def encode_boolean(value):
+    return BOOLEAN_TRUE if value else BOOLEAN_FALSE
+
+
+def encode_octet_string(value, tag=TAG_OCTET_STRING):
+    return encode_tlv(tag, to_octets(value))
+
+
+def encode_sequence(components, tag=TAG_SEQUENCE):
+    value = bytearray()
+    for component in components:
+        value += component
+    return encode_tlv(tag, value)
+
+
+def encode_controls(controls):
+    """
+    controls is a list of tuples (controlType, criticality, controlValue) as in build_controls_list()
+    """
+    if not isinstance(controls, (list, tuple)):
+        raise LDAPControlsError('controls must be a list')
+
+    encoded_controls = []
+    for control in controls:
+        if len(control) == 3 and isinstance(control[1], bool):
+            encoded_control = [encode_octet_string(control[0])]
+            if control[1]:  # criticality is DEFAULT FALSE
+                encoded_control.append(BOOLEAN_TRUE)
+            encoded_control.append(encode_octet_string(control[2]))
+            encoded_controls.append(encode_sequence(encoded_control))
+        else:
+            raise LDAPControlsError('control must be a tuple of 3 elements: controlType, criticality (boolean) and controlValue')
+
+    return encode_sequence(encoded_controls, TAG_CONTROLS)
+
+
+def encode_ldap_message(message_id, encoded_request, controls=None):
+    """
+    Returns the LDAPMessage envelope for the encoded protocolOp
+    """
+    components = [encode_integer(message_id), encoded_request]
+    if controls:
+        components.append(encode_controls(controls))
+    return encode_sequence(components)
+
+
+def encode_attribute_value_assertion(tag, assertion):
+    return encode_sequence([encode_octet_string(assertion['attr']), encode_octet_string(assertion['value'])], tag)
+
+
+def encode_search_request(search_base, search_scope, dereference_aliases, size_limit, time_limit, types_only, encoded_filter, attributes):
+    return encode_sequence([encode_octet_string(search_base),
+                            encode_integer(search_scope, TAG_ENUMERATED),
+                            encode_integer(dereference_aliases, TAG_ENUMERATED),
+                            encode_integer(size_limit),
+                            encode_integer(time_limit),
+                            encode_boolean(types_only),
+                            encoded_filter,
+                            encode_sequence([encode_octet_string(attribute) for attribute in attributes])],
+                           SEARCH_REQUEST)
+
+
+def encode_partial_attribute(attribute_type, encoded_values):
+    return encode_sequence([encode_octet_string(attribute_type), encode_sequence([encode_octet_string(value) for value in encoded_values], TAG_SET)])
+
+
+def encode_modify_request(dn, changes):
+    """
+    changes is a list of (operation, type, encoded values) tuples
+    """
+    return encode_sequence([encode_octet_string(dn),
+                            encode_sequence([encode_sequence([encode_integer(operation, TAG_ENUMERATED), encode_partial_attribute(attribute_type, encoded_values)]) for operation, attribute_type, encoded_values in changes])],
+                           MODIFY_REQUEST)
+
+
+def encode_add_request(dn, attributes):
+    """
+    attributes is a list of (type, encoded values) tuples
+    """
+    return encode_sequence([encode_octet_string(dn),
+                            encode_sequence([encode_partial_attribute(attribute_type, encoded_values) for attribute_type, encoded_values in attributes])],
+                           ADD_REQUEST)
+
+
+def template_tlv(tag, parts):
+    """
+    Returns the encoded TLV when there are no parameters in parts, else an EncodingTemplate with the adjacent octets merged
+    """
+    merged_parts = []
+    for part in parts:
+        if isinstance(part, (bytes, bytearray)):
+            if merged_parts and isinstance(merged_parts[-1], bytearray):
+                merged_parts[-1] += part
+            else:
+                merged_parts.append(bytearray(part))
+        else:
+            merged_parts.append(part)
+
+    if not merged_parts:
+        return encode_tlv(tag, b'')
+    if len(merged_parts) == 1 and isinstance(merged_parts[0], bytearray):
+        return encode_tlv(tag, merged_parts[0])
+    return EncodingTemplate(tag, merged_parts)
+
+
+def _template_parts(encoded, data, start, stop, parameter_pattern):
+    parts = []
+    pos = start
+    while pos < stop:
+        tag = data[pos]
+        length, value_start = decode_length(data, pos + 1)
+        value_stop = value_start + length
+        if tag & 0x20:  # constructed
+            value_parts = _template_parts(encoded, data, value_start, value_stop, parameter_pattern)
+        else:
+            value_parts = []
+            last_stop = value_start
+            for match in parameter_pattern.finditer(encoded, value_start, value_stop):
+                value_parts.append(encoded[last_stop: match.start()])
+                value_parts.append(int(match.group(1)))
+                last_stop = match.end()
+            value_parts.append(encoded[last_stop: value_stop])
+        parts.append(template_tlv(tag, value_parts))
+        pos = value_stop
+
+    return parts
+
+
+def build_encoding_template(encoded, parameter_pattern):
+    """
+    Returns the EncodingTemplate of the encoded TLV, parameters are marked in the primitive values with octets matched by parameter_pattern
+    The first group of parameter_pattern is the index of the parameter
+    """
+    encoded = bytes(encoded)
+    return _template_parts(encoded, bytearray(encoded), 0, len(encoded), parameter_pattern)[0]
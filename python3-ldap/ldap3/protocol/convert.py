@@ -352,6 +352,18 @@ def format_attribute_values(schema, name, values, custom_formatter):
     Formatter functions can return any kind of object
     """
 
+    if schema:
+        return schema.formatter_table(custom_formatter).format(name, values)
+
+    formatter, single_value = find_attribute_formatter(schema, name, custom_formatter)
+    formatted_values = [formatter(raw_value) for raw_value in values]
+    return formatted_values[0] if single_value else formatted_values
+
+
+def find_attribute_formatter(schema, name, custom_formatter):
+    """
+    Returns the formatter of the attribute and a flag for single value attributes, as described in format_attribute_values
+    """
     formatter = None
     if schema and schema.attribute_types is not None and name.lower() in schema.attribute_types:
         attr_type = schema.attribute_types[name.lower()]
@@ -398,8 +410,47 @@ def format_attribute_values(schema, name, values, custom_formatter):
     if not formatter:
         formatter = format_unicode  # default formatter
 
-    formatted_values = [formatter(raw_value) for raw_value in values]
-    return formatted_values[0] if (attr_type and attr_type.single_value) else formatted_values
+    return formatter, True if (attr_type and attr_type.single_value) else False
+
+
+class FormatterTable(object):
+    """
+    Formatter and single value flag of each attribute, resolved once for a schema and the custom formatters
+    Attributes not defined in the schema are resolved when first formatted
+    """
+
+    def __init__(self, schema, custom_formatter):
+        self.schema = schema
+        self.custom_formatter = custom_formatter
+        self._formatters = dict()
+        if schema and schema.attribute_types is not None and not getattr(schema, 'lazy', False):  # in lazy schemas formatters are resolved only for the attributes formatted
+            for name in schema.attribute_types:
+                self._formatters[name.lower()] = find_attribute_formatter(schema, name, custom_formatter)
+
+    def __len__(self):
+        return len(self._formatters)
+
+    def __contains__(self, name):
+        return name.lower() in self._formatters
+
+    def formatter(self, name):
+        """
+        Returns the (formatter, single_value) tuple of the attribute
+        """
+        try:
+            return self._formatters[name]  # attribute name as returned by the server
+        except KeyError:
+            resolved = self._formatters.get(name.lower())
+            if resolved is None:
+                resolved = find_attribute_formatter(self.schema, name, self.custom_formatter)
+                self._formatters[name.lower()] = resolved
+            self._formatters[name] = resolved
+            return resolved
+
+    def format(self, name, values):
+        formatter, single_value = self.formatter(name)
+        formatted_values = [formatter(raw_value) for raw_value in values]
+        return formatted_values[0] if single_value else formatted_values
 
 
 standard_formatter = {
@@ -0,0 +1,83 @@
+"""
+"""
+
+# Created on 2014.09.28
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# Schema snapshots of common directory servers bundled in the schemas package, used with Server(get_info=OFFLINE_SCHEMA_*)
+# to have DsaInfo and SchemaInfo without reading the server. Each snapshot is a json file with the rootDSE attributes
+# in "dsa" and the subschema entry attributes in "schema". The SchemaInfo of each snapshot is built once per process
+# Snapshots with "partial" contain only a subset of the server schema, names of attributes and object classes are not checked against them
+
+from json import load
+from os import path
+from threading import Lock
+
+from .. import OFFLINE_SCHEMA_OPENLDAP, OFFLINE_SCHEMA_DS389, OFFLINE_SCHEMA_AD, OFFLINE_SCHEMA_EDIR
+from .rfc4512 import DsaInfo, SchemaInfo
+
+OFFLINE_SCHEMAS = {OFFLINE_SCHEMA_OPENLDAP: 'openldap.json',
+                   OFFLINE_SCHEMA_DS389: 'ds389.json',
+                   OFFLINE_SCHEMA_AD: 'ad.json',
+                   OFFLINE_SCHEMA_EDIR: 'edir.json'}
+
+SCHEMAS_DIR = path.join(path.dirname(path.abspath(__file__)), 'schemas')
+
+_snapshots = dict()
+_schema_infos = dict()
+_offline_lock = Lock()
+
+
+def is_offline_schema(get_info):
+    return get_info in OFFLINE_SCHEMAS
+
+
+def load_snapshot(get_info):
+    """
+    Returns the snapshot dict read from the json file of the offline schema
+    """
+    with _offline_lock:
+        if get_info not in _snapshots:
+            with open(path.join(SCHEMAS_DIR, OFFLINE_SCHEMAS[get_info])) as snapshot_file:
+                _snapshots[get_info] = load(snapshot_file)
+        return _snapshots[get_info]
+
+
+def offline_dsa_info(get_info):
+    """
+    Returns a new DsaInfo from the offline snapshot
+    """
+    return DsaInfo(dict((name, list(values)) for name, values in load_snapshot(get_info)['dsa'].items()))
+
+
+def offline_schema_info(get_info, lazy=False):
+    """
+    Returns the SchemaInfo of the offline snapshot, shared by all the servers using the same snapshot
+    """
+    snapshot = load_snapshot(get_info)
+    with _offline_lock:
+        key = (get_info, bool(lazy))
+        if key not in _schema_infos:
+            schema_info = SchemaInfo(snapshot['schema_entry'], dict((name, list(values)) for name, values in snapshot['schema'].items()), lazy)
+            schema_info.partial = snapshot.get('partial', False)
+            _schema_infos[key] = schema_info
+        return _schema_infos[key]
@@ -26,9 +26,11 @@
 from os import linesep
 import re
 
-from .. import CLASS_ABSTRACT, CLASS_STRUCTURAL, CLASS_AUXILIARY, ATTRIBUTE_USER_APPLICATION, ATTRIBUTE_DIRECTORY_OPERATION, ATTRIBUTE_DISTRIBUTED_OPERATION, ATTRIBUTE_DSA_OPERATION, CASE_INSENSITIVE_SCHEMA_NAMES
+from .. import CLASS_ABSTRACT, CLASS_STRUCTURAL, CLASS_AUXILIARY, ATTRIBUTE_USER_APPLICATION, ATTRIBUTE_DIRECTORY_OPERATION, ATTRIBUTE_DISTRIBUTED_OPERATION, ATTRIBUTE_DSA_OPERATION, CASE_INSENSITIVE_SCHEMA_NAMES, FORMATTER_TABLES_SIZE
 from ..utils.caseInsensitiveDictionary import CaseInsensitiveDict
+from ..utils.lazyDictionary import LazyDict
 from .oid import Oids, decode_oids, decode_syntax
+from .convert import FormatterTable
 from ..core.exceptions import LDAPSchemaError
 
 
@@ -102,6 +104,46 @@ def list_to_string(list_object):
     return r[:-2] if r else ''
 
 
+definition_patterns = dict()  # compiled tokenizers of the schema definitions, by class
+
+# oid and names at the start of a definition, as per RFC4512 (4.1)
+DEFINITION_INDEX_PATTERN = re.compile(r"\s*\(\s*([^\s()']+)(?:\s+NAME\s+('[^']*'|\([^)]*\)))?")
+
+
+class DefinitionParser(object):
+    """
+    Decoder of the definitions in a lazy schema dict, a definition with many names is parsed only once
+    """
+
+    def __init__(self, cls):
+        self.cls = cls
+        self._parsed = dict()
+
+    def __call__(self, name, object_definition):
+        object_def = self._parsed.get(object_definition)
+        if object_def is None:
+            object_def = self._parsed.setdefault(object_definition, self.cls.parse_definition(object_definition))
+        return object_def
+
+
+def lazy_definitions(cls, definitions):
+    """
+    Returns a LazyDict of the definitions keyed by name (or by oid if the object has no name), objects are parsed when first accessed
+    """
+    parser = DefinitionParser(cls)
+    undecoded = []
+    for object_definition in definitions:
+        match = DEFINITION_INDEX_PATTERN.match(object_definition)
+        if match and (match.group(2) or ' NAME ' not in object_definition):
+            names = quoted_string_to_list(match.group(2)) if match.group(2) else [match.group(1)]
+        else:  # NAME is not after the oid, the definition is parsed now to find the names
+            object_def = parser(None, object_definition)
+            names = object_def.name if hasattr(object_def, 'name') and object_def.name else [object_def.oid]
+        undecoded.extend([(name, object_definition) for name in names])
+
+    return LazyDict(undecoded, parser, CASE_INSENSITIVE_SCHEMA_NAMES)
+
+
 class DsaInfo(object):
     """
     This class contains info about the ldap server (DSA) read from DSE
@@ -148,25 +190,62 @@ class SchemaInfo(object):
     """
     This class contains info about the ldap server schema read from an entry (default entry is DSE)
     as defined in RFC4512. Unknown attributes are stored in the "other" dict
+    If lazy is True each definition is parsed only when first accessed
+    The schema can be shared by many servers and connections, so it must be considered read only
+    A partial schema doesn't contain all the definitions of the server, names are not checked against it
     """
 
-    def __init__(self, schema_entry, attributes):
+    partial = False
+
+    def __init__(self, schema_entry, attributes, lazy=False):
         self.schema_entry = schema_entry
+        self.lazy = lazy
         self.create_time_stamp = attributes.pop('createTimestamp', None)
         self.modify_time_stamp = attributes.pop('modifyTimestamp', None)
-        self.attribute_types = AttributeTypeInfo.from_definition(attributes.pop('attributeTypes', []))
-        self.object_classes = ObjectClassInfo.from_definition(attributes.pop('objectClasses', []))
-        self.matching_rules = MatchingRuleInfo.from_definition(attributes.pop('matchingRules', []))
-        self.matching_rule_uses = MatchingRuleUseInfo.from_definition(attributes.pop('matchingRuleUse', []))
-        self.dit_content_rules = DitContentRuleInfo.from_definition(attributes.pop('dITContentRules', []))
-        self.dit_structure_rules = DitStructureRuleInfo.from_definition(attributes.pop('dITStructureRules', []))
-        self.name_forms = NameFormInfo.from_definition(attributes.pop('nameForms', []))
-        self.ldap_syntaxes = LdapSyntaxInfo.from_definition(attributes.pop('ldapSyntaxes', []))
+        self.attribute_types = AttributeTypeInfo.from_definition(attributes.pop('attributeTypes', []), lazy)
+        self.object_classes = ObjectClassInfo.from_definition(attributes.pop('objectClasses', []), lazy)
+        self.matching_rules = MatchingRuleInfo.from_definition(attributes.pop('matchingRules', []), lazy)
+        self.matching_rule_uses = MatchingRuleUseInfo.from_definition(attributes.pop('matchingRuleUse', []), lazy)
+        self.dit_content_rules = DitContentRuleInfo.from_definition(attributes.pop('dITContentRules', []), lazy)
+        self.dit_structure_rules = DitStructureRuleInfo.from_definition(attributes.pop('dITStructureRules', []), lazy)
+        self.name_forms = NameFormInfo.from_definition(attributes.pop('nameForms', []), lazy)
+        self.ldap_syntaxes = LdapSyntaxInfo.from_definition(attributes.pop('ldapSyntaxes', []), lazy)
         self.other = attributes  # remaining attributes not in RFC4512
+        self._formatter_table = None  # table without custom formatter
+        self._custom_formatter_tables = dict()  # (custom_formatter, table) by id of the custom formatter dict
 
     def __str__(self):
         return self.__repr__()
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_formatter_table'] = None  # custom formatters may not be picklable, tables are built again when needed
+        state['_custom_formatter_tables'] = dict()
+        return state
+
+    def formatter_table(self, custom_formatter=None):
+        """
+        Returns the FormatterTable for this schema and the custom formatters
+        The tables of at most FORMATTER_TABLES_SIZE custom_formatter dicts are kept, one of them is dropped when a new one is needed,
+        the schema can be shared by servers with different custom formatters
+        """
+        if custom_formatter is None:
+            if self._formatter_table is None:
+                self._formatter_table = FormatterTable(self, None)
+            return self._formatter_table
+
+        tables = self._custom_formatter_tables
+        custom_formatter_table = tables.get(id(custom_formatter))  # the dict is kept with its table, so its id can't be reused
+        if custom_formatter_table is None:
+            custom_formatter_table = (custom_formatter, FormatterTable(self, custom_formatter))
+            while len(tables) >= FORMATTER_TABLES_SIZE:
+                try:
+                    del tables[next(iter(tables))]
+                except (KeyError, RuntimeError, StopIteration):  # changed by another thread
+                    break
+            tables[id(custom_formatter)] = custom_formatter_table
+        return custom_formatter_table[1]
+
     def __repr__(self):
         r = 'DSA Schema from: ' + self.schema_entry + linesep
         r += ('  Attribute types:' + linesep + '    ' + ', '.join([str(self.attribute_types[s]) for s in self.attribute_types]) + linesep) if self.attribute_types else ''
@@ -232,109 +311,135 @@ class BaseObjectInfo(object):
         return r
 
     @classmethod
-    def from_definition(cls, definitions):
+    def definition_pattern(cls):
+        """
+        Returns the compiled pattern that splits the definitions of this class in keywords and values
+        """
+        try:
+            return definition_patterns[cls]
+        except KeyError:
+            if cls is MatchingRuleInfo:
+                pattern = '| SYNTAX '
+            elif cls is ObjectClassInfo:
+                pattern = '| SUP | ABSTRACT| STRUCTURAL| AUXILIARY| MUST | MAY '
+            elif cls is AttributeTypeInfo:
+                pattern = '| SUP | EQUALITY | ORDERING | SUBSTR | SYNTAX | SINGLE-VALUE| COLLECTIVE| NO-USER-MODIFICATION| USAGE '
+            elif cls is MatchingRuleUseInfo:
+                pattern = '| APPLIES '
+            elif cls is DitContentRuleInfo:
+                pattern = '| AUX '
+            elif cls is LdapSyntaxInfo:
+                pattern = ''
+            elif cls is DitContentRuleInfo:
+                pattern = '| AUX | MUST | MAY | NOT '
+            elif cls is DitStructureRuleInfo:
+                pattern = '| FORM | SUP '
+            elif cls is NameFormInfo:
+                pattern = '| OC | MUST | MAY  '
+            else:
+                raise LDAPSchemaError('unknown schema definition class')
+
+            definition_patterns[cls] = re.compile('( NAME | DESC | OBSOLETE| X-| E-' + pattern + ')')
+            return definition_patterns[cls]
+
+    @classmethod
+    def parse_definition(cls, object_definition):
+        """
+        Returns the object defined in object_definition
+        """
+        splitted = cls.definition_pattern().split(object_definition[1:-1])
+        values = splitted[::2]
+        separators = splitted[1::2]
+        separators.insert(0, 'OID')
+        defs = list(zip(separators, values))
+        object_def = cls()
+        for d in defs:
+            key = d[0].strip()
+            value = d[1].strip()
+            if key == 'OID':
+                object_def.oid = value
+            elif key == 'NAME':
+                object_def.name = quoted_string_to_list(value)
+            elif key == 'DESC':
+                object_def.description = value.strip("'")
+            elif key == 'OBSOLETE':
+                object_def.obsolete = True
+            elif key == 'SYNTAX':
+                object_def.syntax = oids_string_to_list(value)
+            elif key == 'SUP':
+                object_def.superior = oids_string_to_list(value)
+            elif key == 'ABSTRACT':
+                object_def.kind = CLASS_ABSTRACT
+            elif key == 'STRUCTURAL':
+                object_def.kind = CLASS_STRUCTURAL
+            elif key == 'AUXILIARY':
+                object_def.kind = CLASS_AUXILIARY
+            elif key == 'MUST':
+                object_def.must_contain = oids_string_to_list(value)
+            elif key == 'MAY':
+                object_def.may_contain = oids_string_to_list(value)
+            elif key == 'EQUALITY':
+                object_def.equality = oids_string_to_list(value)
+            elif key == 'ORDERING':
+                object_def.ordering = oids_string_to_list(value)
+            elif key == 'SUBSTR':
+                object_def.substr = oids_string_to_list(value)
+            elif key == 'SINGLE-VALUE':
+                object_def.single_value = True
+            elif key == 'COLLECTIVE':
+                object_def.collective = True
+            elif key == 'NO-USER-MODIFICATION':
+                object_def.no_user_modification = True
+            elif key == 'USAGE':
+                object_def.usage = attribute_usage_to_constant(value)
+            elif key == 'APPLIES':
+                object_def.apply_to = oids_string_to_list(value)
+            elif key == 'AUX':
+                object_def.auxiliary_classes = oids_string_to_list(value)
+            elif key == 'FORM':
+                object_def.name_form = oids_string_to_list(value)
+            elif key == 'OC':
+                object_def.object_class = oids_string_to_list(value)
+            elif key == 'X-':
+                if not object_def.extensions:
+                    object_def.extensions = []
+                object_def.extensions.append(extension_to_tuple('X-' + value))
+            elif key == 'E-':
+                if not object_def.experimental:
+                    object_def.experimental = []
+                object_def.experimental.append(extension_to_tuple('E-' + value))
+            else:
+                raise LDAPSchemaError('malformed schema definition key:' + key)
+        object_def.raw_definition = object_definition
+        if hasattr(object_def, 'syntax') and object_def.syntax and len(object_def.syntax) == 1:
+            object_def.syntax = object_def.syntax[0]
+            object_def.min_length = None
+            if object_def.syntax.endswith('}'):
+                try:
+                    object_def.min_length = int(object_def.syntax[object_def.syntax.index('{') + 1:-1])
+                    object_def.syntax = object_def.syntax[:object_def.syntax.index('{')]
+                except Exception:
+                    pass
+            else:
+                object_def.min_length = None
+        return object_def
+
+    @classmethod
+    def from_definition(cls, definitions, lazy=False):
+        """
+        Returns a dict of the defined objects, keyed by name (or by oid if the object has no name)
+        If lazy is True the definitions are indexed by name and each object is parsed when first accessed
+        """
         if not definitions:
             return None
 
+        if lazy:
+            return lazy_definitions(cls, definitions)
+
         ret_dict = CaseInsensitiveDict() if CASE_INSENSITIVE_SCHEMA_NAMES else dict()
         for object_definition in definitions:
             if [object_definition[0] == ')' and object_definition[:-1] == ')']:
-                if cls is MatchingRuleInfo:
-                    pattern = '| SYNTAX '
-                elif cls is ObjectClassInfo:
-                    pattern = '| SUP | ABSTRACT| STRUCTURAL| AUXILIARY| MUST | MAY '
-                elif cls is AttributeTypeInfo:
-                    pattern = '| SUP | EQUALITY | ORDERING | SUBSTR | SYNTAX | SINGLE-VALUE| COLLECTIVE| NO-USER-MODIFICATION| USAGE '
-                elif cls is MatchingRuleUseInfo:
-                    pattern = '| APPLIES '
-                elif cls is DitContentRuleInfo:
-                    pattern = '| AUX '
-                elif cls is LdapSyntaxInfo:
-                    pattern = ''
-                elif cls is DitContentRuleInfo:
-                    pattern = '| AUX | MUST | MAY | NOT '
-                elif cls is DitStructureRuleInfo:
-                    pattern = '| FORM | SUP '
-                elif cls is NameFormInfo:
-                    pattern = '| OC | MUST | MAY  '
-                else:
-                    raise LDAPSchemaError('unknown schema definition class')
-
-                splitted = re.split('( NAME | DESC | OBSOLETE| X-| E-' + pattern + ')', object_definition[1:-1])
-                values = splitted[::2]
-                separators = splitted[1::2]
-                separators.insert(0, 'OID')
-                defs = list(zip(separators, values))
-                object_def = cls()
-                for d in defs:
-                    key = d[0].strip()
-                    value = d[1].strip()
-                    if key == 'OID':
-                        object_def.oid = value
-                    elif key == 'NAME':
-                        object_def.name = quoted_string_to_list(value)
-                    elif key == 'DESC':
-                        object_def.description = value.strip("'")
-                    elif key == 'OBSOLETE':
-                        object_def.obsolete = True
-                    elif key == 'SYNTAX':
-                        object_def.syntax = oids_string_to_list(value)
-                    elif key == 'SUP':
-                        object_def.superior = oids_string_to_list(value)
-                    elif key == 'ABSTRACT':
-                        object_def.kind = CLASS_ABSTRACT
-                    elif key == 'STRUCTURAL':
-                        object_def.kind = CLASS_STRUCTURAL
-                    elif key == 'AUXILIARY':
-                        object_def.kind = CLASS_AUXILIARY
-                    elif key == 'MUST':
-                        object_def.must_contain = oids_string_to_list(value)
-                    elif key == 'MAY':
-                        object_def.may_contain = oids_string_to_list(value)
-                    elif key == 'EQUALITY':
-                        object_def.equality = oids_string_to_list(value)
-                    elif key == 'ORDERING':
-                        object_def.ordering = oids_string_to_list(value)
-                    elif key == 'SUBSTR':
-                        object_def.substr = oids_string_to_list(value)
-                    elif key == 'SINGLE-VALUE':
-                        object_def.single_value = True
-                    elif key == 'COLLECTIVE':
-                        object_def.collective = True
-                    elif key == 'NO-USER-MODIFICATION':
-                        object_def.no_user_modification = True
-                    elif key == 'USAGE':
-                        object_def.usage = attribute_usage_to_constant(value)
-                    elif key == 'APPLIES':
-                        object_def.apply_to = oids_string_to_list(value)
-                    elif key == 'AUX':
-                        object_def.auxiliary_classes = oids_string_to_list(value)
-                    elif key == 'FORM':
-                        object_def.name_form = oids_string_to_list(value)
-                    elif key == 'OC':
-                        object_def.object_class = oids_string_to_list(value)
-                    elif key == 'X-':
-                        if not object_def.extensions:
-                            object_def.extensions = []
-                        object_def.extensions.append(extension_to_tuple('X-' + value))
-                    elif key == 'E-':
-                        if not object_def.experimental:
-                            object_def.experimental = []
-                        object_def.experimental.append(extension_to_tuple('E-' + value))
-                    else:
-                        raise LDAPSchemaError('malformed schema definition key:' + key)
-                object_def.raw_definition = object_definition
-                if hasattr(object_def, 'syntax') and object_def.syntax and len(object_def.syntax) == 1:
-                    object_def.syntax = object_def.syntax[0]
-                    object_def.min_length = None
-                    if object_def.syntax.endswith('}'):
-                        try:
-                            object_def.min_length = int(object_def.syntax[object_def.syntax.index('{') + 1:-1])
-                            object_def.syntax = object_def.syntax[:object_def.syntax.index('{')]
-                        except Exception:
-                            pass
-                    else:
-                        object_def.min_length = None
+                object_def = cls.parse_definition(object_definition)
                 if hasattr(object_def, 'name') and object_def.name:
                     for name in object_def.name:
                         ret_dict[name] = object_def
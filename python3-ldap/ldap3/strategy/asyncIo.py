@@ -0,0 +1,303 @@
+"""
+"""
+
+# Created on 2014.09.20
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import socket
+import ssl
+
+from .. import RESULT_REFERRAL, DO_NOT_RAISE_EXCEPTIONS, GET_DSA_INFO, GET_SCHEMA_INFO, GET_ALL_INFO, SEARCH_SCOPE_BASE_OBJECT, ALL_ATTRIBUTES
+from ..core.exceptions import LDAPOperationResult, LDAPSocketOpenError, LDAPSocketSendError, LDAPSocketReceiveError, LDAPSessionTerminatedByServer, LDAPExceptionError, communication_exception_factory
+from ..core.server import SCHEMA_ATTRIBUTES
+from ..core.tls import check_hostname
+from ..protocol.rfc4512 import DsaInfo, SchemaInfo
+from .baseStrategy import BaseStrategy
+from .messageFramer import MessageFramer
+
+
+# noinspection PyProtectedMember
+class AsyncIoStrategy(BaseStrategy):
+    """
+    This strategy is asynchronous and uses asyncio streams, it must be used in a running event loop
+    open(), bind() and all the operations return a coroutine, await it to get the value returned by the sync strategy
+    Responses are read by a single task and demultiplexed by messageId, so many operations can be outstanding on the same connection
+    Connection.response and Connection.result are set when each operation completes
+    Requires Python 3.5 or newer, lazy connections, auto_bind, SASL and StartTls are not available
+    """
+
+    def __init__(self, ldap_connection):
+        BaseStrategy.__init__(self, ldap_connection)
+        self.sync = False
+        self.no_real_dsa = False
+        self.pooled = False
+        self.can_stream = False
+        self.coroutines = True
+        self._framer = MessageFramer()
+        self._reader = None
+        self._writer = None
+        self._receiver = None  # task reading the responses from the stream
+        self._drain_lock = None
+        self._responses = dict()  # partial responses by messageId
+        self._futures = dict()  # futures of the outstanding operations by messageId
+
+    def open(self, reset_usage=True):
+        """
+        Choose a server from the server pool if available
+        Returns a coroutine that opens the stream and reads the server info
+        """
+        BaseStrategy.open(self, reset_usage)
+        return self._open_stream()
+
+    def _open_socket(self, use_ssl=False):
+        pass  # the stream is opened in _open_stream()
+
+    def _start_listen(self):
+        pass  # the receiver task is started in _open_stream()
+
+    async def _open_stream(self):
+        server = self.connection.server
+        loop = asyncio.get_event_loop()
+        exc = None
+        try:
+            sock = socket.socket(*server.address_info[0][:3])
+            sock.setblocking(False)
+            if server.receive_buffer_size:  # must be set before connecting to have effect on the TCP window
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, server.receive_buffer_size)
+            await loop.sock_connect(sock, server.address_info[0][4])
+            ssl_context = server.tls.ssl_context() if server.ssl else None
+            self._reader, self._writer = await asyncio.open_connection(sock=sock, ssl=ssl_context, server_hostname=server.host if ssl_context else None)
+            if ssl_context and server.tls.validate in [ssl.CERT_REQUIRED, ssl.CERT_OPTIONAL]:
+                check_hostname(self._writer.get_extra_info('ssl_object'), server.host, server.tls.valid_names)
+        except Exception as e:
+            self.connection.last_error = 'socket connection error: ' + str(e)
+            exc = e
+
+        if exc:
+            raise communication_exception_factory(LDAPSocketOpenError, exc)(self.connection.last_error)
+
+        if self.connection._usage:
+            self.connection._usage.opened_sockets += 1
+            if server.ssl:
+                self.connection._usage.wrapped_sockets += 1
+
+        self._framer.reset()
+        self._framer.max_receive_size = server.max_receive_size
+        self._drain_lock = asyncio.Lock()
+        self.connection.closed = False
+        self.connection.listening = True
+        self._receiver = asyncio.ensure_future(self._receive())
+        try:
+            await self._read_server_info()
+        except LDAPOperationResult:  # catch errors from server if raise_exception = True
+            server._dsa_info = None
+            server._schema_info = None
+
+    def _close_socket(self):
+        """
+        Close the stream and stop the receiver task, outstanding operations fail with LDAPSocketReceiveError
+        """
+        if self._receiver is not None:
+            self._receiver.cancel()
+            self._receiver = None
+        if self._writer is not None:
+            self._writer.close()  # data already written is flushed before closing
+            self._writer = None
+        self._reader = None
+        self._framer.reset()
+        self._fail_outstanding(LDAPSocketReceiveError('connection closed'))
+        self.connection.socket = None
+        self.connection.closed = True
+
+        if self.connection._usage:
+            self.connection._usage.closed_sockets += 1
+
+    def _fail_outstanding(self, exc):
+        for future in self._futures.values():
+            if not future.done():
+                future.set_exception(exc)
+        self._futures = dict()
+        self._responses = dict()
+
+    def sending(self, encoded_message):
+        """
+        Write the encoded LDAP message in the stream, the stream is drained when the response is awaited
+        """
+        self._writer.write(encoded_message)
+
+    async def _receive(self):
+        """
+        Read the stream until it's closed, responses are collected by messageId
+        and the future of the operation is resolved when the response is complete
+        """
+        exc = None
+        try:
+            while exc is None:
+                data = await self._reader.read(self._framer.max_receive_size)
+                if not data:  # stream closed by server
+                    break
+                self._framer.feed(data)
+                for message in self._framer.messages():
+                    if self.connection._usage:
+                        self.connection._usage.received_message(len(message))
+                    message_id, dict_response = self.decode_message(message)
+                    if message_id != 0:
+                        self._collect(message_id, dict_response)
+                    elif dict_response['responseName'] == '1.3.6.1.4.1.1466.20036':  # Notice of Disconnection as per RFC4511 (paragraph 4.4.1)
+                        exc = LDAPSessionTerminatedByServer('session terminated by server')
+                        break
+                    else:  # 0 is reserved for 'Unsolicited Notification' from server as per RFC4511 (paragraph 4.4)
+                        exc = LDAPSocketReceiveError('unknown unsolicited notification from server')
+                        break
+        except LDAPExceptionError as e:
+            exc = e
+        except (OSError, socket.error) as e:
+            exc = communication_exception_factory(LDAPSocketReceiveError, e)('error receiving data: ' + str(e))
+        except asyncio.CancelledError:  # the stream is being closed
+            raise
+        except Exception as e:  # malformed message
+            exc = LDAPSocketReceiveError('error receiving data: ' + str(e))
+
+        if exc is None:
+            exc = LDAPSessionTerminatedByServer('session terminated by server')
+        self.connection.last_error = str(exc)
+        self._fail_outstanding(exc)
+        self._receiver = None
+        try:
+            self.close()
+        except LDAPExceptionError:
+            pass
+
+    def _collect(self, message_id, dict_response):
+        responses = self._responses.setdefault(message_id, [])
+        responses.append(dict_response)
+        if dict_response['type'] not in ['searchResEntry', 'searchResRef', 'intermediateResponse']:
+            del self._responses[message_id]
+            future = self._futures.pop(message_id, None)
+            if future is not None and not future.done():
+                future.set_result(responses)
+
+    def _register(self, message_id):
+        """
+        The future must exist before returning to the event loop, the response could be received before the operation is awaited
+        """
+        future = asyncio.get_event_loop().create_future()
+        self._futures[message_id] = future
+        return message_id, future
+
+    def post_send_single_response(self, message_id):
+        """
+        Returns a coroutine that waits for the response and returns the list of responses, result included
+        """
+        return self._wait_response(*self._register(message_id), search=False)
+
+    def post_send_search(self, message_id):
+        """
+        Returns a coroutine that waits for the response, stores in connection.response the objects found and returns them
+        """
+        return self._wait_response(*self._register(message_id), search=True)
+
+    async def _wait_response(self, message_id, future, search):
+        request = self._outstanding.get(message_id)
+        try:
+            exc = None
+            try:
+                async with self._drain_lock:  # concurrent drains are not allowed on the same stream
+                    await self._writer.drain()
+            except (AttributeError, OSError, socket.error) as e:
+                self.connection.last_error = 'socket sending error' + str(e)
+                exc = e
+
+            if exc:
+                raise communication_exception_factory(LDAPSocketSendError, exc)(self.connection.last_error)
+
+            responses = await future
+        finally:
+            self._futures.pop(message_id, None)
+            self._outstanding.pop(message_id, None)
+
+        if responses[-1]['result'] == RESULT_REFERRAL:
+            if self.connection._usage:
+                self.connection._usage.referrals_received += 1
+            if self.connection.auto_referrals:  # referrals are followed with a sync connection, out of the event loop
+                ref_response, ref_result = await asyncio.get_event_loop().run_in_executor(None, self.do_operation_on_referral, request, responses[-1]['referrals'])
+                if ref_response is not None:
+                    responses = ref_response + [ref_result]
+                elif ref_result is not None:
+                    responses = [ref_result]
+
+                self._referrals = []
+
+        result = responses[-1]
+        self.connection.result = result
+        self.connection.response = responses[:-1] if search else None
+        if self.connection.raise_exceptions and result and result['result'] not in DO_NOT_RAISE_EXCEPTIONS:
+            raise LDAPOperationResult(result=result['result'], description=result['description'], dn=result['dn'], message=result['message'], response_type=result['type'], response=responses[:-1])
+
+        return responses[:-1] if search else responses
+
+    async def complete(self, operation, result_function, refresh_info=False):
+        """
+        Awaits the operation and returns the value computed by result_function from its response, as returned by the sync strategy
+        """
+        value = result_function(await operation)
+        if value and refresh_info:
+            await self.refresh_dsa_info()
+        return value
+
+    async def refresh_dsa_info(self):
+        previous_response = self.connection.response
+        previous_result = self.connection.result
+        try:
+            await self._read_server_info()
+        except LDAPOperationResult:  # catch errors from server if raise_exception = True
+            self.connection.server._dsa_info = None
+            self.connection.server._schema_info = None
+        self.connection.response = previous_response
+        self.connection.result = previous_result
+
+    async def _read_server_info(self):
+        """
+        Read info from DSE and from subschema as Server.get_info_from_server() does, schema_cache and shared_schema are not used
+        """
+        server = self.connection.server
+        if server.get_info in [GET_DSA_INFO, GET_ALL_INFO]:
+            dsa_info = None
+            if await self.connection.search('', '(objectClass=*)', SEARCH_SCOPE_BASE_OBJECT, attributes=ALL_ATTRIBUTES, get_operational_attributes=True):
+                dsa_info = DsaInfo(self.connection.response[0]['attributes'])
+            with server.lock:
+                server._dsa_info = dsa_info
+
+        if server.get_info in [GET_SCHEMA_INFO, GET_ALL_INFO]:
+            schema_entry = None
+            if server._dsa_info:
+                schema_entry = server._dsa_info.schema_entry[0] if server._dsa_info.schema_entry else None
+            elif await self.connection.search('', '(objectClass=*)', SEARCH_SCOPE_BASE_OBJECT, attributes=['subschemaSubentry'], get_operational_attributes=True):
+                if 'subschemaSubentry' in self.connection.response[0]['attributes']:
+                    schema_entry = self.connection.response[0]['attributes']['subschemaSubentry'][0]
+
+            schema_info = None
+            if schema_entry and await self.connection.search(schema_entry, '(objectClass=subschema)', SEARCH_SCOPE_BASE_OBJECT, attributes=list(SCHEMA_ATTRIBUTES), get_operational_attributes=True):
+                schema_info = SchemaInfo(schema_entry, self.connection.response[0]['attributes'], server.lazy_schema)
+            with server.lock:
+                server._schema_info = schema_info
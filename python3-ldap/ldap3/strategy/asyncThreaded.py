@@ -23,16 +23,20 @@
 # along with python3-ldap in the COPYING and COPYING.LESSER files.
 # If not, see <http://www.gnu.org/licenses/>.
 
-from threading import Thread, Lock
+from threading import Thread, Condition
 
-from pyasn1.codec.ber import decoder
-
-from .. import RESPONSE_COMPLETE, SOCKET_SIZE, RESULT_REFERRAL
-from ..core.exceptions import LDAPSSLConfigurationError, LDAPStartTLSError, LDAPOperationResult
+from .. import RESPONSE_COMPLETE, RESULT_REFERRAL, RESPONSE_WAITING_TIMEOUT, DO_NOT_RAISE_EXCEPTIONS
+from ..core.exceptions import LDAPSSLConfigurationError, LDAPStartTLSError, LDAPOperationResult, LDAPSessionTerminatedByServer, LDAPExceptionError
 from ..strategy.baseStrategy import BaseStrategy
-from ..protocol.rfc4511 import LDAPMessage
+from .messageFramer import MessageFramer
 import socket
 
+try:
+    from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+except ImportError:  # Python 2 without the futures package
+    Future = None
+    FutureTimeoutError = None
+
 
 # noinspection PyProtectedMember
 class AsyncThreadedStrategy(BaseStrategy):
@@ -44,6 +48,10 @@ class AsyncThreadedStrategy(BaseStrategy):
     Connection.response will contain the whole LDAP response for the messageId requested in a dict form
     Connection.request will contain the result LDAP message in a dict form
     Response appear in strategy._responses dictionary
+    The receiver thread notifies the strategy lock (a Condition) when a response is complete
+    With return_futures in the Connection requests return a concurrent.futures.Future completed by the receiver thread
+    with the (response, result) tuple returned by get_response
+    With an IoLoop in the Connection responses are received by the thread of the IoLoop, shared by many connections
     """
 
     # noinspection PyProtectedMember
@@ -61,63 +69,27 @@ class AsyncThreadedStrategy(BaseStrategy):
             Wait for data on socket, compute the length of the message and wait for enough bytes to decode the message
             Message are appended to strategy._responses
             """
-            unprocessed = b''
-            get_more_data = True
+            framer = self.connection.strategy._framer
             listen = True
-            data = b''
             while listen:
-                if get_more_data:
-                    try:
-                        data = self.connection.socket.recv(SOCKET_SIZE)
-                    except (OSError, socket.error):
-                        listen = False
-                    except Exception as e:
-                        print('EXC', e)
-                        print(type(e))
-                    if len(data) > 0:
-                        unprocessed += data
-                        data = b''
-                    else:
-                        listen = False
-                length = BaseStrategy.compute_ldap_message_size(unprocessed)
-                if length == -1 or len(unprocessed) < length:
-                    get_more_data = True
-                elif len(unprocessed) >= length:  # add message to message list
-                    if self.connection._usage:
-                        self.connection._usage.received_message(length)
-                    ldap_resp = decoder.decode(unprocessed[:length], asn1Spec=LDAPMessage())[0]
-                    message_id = int(ldap_resp['messageID'])
-                    dict_response = self.connection.strategy.decode_response(ldap_resp)
-                    if dict_response['type'] == 'extendedResp' and dict_response['responseName'] == '1.3.6.1.4.1.1466.20037':
-                        if dict_response['result'] == 0:  # StartTls in progress
-                            if self.connection.server.tls:
-                                self.connection.server.tls._start_tls(self.connection)
-                            else:
-                                self.connection.last_error = 'no Tls defined in Server'
-                                raise LDAPSSLConfigurationError(self.connection.last_error)
-                        else:
-                            self.connection.last_error = 'asynchronous StartTls failed'
-                            raise LDAPStartTLSError(self.connection.last_error)
-                    if message_id != 0:  # 0 is reserved for 'Unsolicited Notification' from server as per RFC4511 (paragraph 4.4)
-
-                        with self.connection.strategy.lock:
-                            if message_id in self.connection.strategy._responses:
-                                self.connection.strategy._responses[message_id].append(dict_response)
-                            else:
-                                self.connection.strategy._responses[message_id] = [dict_response]
-                            if dict_response['type'] not in ['searchResEntry', 'searchResRef', 'intermediateResponse']:
-                                self.connection.strategy._responses[message_id].append(RESPONSE_COMPLETE)
-
-                        unprocessed = unprocessed[length:]
-                        get_more_data = False if unprocessed else True
-                        listen = True if self.connection.listening or unprocessed else False
-                    else:  # Unsolicited Notification
-                        if dict_response['responseName'] == '1.3.6.1.4.1.1466.20036':  # Notice of Disconnection as per RFC4511 (paragraph 4.4.1)
-                            listen = False
-                        else:
-                            self.connection.last_error = 'unknown unsolicited notification from server'
-                            raise LDAPStartTLSError(self.connection.last_error)
-            self.connection.strategy.close()
+                received = 0
+                try:
+                    received = framer.receive(self.connection.socket)
+                except (OSError, socket.error, AttributeError):
+                    listen = False
+                except Exception as e:
+                    self.connection.last_error = 'error receiving data: ' + str(e)
+                    listen = False
+                if not received:
+                    listen = False
+                try:
+                    listen = self.connection.strategy._process_messages(listen)
+                except LDAPExceptionError:
+                    listen = False
+                except Exception as e:  # malformed message, the pending futures are failed when receiving stops
+                    self.connection.last_error = 'error receiving data: ' + str(e)
+                    listen = False
+            self.connection.strategy._stop_receiving()
 
     def __init__(self, ldap_connection):
         BaseStrategy.__init__(self, ldap_connection)
@@ -127,7 +99,10 @@ class AsyncThreadedStrategy(BaseStrategy):
         self.has_stream_capability = False
         self._responses = None
         self.receiver = None
-        self.lock = Lock()
+        self.lock = Condition()
+        self._framer = MessageFramer()
+        self._futures = dict()  # futures of the operations waiting for the response by messageId
+        self._discarded = set()  # messageId of the requests whose responses are dropped when received
 
     def open(self, reset_usage=True):
         """
@@ -136,6 +111,7 @@ class AsyncThreadedStrategy(BaseStrategy):
         with self.lock:
             BaseStrategy.open(self, reset_usage=True)
             self._responses = dict()
+            self._discarded = set()
 
         try:
             self.connection.refresh_dsa_info()
@@ -152,29 +128,180 @@ class AsyncThreadedStrategy(BaseStrategy):
 
     def post_send_search(self, message_id):
         """
-        Clears connection.response and returns messageId
+        Clears connection.response and returns messageId or a Future
         """
         self.connection.response = None
         self.connection.result = message_id
-        return message_id
+        return self._future(message_id) if self.connection.return_futures else message_id
 
     def post_send_single_response(self, message_id):
         """
-        Clears connection.response and returns messageId.
+        Clears connection.response and returns messageId or a Future
         """
         self.connection.response = None
         self.connection.result = message_id
-        return message_id
+        return self._future(message_id) if self.connection.return_futures else message_id
+
+    def _future(self, message_id):
+        """
+        Returns a Future for the response of message_id, the response may have been already received
+        Operations can't be cancelled with the Future, use Connection.abandon() with the message_id attribute
+        """
+        future = Future()
+        future.message_id = message_id
+        future.set_running_or_notify_cancel()
+        with self.lock:
+            if message_id in self._responses and self._responses[message_id][-1] == RESPONSE_COMPLETE:
+                responses = self._responses.pop(message_id)
+            elif not self.connection.listening:  # the receiver has already stopped, the response will never come
+                future.set_exception(LDAPSessionTerminatedByServer('session terminated by server'))
+                return future
+            else:
+                self._futures[message_id] = future
+                return future
+
+        self._complete_future(message_id, future, responses)
+        return future
+
+    def _complete_future(self, message_id, future, responses):
+        """
+        Set the (response, result) tuple or the LDAPOperationResult exception in the future, callbacks are executed in this thread
+        """
+        try:
+            responses = self._follow_referral(message_id, responses)
+            result = responses[-2]
+            response = responses[:-2]
+            self._outstanding.pop(message_id, None)
+            if self.connection.raise_exceptions and result and result['result'] not in DO_NOT_RAISE_EXCEPTIONS:
+                raise LDAPOperationResult(result=result['result'], description=result['description'], dn=result['dn'], message=result['message'], response_type=result['type'], response=response)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result((response, result))
+
+    def get_response(self, message_id, timeout=RESPONSE_WAITING_TIMEOUT):
+        """
+        message_id can be a Future returned by an operation, connection.result is set in the calling thread
+        """
+        if self.connection.return_futures and isinstance(message_id, Future):
+            try:
+                response, result = message_id.result(timeout)
+            except FutureTimeoutError:
+                return None, None
+            self.connection.result = result
+            self.connection.response = None
+            return response, result
+
+        return BaseStrategy.get_response(self, message_id, timeout)
 
     def _start_listen(self):
         """
-        Start thread in daemon mode
+        Start thread in daemon mode, or register the socket in the IoLoop of the connection
         """
         if not self.connection.listening:
-            self.receiver = AsyncThreadedStrategy.ReceiverSocketThread(self.connection)
-            self.connection.listening = True
-            self.receiver.daemon = True
-            self.receiver.start()
+            if self.connection.io_loop is not None:
+                self.connection.listening = True
+                self.connection.io_loop.register(self.connection)
+            else:
+                self.receiver = AsyncThreadedStrategy.ReceiverSocketThread(self.connection)
+                self.connection.listening = True
+                self.receiver.daemon = True
+                self.receiver.start()
+
+    def _stop_listen(self):
+        if self.connection.io_loop is not None and self.connection.listening:
+            self.connection.io_loop.unregister(self.connection)
+        BaseStrategy._stop_listen(self)
+
+    def _process_messages(self, listen):
+        """
+        Process the messages received in the framer, by the receiver thread or by the IoLoop
+        Message are appended to _responses, returns False if the connection must stop listening
+        """
+        for message in self._framer.messages():
+            if self.connection._usage:
+                self.connection._usage.received_message(len(message))
+            message_id, dict_response = self.decode_message(message)
+            if dict_response['type'] == 'extendedResp' and dict_response['responseName'] == '1.3.6.1.4.1.1466.20037':
+                if dict_response['result'] == 0:  # StartTls in progress
+                    if self.connection.server.tls:
+                        self.connection.server.tls._start_tls(self.connection)
+                    else:
+                        self.connection.last_error = 'no Tls defined in Server'
+                        raise LDAPSSLConfigurationError(self.connection.last_error)
+                else:
+                    self.connection.last_error = 'asynchronous StartTls failed'
+                    raise LDAPStartTLSError(self.connection.last_error)
+            if message_id != 0:  # 0 is reserved for 'Unsolicited Notification' from server as per RFC4511 (paragraph 4.4)
+
+                future = None
+                with self.lock:
+                    if message_id in self._discarded:  # response of a discarded request
+                        if dict_response['type'] not in ['searchResEntry', 'searchResRef', 'intermediateResponse']:
+                            self._discarded.discard(message_id)
+                        continue
+                    if message_id in self._responses:
+                        self._responses[message_id].append(dict_response)
+                    else:
+                        self._responses[message_id] = [dict_response]
+                    if dict_response['type'] not in ['searchResEntry', 'searchResRef', 'intermediateResponse']:
+                        self._responses[message_id].append(RESPONSE_COMPLETE)
+                        if message_id in self._futures:
+                            future = self._futures.pop(message_id)
+                            responses = self._responses.pop(message_id)
+                        else:
+                            self.lock.notify_all()  # wake up threads waiting in get_response()
+                if future:
+                    if responses[-2]['result'] == RESULT_REFERRAL and self.connection.auto_referrals:  # referral is followed with a new connection, don't block the receiver
+                        referral_thread = Thread(target=self._complete_future, args=(message_id, future, responses))
+                        referral_thread.daemon = True
+                        referral_thread.start()
+                    else:
+                        self._complete_future(message_id, future, responses)
+
+                listen = listen and (self.connection.listening or self._framer.pending > 0)
+            else:  # Unsolicited Notification
+                if dict_response['responseName'] == '1.3.6.1.4.1.1466.20036':  # Notice of Disconnection as per RFC4511 (paragraph 4.4.1)
+                    listen = False
+                else:
+                    self.connection.last_error = 'unknown unsolicited notification from server'
+                    raise LDAPStartTLSError(self.connection.last_error)
+
+        return listen
+
+    def _stop_receiving(self):
+        """
+        Close the connection when no more responses will be received
+        """
+        try:
+            self.close()
+        except LDAPExceptionError:  # the socket could be already closed by the server
+            pass
+        with self.lock:
+            self.lock.notify_all()  # no more responses will be received
+            futures = self._futures
+            self._futures = dict()
+        for future in futures.values():
+            future.set_exception(LDAPSessionTerminatedByServer('session terminated by server'))
+
+    def _wait_for_response(self, message_id, timeout):
+        """
+        Wait for the receiver thread to complete a response, returns False if the receiver thread has stopped
+        """
+        with self.lock:
+            if self._responses is not None and message_id in self._responses and self._responses[message_id][-1] == RESPONSE_COMPLETE:
+                return True
+            if not self.connection.listening:
+                return False
+            self.lock.wait(timeout)
+        return True
+
+    def _discard(self, message_id):
+        with self.lock:
+            BaseStrategy._discard(self, message_id)
+            responses = self._responses.pop(message_id, None) if self._responses else None
+            if not responses or responses[-1] != RESPONSE_COMPLETE:
+                self._discarded.add(message_id)
 
     def _get_response(self, message_id):
         """
@@ -184,6 +311,9 @@ class AsyncThreadedStrategy(BaseStrategy):
         with self.lock:
             responses = self._responses.pop(message_id) if message_id in self._responses and self._responses[message_id][-1] == RESPONSE_COMPLETE else None
 
+        return self._follow_referral(message_id, responses)
+
+    def _follow_referral(self, message_id, responses):
         if responses is not None and responses[-2]['result'] == RESULT_REFERRAL:
             if self.connection._usage:
                 self.connection._usage.referrals_followed += 1
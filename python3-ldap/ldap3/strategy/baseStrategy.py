@@ -27,15 +27,20 @@ import socket
 from time import sleep
 from random import choice
 
+try:
+    from time import monotonic
+except ImportError:  # Python 2
+    from time import time as monotonic
+
 from pyasn1.codec.ber import encoder, decoder
 
 from .. import SESSION_TERMINATED_BY_SERVER, RESPONSE_SLEEPTIME, RESPONSE_WAITING_TIMEOUT, SEARCH_SCOPE_BASE_OBJECT, SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_SCOPE_SINGLE_LEVEL, STRATEGY_SYNC, AUTH_ANONYMOUS, DO_NOT_RAISE_EXCEPTIONS
 from ..core.exceptions import LDAPOperationResult, LDAPSASLBindInProgressError, LDAPSocketOpenError, LDAPSessionTerminatedByServer, LDAPUnknownResponseError, LDAPUnknownRequestError, LDAPReferralError, communication_exception_factory, \
-    LDAPSocketSendError, LDAPExceptionError, LDAPSocketCloseError
+    LDAPSocketSendError, LDAPExceptionError, LDAPSocketCloseError, LDAPSocketReceiveError
 from ..protocol.rfc4511 import LDAPMessage, ProtocolOp, MessageID
 from ..operation.add import add_response_to_dict, add_request_to_dict
 from ..operation.modify import modify_request_to_dict, modify_response_to_dict
-from ..operation.search import search_result_reference_response_to_dict, search_result_done_response_to_dict, search_result_entry_response_to_dict, search_request_to_dict
+from ..operation.search import search_result_reference_response_to_dict, search_result_done_response_to_dict, search_result_entry_response_to_dict, search_request_to_dict, decoded_search_result_entry_to_dict
 from ..operation.bind import bind_response_to_dict, bind_request_to_dict
 from ..operation.compare import compare_response_to_dict, compare_request_to_dict
 from ..operation.extended import extended_request_to_dict, extended_response_to_dict, intermediate_response_to_dict
@@ -47,6 +52,9 @@ from ..operation.abandon import abandon_request_to_dict
 from ..core.tls import Tls
 from ..protocol.oid import Oids
 from ..protocol.rfc2696 import RealSearchControlValue
+from ..protocol.berEncoder import EncodedRequest, encode_ldap_message
+from ..protocol.berDecoder import decode_message_fast, decode_search_result_entry, decode_ldap_result, decode_search_result_reference, decode_paged_results_control_value, BERDecodingError, SEARCH_RESULT_ENTRY, SEARCH_RESULT_DONE, \
+    SEARCH_RESULT_REFERENCE
 
 
 # noinspection PyProtectedMember
@@ -63,6 +71,9 @@ class BaseStrategy(object):
         self.no_real_dsa = None  # indicates a connection to a fake LDAP server
         self.pooled = None  # Indicates a connection with a connection pool
         self.can_stream = False  # indicate if a strategy keep a stream of responses (i.e. LDIFProducer can accumulate responses with a single header). Stream must be initialized and closed in _start_listen() and _stop_listen()
+        self._framer = None  # MessageFramer of the strategies that receive data from the socket
+        self.coroutines = False  # indicates a strategy whose operations return coroutines to be awaited (asyncio)
+        self.thread_safe = False  # indicates a connection that can be shared by many threads, request, response and result are kept for each thread
 
     def open(self, reset_usage=True):
         """
@@ -130,6 +141,16 @@ class BaseStrategy(object):
         if exc:
             raise communication_exception_factory(LDAPSocketOpenError, exc)(self.connection.last_error)
 
+        if self.connection.server.receive_buffer_size:  # must be set before connecting to have effect on the TCP window
+            try:
+                self.connection.socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.connection.server.receive_buffer_size)
+            except socket.error as e:
+                self.connection.last_error = 'socket receive buffer error: ' + str(e)
+                exc = e
+
+            if exc:
+                raise communication_exception_factory(LDAPSocketOpenError, exc)(self.connection.last_error)
+
         try:
             self.connection.socket.connect(self.connection.server.address_info[0][4])
         except socket.error as e:
@@ -154,6 +175,9 @@ class BaseStrategy(object):
         if self.connection._usage:
             self.connection._usage.opened_sockets += 1
 
+        if self._framer is not None:
+            self._framer.reset()
+            self._framer.max_receive_size = self.connection.server.max_receive_size
         self.connection.closed = False
 
     def _close_socket(self):
@@ -170,6 +194,9 @@ class BaseStrategy(object):
             self.connection.last_error = 'socket closing error' + str(e)
             exc = e
 
+        if self._framer is not None:
+            self._framer.reset()
+
         if exc:
             raise communication_exception_factory(LDAPSocketCloseError, exc)(self.connection.last_error)
 
@@ -194,16 +221,22 @@ class BaseStrategy(object):
                 self.connection.last_error = 'cannot send operation requests while SASL bind is in progress'
                 raise LDAPSASLBindInProgressError(self.connection.last_error)
             message_id = self.connection.server.next_message_id()
-            ldap_message = LDAPMessage()
-            ldap_message['messageID'] = MessageID(message_id)
-            ldap_message['protocolOp'] = ProtocolOp().setComponentByName(message_type, request)
-            message_controls = build_controls_list(controls)
-            if message_controls is not None:
-                ldap_message['controls'] = message_controls
+            if isinstance(request, EncodedRequest):  # request already encoded, only the LDAPMessage envelope is needed
+                encoded_message = encode_ldap_message(message_id, request.encoded, controls)
+                request_dict = dict(request.request_dict)
+                request_dict['type'] = message_type
+            else:
+                ldap_message = LDAPMessage()
+                ldap_message['messageID'] = MessageID(message_id)
+                ldap_message['protocolOp'] = ProtocolOp().setComponentByName(message_type, request)
+                message_controls = build_controls_list(controls)
+                if message_controls is not None:
+                    ldap_message['controls'] = message_controls
+                encoded_message = encoder.encode(ldap_message)
+                request_dict = None
 
             try:
-                encoded_message = encoder.encode(ldap_message)
-                self.connection.socket.sendall(encoded_message)
+                self.sending(encoded_message)
             except socket.error as e:
                 self.connection.last_error = 'socket sending error' + str(e)
                 encoded_message = None
@@ -212,7 +245,7 @@ class BaseStrategy(object):
             if exc:
                 raise communication_exception_factory(LDAPSocketSendError, exc)(self.connection.last_error)
 
-            self.connection.request = BaseStrategy.decode_request(ldap_message)
+            self.connection.request = request_dict or BaseStrategy.decode_request(ldap_message)
             self.connection.request['controls'] = controls
             self._outstanding[message_id] = self.connection.request
             if self.connection._usage:
@@ -223,6 +256,12 @@ class BaseStrategy(object):
 
         return message_id
 
+    def sending(self, encoded_message):
+        """
+        Send the encoded LDAP message over the socket
+        """
+        self.connection.socket.sendall(encoded_message)
+
     def get_response(self, message_id, timeout=RESPONSE_WAITING_TIMEOUT):
         """
         Get response LDAP messages
@@ -235,7 +274,8 @@ class BaseStrategy(object):
         response = None
         result = None
         if self._outstanding and message_id in self._outstanding:
-            while timeout >= 0:  # waiting for completed message to appear in responses
+            deadline = monotonic() + timeout
+            while True:  # waiting for completed message to appear in responses
                 responses = self._get_response(message_id)
                 if responses == SESSION_TERMINATED_BY_SERVER:
                     try:  # try to close the session but don't raise any error if server has already closed the session
@@ -245,8 +285,9 @@ class BaseStrategy(object):
                     self.connection.last_error = 'session terminated by server'
                     raise LDAPSessionTerminatedByServer(self.connection.last_error)
                 if not responses:
-                    sleep(RESPONSE_SLEEPTIME)
-                    timeout -= RESPONSE_SLEEPTIME
+                    remaining = deadline - monotonic()
+                    if remaining < 0 or not self._wait_for_response(message_id, remaining):
+                        break
                 else:
                     if responses:
                         self._outstanding.pop(message_id)
@@ -260,6 +301,15 @@ class BaseStrategy(object):
 
         return response, result
 
+    def _wait_for_response(self, message_id, timeout):
+        """
+        Wait until the response of message_id could be complete, for no more than timeout seconds
+        Strategies with a receiver thread are notified when a response is complete, this one polls
+        Returns False if the response cannot be received anymore
+        """
+        sleep(min(timeout, RESPONSE_SLEEPTIME))
+        return True
+
     @classmethod
     def compute_ldap_message_size(cls, data):
         """
@@ -285,6 +335,53 @@ class BaseStrategy(object):
 
         return ret_value
 
+    def decode_message(self, data):
+        """
+        Decode a complete LDAP message received from the server
+        Search responses are decoded with the fast BER decoder if requested in the connection, all other messages with pyasn1
+        Returns a tuple (message_id, response) with the response in dict form
+        """
+        if self.connection.fast_decoder:
+            try:
+                ldap_message = decode_message_fast(data)
+                if ldap_message['protocolOp'] in (SEARCH_RESULT_ENTRY, SEARCH_RESULT_DONE, SEARCH_RESULT_REFERENCE):
+                    return ldap_message['messageID'], self.decode_response_fast(ldap_message)
+            except (BERDecodingError, IndexError):  # malformed or unexpected data, let pyasn1 decode (or reject) the message
+                pass
+
+        ldap_message, unprocessed = decoder.decode(data, asn1Spec=LDAPMessage())
+        if unprocessed:
+            self.connection.last_error = 'unprocessed substrate error'
+            raise LDAPSocketReceiveError(self.connection.last_error)
+
+        return int(ldap_message['messageID']), self.decode_response(ldap_message)
+
+    def decode_response_fast(self, ldap_message):
+        """
+        Convert a search response decoded by the fast BER decoder to a dict
+        """
+        message = ldap_message['message']
+        data = ldap_message['data']
+        if ldap_message['protocolOp'] == SEARCH_RESULT_ENTRY:
+            dn, attributes = decode_search_result_entry(message, data, ldap_message['start'], ldap_message['stop'])
+            result = decoded_search_result_entry_to_dict(dn, attributes, self.connection.server.schema, self.connection.server.custom_formatter, self.connection.check_names, self.connection.lazy_attributes)
+            result['type'] = 'searchResEntry'
+        elif ldap_message['protocolOp'] == SEARCH_RESULT_DONE:
+            result = decode_ldap_result(message, data, ldap_message['start'], ldap_message['stop'])
+            result['type'] = 'searchResDone'
+        elif ldap_message['protocolOp'] == SEARCH_RESULT_REFERENCE:
+            result = decode_search_result_reference(message, data, ldap_message['start'], ldap_message['stop'])
+            result['type'] = 'searchResRef'
+        else:
+            raise LDAPUnknownResponseError('unknown response')
+        if ldap_message['controls']:
+            result['controls'] = dict()
+            for control_type, criticality, control_value in ldap_message['controls']:
+                if control_type == '1.2.840.113556.1.4.319':  # simple paged search as per RFC2696
+                    control_value = decode_paged_results_control_value(control_value)
+                result['controls'][control_type] = {'description': Oids.get(control_type, ''), 'criticality': criticality, 'value': control_value}
+        return result
+
     def decode_response(self, ldap_message):
         """
         Convert received LDAPMessage to a dict
@@ -295,7 +392,7 @@ class BaseStrategy(object):
         if message_type == 'bindResponse':
             result = bind_response_to_dict(component)
         elif message_type == 'searchResEntry':
-            result = search_result_entry_response_to_dict(component, self.connection.server.schema, self.connection.server.custom_formatter, self.connection.check_names)
+            result = search_result_entry_response_to_dict(component, self.connection.server.schema, self.connection.server.custom_formatter, self.connection.check_names, self.connection.lazy_attributes)
         elif message_type == 'searchResDone':
             result = search_result_done_response_to_dict(component)
         elif message_type == 'searchResRef':
@@ -493,7 +590,12 @@ class BaseStrategy(object):
                                              authentication=self.connection.authentication if not selected_referral['anonymousBindOnly'] else AUTH_ANONYMOUS,
                                              client_strategy=STRATEGY_SYNC,
                                              auto_referrals=True,
-                                             read_only=self.connection.read_only)
+                                             read_only=self.connection.read_only,
+                                             fast_decoder=self.connection.fast_decoder,
+                                             fast_encoder=self.connection.fast_encoder,
+                                             lazy_attributes=self.connection.lazy_attributes,
+                                             optimize_filters=self.connection.optimize_filters,
+                                             indexed_attributes=self.connection.indexed_attributes)
 
             if self.connection._usage:
                 self.connection._usage.referrals_followed += 1
@@ -560,6 +662,12 @@ class BaseStrategy(object):
         # overridden in strategy class
         raise NotImplementedError
 
+    def _discard(self, message_id):
+        """
+        The response of message_id will not be requested, strategies that keep the responses of other requests drop it when received
+        """
+        self._outstanding.pop(message_id, None)
+
     def receiving(self):
         # overridden in strategy class
         raise NotImplementedError
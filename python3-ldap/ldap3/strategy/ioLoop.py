@@ -0,0 +1,165 @@
+"""
+"""
+
+# Created on 2014.09.23
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+
+import socket
+from threading import Thread, Lock, current_thread
+
+from ..core.exceptions import LDAPExceptionError, LDAPUnknownStrategyError
+
+try:
+    import selectors
+except ImportError:  # Python 2 and Python 3.3
+    selectors = None
+
+
+# noinspection PyProtectedMember
+class IoLoop(object):
+    """
+    A single thread that receives the responses of many AsyncThreaded (or Multiplexed) connections, instead of a receiver thread for each connection
+    The sockets of the connections are watched with a selector, received data is framed and dispatched to the waiters by the strategy of each connection
+    Sockets are registered and unregistered by the thread of the loop, other threads queue the change and wake it up with a socket pair
+    The thread is started when the first socket is registered
+    """
+
+    def __init__(self):
+        if selectors is None:
+            raise LDAPUnknownStrategyError('IoLoop requires the selectors module (Python 3.4 or newer)')
+
+        self.selector = selectors.DefaultSelector()
+        self.lock = Lock()
+        self.thread = None
+        self.closed = False
+        self._filenos = dict()  # file descriptor of each registered connection
+        self._changes = []  # (connection, file descriptor) to register, (None, file descriptor) to unregister
+        self._wakeup_receiver, self._wakeup_sender = socket.socketpair()
+        self._wakeup_receiver.setblocking(False)
+        self.selector.register(self._wakeup_receiver, selectors.EVENT_READ)
+
+    def __repr__(self):
+        return 'IoLoop(connections={0}{1})'.format(len(self._filenos), ', closed' if self.closed else '')
+
+    def __len__(self):
+        return len(self._filenos)
+
+    def register(self, connection):
+        """
+        Receive the responses of the connection, its socket must be open
+        """
+        with self.lock:
+            fileno = connection.socket.fileno()
+            self._filenos[connection] = fileno
+            self._changes.append((connection, fileno))
+            if self.thread is None:
+                self.thread = Thread(target=self.run, name='ldap3 IoLoop')
+                self.thread.daemon = True
+                self.thread.start()
+        self._wakeup()
+
+    def unregister(self, connection):
+        """
+        Stop receiving the responses of the connection, must be called before closing its socket
+        """
+        with self.lock:
+            fileno = self._filenos.pop(connection, None)
+            if fileno is None:
+                return
+            self._changes.append((None, fileno))
+        self._wakeup()
+
+    def close(self):
+        """
+        Stop the thread of the loop, registered connections stop receiving responses
+        """
+        self.closed = True
+        self._wakeup()
+        if self.thread is not None and self.thread is not current_thread():
+            self.thread.join()
+
+    def _wakeup(self):
+        if self.thread is current_thread():
+            self._apply_changes()  # the loop is not waiting in select()
+        else:
+            try:
+                self._wakeup_sender.send(b'\0')
+            except (OSError, socket.error):  # the socket pair buffer is full, the loop will wake up anyway
+                pass
+
+    def _apply_changes(self):
+        with self.lock:
+            changes = self._changes
+            self._changes = []
+        for connection, fileno in changes:
+            if connection is None:
+                try:
+                    self.selector.unregister(fileno)
+                except (KeyError, ValueError):
+                    pass
+            else:
+                try:
+                    self.selector.register(fileno, selectors.EVENT_READ, connection)
+                except KeyError:  # file descriptor of a closed socket not yet unregistered
+                    self.selector.modify(fileno, selectors.EVENT_READ, connection)
+
+    def run(self):
+        while not self.closed:
+            try:
+                events = self.selector.select()
+            except (OSError, socket.error, ValueError):  # a socket has been closed while waiting, its unregistration is already queued
+                self._apply_changes()
+                continue
+            for key, _ in events:
+                if key.data is None:  # woken up by another thread
+                    try:
+                        self._wakeup_receiver.recv(4096)
+                    except (OSError, socket.error):
+                        pass
+                    self._apply_changes()
+                else:
+                    self._receive(key.data)
+
+        self.selector.close()
+        self._wakeup_receiver.close()
+        self._wakeup_sender.close()
+
+    def _receive(self, connection):
+        strategy = connection.strategy
+        framer = strategy._framer
+        received = 0
+        try:
+            received = framer.receive(connection.socket)
+        except (OSError, socket.error, AttributeError):
+            received = 0
+
+        try:
+            listen = strategy._process_messages(received > 0)
+        except LDAPExceptionError:
+            listen = False
+        except Exception as e:  # a malformed message stops only this connection, the loop must go on for the others
+            connection.last_error = 'error receiving data: ' + str(e)
+            listen = False
+
+        if not listen:
+            strategy._stop_receiving()
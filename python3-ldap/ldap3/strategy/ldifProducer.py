@@ -33,6 +33,7 @@ from ..utils.conv import prepare_for_stream
 from ..protocol.rfc4511 import LDAPMessage, MessageID, ProtocolOp
 from ..protocol.rfc2849 import operation_to_ldif, add_ldif_header
 from ..protocol.convert import build_controls_list
+from ..protocol.berEncoder import EncodedRequest
 from .baseStrategy import BaseStrategy
 
 
@@ -79,14 +80,18 @@ class LdifProducerStrategy(BaseStrategy):
         Build the LDAPMessage without sending to server
         """
         message_id = random.randint(0, LDAP_MAX_INT)
-        ldap_message = LDAPMessage()
-        ldap_message['messageID'] = MessageID(message_id)
-        ldap_message['protocolOp'] = ProtocolOp().setComponentByName(message_type, request)
-        message_controls = build_controls_list(controls)
-        if message_controls is not None:
-            ldap_message['controls'] = message_controls
-
-        self.connection.request = BaseStrategy.decode_request(ldap_message)
+        if isinstance(request, EncodedRequest):
+            self.connection.request = dict(request.request_dict)
+            self.connection.request['type'] = message_type
+        else:
+            ldap_message = LDAPMessage()
+            ldap_message['messageID'] = MessageID(message_id)
+            ldap_message['protocolOp'] = ProtocolOp().setComponentByName(message_type, request)
+            message_controls = build_controls_list(controls)
+            if message_controls is not None:
+                ldap_message['controls'] = message_controls
+
+            self.connection.request = BaseStrategy.decode_request(ldap_message)
         self.connection.request['controls'] = controls
         self._outstanding[message_id] = self.connection.request
         return message_id
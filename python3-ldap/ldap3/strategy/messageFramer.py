@@ -0,0 +1,138 @@
+"""
+"""
+
+# Created on 2014.09.12
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2013 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+from .. import SOCKET_SIZE, RECEIVE_MAX_SIZE
+from .baseStrategy import BaseStrategy
+
+MAX_HEADER_SIZE = 129  # tag, length octet and up to 127 octets of long form length
+
+
+class MessageFramer(object):
+    """
+    Splits the octets received from a socket in LDAP messages
+    Data is received directly at the end of a growable bytearray and messages are read from an offset, so octets are not
+    copied again on each receive. The buffer is compacted only when it needs room for new data
+    When the length of the incoming message is known the remaining octets are requested in a single receive, up to max_receive_size
+    """
+
+    def __init__(self, receive_size=SOCKET_SIZE, max_receive_size=RECEIVE_MAX_SIZE):
+        self.receive_size = receive_size
+        self.max_receive_size = max_receive_size
+        self.buffer = bytearray(receive_size)
+        self.start = 0  # first octet not yet returned in a message
+        self.stop = 0  # end of received octets
+
+    def __repr__(self):
+        return 'MessageFramer(pending={0}, buffer={1})'.format(self.pending, len(self.buffer))
+
+    @property
+    def pending(self):
+        return self.stop - self.start
+
+    def reset(self):
+        """
+        Discard pending data, must be called when the socket is opened or closed
+        """
+        self.start = 0
+        self.stop = 0
+
+    def _make_room(self, size):
+        if self.start:  # move pending octets at the beginning of the buffer
+            pending = self.stop - self.start
+            self.buffer[:pending] = self.buffer[self.start: self.stop]
+            self.start = 0
+            self.stop = pending
+        if len(self.buffer) - self.stop < size:
+            self.buffer.extend(bytearray(max(size, len(self.buffer))))  # at least doubles the buffer for amortized linear time
+
+    def _message_size(self):
+        """
+        Returns the size of the first pending message or -1 if the header is not yet received
+        """
+        if self.stop - self.start < 2:
+            return -1
+        return BaseStrategy.compute_ldap_message_size(self.buffer[self.start: min(self.stop, self.start + MAX_HEADER_SIZE)])
+
+    def receive(self, sock):
+        """
+        Receive data from the socket at the end of the buffer
+        Returns the number of received octets, 0 if the socket has been closed by the server
+        """
+        size = self.receive_size
+        length = self._message_size()
+        if length != -1:  # ask for the rest of the message in a single receive
+            size = max(size, min(length - self.stop + self.start, self.max_receive_size))
+        if len(self.buffer) - self.stop < size:
+            self._make_room(size)
+        view = memoryview(self.buffer)[self.stop:]
+        try:
+            received = sock.recv_into(view, size)
+        finally:
+            if str != bytes:  # Python 3, the buffer cannot be resized while exported
+                view.release()
+            del view
+        self.stop += received
+        return received
+
+    def feed(self, data):
+        """
+        Append octets received by other means (i.e. an asyncio stream) at the end of the buffer
+        """
+        size = len(data)
+        if len(self.buffer) - self.stop < size:
+            self._make_room(size)
+        self.buffer[self.stop: self.stop + size] = data
+        self.stop += size
+        return size
+
+    def next_message(self):
+        """
+        Returns the next complete LDAP message or None if more data is needed
+        """
+        length = self._message_size()
+        if length == -1 or self.stop - self.start < length:
+            return None
+
+        if str != bytes:  # Python 3
+            with memoryview(self.buffer) as view:
+                message = view[self.start: self.start + length].tobytes()
+        else:  # Python 2
+            message = bytes(self.buffer[self.start: self.start + length])
+        self.start += length
+        if self.start == self.stop:  # no pending data, next receive starts at the beginning of the buffer
+            self.start = 0
+            self.stop = 0
+        return message
+
+    def messages(self):
+        """
+        Returns the list of complete LDAP messages in the buffer
+        """
+        messages = []
+        message = self.next_message()
+        while message is not None:
+            messages.append(message)
+            message = self.next_message()
+        return messages
@@ -0,0 +1,84 @@
+"""
+"""
+
+# Created on 2014.09.22
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+
+from threading import Lock
+
+from .. import RESPONSE_WAITING_TIMEOUT
+from ..core.exceptions import LDAPSocketReceiveError
+from .asyncThreaded import AsyncThreadedStrategy, FutureTimeoutError
+
+
+# noinspection PyProtectedMember
+class MultiplexedStrategy(AsyncThreadedStrategy):
+    """
+    This strategy is synchronous and thread safe: many threads can share the same connection and its socket
+    Requests are sent with a lock, responses are read by the receiver thread of the AsyncThreaded strategy and
+    demultiplexed by messageId to a Future for each operation, the calling thread waits only for its own response
+    Connection.request, Connection.response and Connection.result are kept for each thread
+    Requires concurrent.futures, lazy connections and StartTls are not available, bind the connection before sharing it
+    """
+
+    def __init__(self, ldap_connection):
+        AsyncThreadedStrategy.__init__(self, ldap_connection)
+        self.sync = True
+        self.thread_safe = True
+        self.send_lock = Lock()
+
+    def sending(self, encoded_message):
+        """
+        Messages of different threads must not be interleaved in the socket
+        """
+        with self.send_lock:
+            self.connection.socket.sendall(encoded_message)
+
+    def post_send_single_response(self, message_id):
+        """
+        Waits for the response and returns the list of responses, result included
+        """
+        responses, result = self._wait_response(message_id)
+        responses.append(result)
+        return responses
+
+    def post_send_search(self, message_id):
+        """
+        Waits for the response, stores in connection.response the objects found and returns them
+        """
+        responses, result = self._wait_response(message_id)
+        self.connection.response = responses
+        return responses
+
+    def _wait_response(self, message_id):
+        future = self._future(message_id)
+        try:
+            responses, result = future.result(RESPONSE_WAITING_TIMEOUT)
+        except FutureTimeoutError:
+            with self.lock:
+                self._futures.pop(message_id, None)
+            self.connection.last_error = 'error receiving response'
+            raise LDAPSocketReceiveError(self.connection.last_error)
+
+        self.connection.result = result
+        return responses, result
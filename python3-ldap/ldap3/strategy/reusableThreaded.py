@@ -25,18 +25,18 @@
 
 from datetime import datetime
 from os import linesep
-from threading import Thread, Lock
-from time import sleep
-from .. import REUSABLE_THREADED_POOL_SIZE, REUSABLE_THREADED_LIFETIME, STRATEGY_SYNC_RESTARTABLE, TERMINATE_REUSABLE, RESPONSE_WAITING_TIMEOUT, LDAP_MAX_INT, RESPONSE_SLEEPTIME
-from .baseStrategy import BaseStrategy
+from threading import Thread, Lock, Event, BoundedSemaphore
+from .. import REUSABLE_THREADED_POOL_SIZE, REUSABLE_THREADED_LIFETIME, REUSABLE_THREADED_PIPELINE, STRATEGY_SYNC_RESTARTABLE, STRATEGY_ASYNC_THREADED, TERMINATE_REUSABLE, RESPONSE_WAITING_TIMEOUT, LDAP_MAX_INT, \
+    POOL_DISPATCH_SHARED, POOL_DISPATCH_SERVER_AFFINITY, REUSABLE_THREADED_IDLE_TIMEOUT, REUSABLE_THREADED_GROW_QUEUE_DEPTH, REUSABLE_THREADED_GROW_WAIT_TIME
+from .baseStrategy import BaseStrategy, monotonic
 from ..core.usage import ConnectionUsage
-from ..core.exceptions import LDAPConnectionPoolNameIsMandatoryError, LDAPConnectionPoolNotStartedError, LDAPOperationResult, LDAPExceptionError
+from ..core.exceptions import LDAPConnectionPoolNameIsMandatoryError, LDAPConnectionPoolNotStartedError, LDAPExceptionError
 
 try:
-    from queue import Queue
+    from queue import Queue, Empty
 except ImportError:  # Python 2
     # noinspection PyUnresolvedReferences
-    from Queue import Queue
+    from Queue import Queue, Empty
 
 
 # noinspection PyProtectedMember
@@ -49,6 +49,11 @@ class ReusableThreadedStrategy(BaseStrategy):
     The pool of connections is instantiated at strategy initialization.
     Strategy has two customizable properties, the total number of connections in the pool and the lifetime of each connection.
     When lifetime is expired the connection is closed and will be opened again when needed.
+    Requests are dispatched to the pooled connections as defined by pool_dispatch: with POOL_DISPATCH_SHARED all the connections take
+    requests from a single queue, with POOL_DISPATCH_LEAST_OUTSTANDING and POOL_DISPATCH_SERVER_AFFINITY each connection has its own queue.
+    With pool_pipeline greater than 1 each pooled connection is an AsyncThreaded connection with up to pool_pipeline requests in flight.
+    The pool is elastic between pool_min_size and pool_max_size: it grows when grow_queue_depth requests are waiting for a connection or
+    have waited longer than grow_wait_time, connections idle for idle_timeout seconds are closed down to pool_min_size.
     """
     pools = dict()
 
@@ -62,9 +67,18 @@ class ReusableThreadedStrategy(BaseStrategy):
                     return object.__new__(cls)
                 if connection.pool_lifetime and pool.lifetime != connection.pool_lifetime:  # change lifetime
                     pool.lifetime = connection.pool_lifetime
-                if connection.pool_size and pool.pool_size != connection.pool_size:  # if pool size has changed terminate and recreate the connections
+                if connection.pool_idle_timeout and pool.idle_timeout != connection.pool_idle_timeout:  # change idle timeout
+                    pool.idle_timeout = connection.pool_idle_timeout
+                if connection.pool_size or connection.pool_min_size or connection.pool_max_size:  # the pool grows or shrinks to the new sizes without terminating
+                    with pool.lock:
+                        pool.pool_size, pool.min_size, pool.max_size = ReusableThreadedStrategy.ConnectionPool.sizes(connection)
+                        while pool.started and len(pool.connections) < pool.min_size:
+                            pool._grow()
+                if (connection.pool_dispatch is not None and pool.dispatch != connection.pool_dispatch) or \
+                        (connection.pool_pipeline and pool.pipeline != connection.pool_pipeline):  # if dispatch or pipeline have changed terminate and recreate the connections
                     pool.terminate_pool()
-                    pool.pool_size = connection.pool_size
+                    pool.dispatch = connection.pool_dispatch if connection.pool_dispatch is not None else pool.dispatch
+                    pool.pipeline = connection.pool_pipeline or pool.pipeline
                 return pool
             else:
                 return object.__new__(cls)
@@ -74,17 +88,28 @@ class ReusableThreadedStrategy(BaseStrategy):
                 self.name = connection.pool_name
                 self.original_connection = connection
                 self.connections = []
-                self.pool_size = connection.pool_size or REUSABLE_THREADED_POOL_SIZE
+                self.pool_size, self.min_size, self.max_size = ReusableThreadedStrategy.ConnectionPool.sizes(connection)
+                self.idle_timeout = connection.pool_idle_timeout or REUSABLE_THREADED_IDLE_TIMEOUT
+                self.grow_queue_depth = REUSABLE_THREADED_GROW_QUEUE_DEPTH
+                self.grow_wait_time = REUSABLE_THREADED_GROW_WAIT_TIME
                 self.lifetime = connection.pool_lifetime or REUSABLE_THREADED_LIFETIME
-                self.request_queue = Queue()
+                self.dispatch = connection.pool_dispatch if connection.pool_dispatch is not None else POOL_DISPATCH_SHARED
+                self.pipeline = connection.pool_pipeline or REUSABLE_THREADED_PIPELINE
+                self.request_queue = Queue()  # shared by the connections with POOL_DISPATCH_SHARED
                 self.open_pool = False
                 self.bind_pool = False
                 self.tls_pool = False
                 self._incoming = dict()
+                self._waiting = dict()  # an Event for each request without response, set when the response is in _incoming
                 self.counter = 0
                 self.terminated_usage = ConnectionUsage() if connection._usage else None
                 self.terminated = False
                 self.lock = Lock()
+                self.started_requests = 0  # requests taken from the queues by the pooled connections
+                self.wait_time = 0.0  # total seconds spent in queue by the started requests
+                self.max_wait_time = 0.0
+                self.pending_requests = 0  # requests dispatched and not yet completed
+                self.server_response_times = dict()  # (completed requests, total seconds) by Server
                 ReusableThreadedStrategy.pools[self.name] = self
                 self.started = False
 
@@ -92,11 +117,20 @@ class ReusableThreadedStrategy(BaseStrategy):
             s = str(self.name) + ' - ' + ('started' if self.started else 'terminated') + linesep
             s += 'original connection: ' + str(self.original_connection) + linesep
             s += 'response pool length: ' + str(len(self._incoming))
-            s += ' - pool size: ' + str(self.pool_size)
+            s += ' - pool size: ' + str(len(self.connections)) + ' (' + str(self.min_size) + '-' + str(self.max_size) + ')'
             s += ' - lifetime: ' + str(self.lifetime)
             s += ' - open: ' + str(self.open_pool)
             s += ' - bind: ' + str(self.bind_pool)
             s += ' - tls: ' + str(self.tls_pool)
+            s += ' - dispatch: ' + str(self.dispatch)
+            s += ' - pipeline: ' + str(self.pipeline)
+            s += ' - queue depth: ' + str(self.queue_depth)
+            s += ' - average wait time: ' + str(self.average_wait_time)
+            s += ' - max wait time: ' + str(self.max_wait_time)
+
+            for server in self.server_response_times:
+                s += linesep
+                s += str(server) + ' - average response time: ' + str(self.response_time(server))
 
             for connection in self.connections:
                 s += linesep
@@ -107,6 +141,36 @@ class ReusableThreadedStrategy(BaseStrategy):
         def __repr__(self):
             return self.__str__()
 
+        @staticmethod
+        def sizes(connection):
+            """
+            Returns the initial, minimum and maximum size of the pool, minimum and maximum default to pool_size
+            """
+            min_size = connection.pool_min_size or connection.pool_size or REUSABLE_THREADED_POOL_SIZE
+            max_size = connection.pool_max_size or max(connection.pool_size or REUSABLE_THREADED_POOL_SIZE, min_size)
+            return min(max(connection.pool_size or min_size, min_size), max_size), min_size, max_size
+
+        @property
+        def queue_depth(self):
+            """
+            Number of requests waiting to be taken by a pooled connection
+            """
+            return sum(request_queue.qsize() for request_queue in self._queues())
+
+        @property
+        def average_wait_time(self):
+            """
+            Average seconds spent in queue by the requests taken by the pooled connections
+            """
+            return self.wait_time / self.started_requests if self.started_requests else 0.0
+
+        def response_time(self, server):
+            """
+            Average seconds waited for the responses of server, 0.0 if no response has been received yet
+            """
+            completed, total = self.server_response_times.get(server, (0, 0.0))
+            return total / completed if completed else 0.0
+
         def start_pool(self):
             if not self.started:
                 self.create_pool()
@@ -116,17 +180,110 @@ class ReusableThreadedStrategy(BaseStrategy):
                 return True
             return False
 
+        def _register(self, counter):
+            """
+            Must be called with the pool lock held, before the request is queued
+            """
+            self._waiting[counter] = Event()
+
+        def _deliver(self, counter, response, result):
+            """
+            Store the response of the request and wake up the thread waiting for it
+            """
+            with self.lock:
+                self._incoming[counter] = (response, result)
+                event = self._waiting.pop(counter, None)
+            if event:
+                event.set()
+
+        def _dispatch(self, counter, message_type, request, controls):
+            """
+            Must be called with the pool lock held, queues the request with the time it has been queued
+            """
+            if self.dispatch == POOL_DISPATCH_SHARED:
+                request_queue = self.request_queue
+            else:
+                reusable_connection = min(self.connections, key=self._load)
+                reusable_connection.outstanding += 1
+                request_queue = reusable_connection.request_queue
+            request_queue.put((counter, message_type, request, controls, monotonic()))
+            self.pending_requests += 1
+            if self.started and len(self.connections) < self.max_size and self.pending_requests - len(self.connections) * self.pipeline >= self.grow_queue_depth:  # requests waiting for a connection
+                self._grow()
+
+        def _load(self, reusable_connection):
+            if self.dispatch == POOL_DISPATCH_SERVER_AFFINITY:  # servers not yet measured are tried first
+                return (reusable_connection.outstanding + 1) * self.response_time(reusable_connection.connection.server), reusable_connection.outstanding
+            return reusable_connection.outstanding
+
+        def _started(self, reusable_connection, queued_time):
+            """
+            Called by the pooled connection when it takes a request from its queue
+            """
+            wait_time = monotonic() - queued_time
+            with self.lock:
+                if self.dispatch == POOL_DISPATCH_SHARED:
+                    reusable_connection.outstanding += 1
+                self.started_requests += 1
+                self.wait_time += wait_time
+                if wait_time > self.max_wait_time:
+                    self.max_wait_time = wait_time
+                if self.started and wait_time >= self.grow_wait_time and len(self.connections) < self.max_size:
+                    self._grow()
+
+        def _grow(self):
+            """
+            Must be called with the pool lock held, adds a new connection to the started pool
+            """
+            reusable_connection = self._new_connection()
+            self.connections.append(reusable_connection)
+            reusable_connection.thread.start()
+
+        def _remove_idle(self, reusable_connection):
+            """
+            Called by the pooled connection when idle for idle_timeout seconds, returns True if the connection has been removed from the pool
+            Requests are dispatched with the pool lock held, so no request can be queued for the removed connection
+            """
+            with self.lock:
+                if self.started and len(self.connections) > self.min_size and not reusable_connection.busy and reusable_connection in self.connections:
+                    self.connections.remove(reusable_connection)
+                    return True
+            return False
+
+        def _completed(self, reusable_connection, response_time):
+            """
+            Called by the pooled connection when the response of a request has been received
+            """
+            with self.lock:
+                reusable_connection.outstanding -= 1
+                self.pending_requests -= 1
+                reusable_connection.completed += 1
+                reusable_connection.response_time += response_time
+                completed, total = self.server_response_times.get(reusable_connection.connection.server, (0, 0.0))
+                self.server_response_times[reusable_connection.connection.server] = (completed + 1, total + response_time)
+
+        def _queues(self):
+            return [self.request_queue] if self.dispatch == POOL_DISPATCH_SHARED else [connection.request_queue for connection in self.connections]
+
+        def _new_connection(self):
+            return ReusableThreadedStrategy.ReusableConnection(self.original_connection, self.request_queue if self.dispatch == POOL_DISPATCH_SHARED else Queue(), self.pipeline)
+
         def create_pool(self):
-            self.connections = [ReusableThreadedStrategy.ReusableConnection(self.original_connection, self.request_queue) for _ in range(self.pool_size)]
+            self.connections = [self._new_connection() for _ in range(self.pool_size)]
 
         def terminate_pool(self):
-            self.started = False
-            self.request_queue.join()  # wait for all queue pending operations
+            with self.lock:  # idle connections are not removed from a terminated pool
+                self.started = False
+                connections = list(self.connections)
+            for request_queue in self._queues():
+                request_queue.join()  # wait for all queue pending operations
 
-            for _ in range(len([connection for connection in self.connections if connection.thread.is_alive()])):  # put a TERMINATE signal on the queue for each active thread
-                self.request_queue.put((TERMINATE_REUSABLE, None, None, None))
+            for connection in connections:
+                if connection.thread.is_alive():  # put a TERMINATE signal on the queue for each active thread
+                    connection.request_queue.put((TERMINATE_REUSABLE, None, None, None, None))
 
-            self.request_queue.join()  # wait for all queue terminate operations
+            for request_queue in self._queues():
+                request_queue.join()  # wait for all queue terminate operations
 
     class PooledConnectionThread(Thread):
         def __init__(self, reusable_connection, original_connection):
@@ -140,52 +297,29 @@ class ReusableThreadedStrategy(BaseStrategy):
             self.active_connection.running = True
             terminate = False
             pool = self.original_connection.strategy.pool
+            request_queue = self.active_connection.request_queue
             while not terminate:
-                counter, message_type, request, controls = pool.request_queue.get()
-                self.active_connection.busy = True
+                try:
+                    counter, message_type, request, controls, queued_time = request_queue.get(timeout=pool.idle_timeout)
+                except Empty:
+                    if pool._remove_idle(self.active_connection):
+                        terminate = True
+                        self.active_connection.close()
+                    continue
                 if counter == TERMINATE_REUSABLE:
                     terminate = True
-                    if self.active_connection.connection.bound:
-                        try:
-                            self.active_connection.connection.unbind()
-                        except LDAPExceptionError:
-                            pass
+                    self.active_connection.close()
+                    request_queue.task_done()
                 else:
+                    pool._started(self.active_connection, queued_time)
                     if (datetime.now() - self.active_connection.creation_time).seconds >= self.original_connection.strategy.pool.lifetime:  # destroy and create a new connection
+                        self.active_connection.wait_in_flight()
                         try:
                             self.active_connection.connection.unbind()
                         except LDAPExceptionError:
                             pass
                         self.active_connection.new_connection()
-                    if message_type not in ['bindRequest', 'unbindRequest']:
-                        if pool.open_pool and self.active_connection.connection.closed:
-                            self.active_connection.connection.open()
-                        if pool.bind_pool and not self.active_connection.connection.bound:
-                            self.active_connection.connection.bind()
-                        if pool.tls_pool and not self.active_connection.connection.tls_started:
-                            self.active_connection.connection.start_tls()
-                        # noinspection PyProtectedMember
-                        self.active_connection.connection._fire_deferred()  # force deferred operations
-
-                        exc = None
-                        response = None
-                        result = None
-                        try:
-                            if message_type == 'searchRequest':
-                                response = self.active_connection.connection.post_send_search(self.active_connection.connection.send(message_type, request, controls))
-                            else:
-                                response = self.active_connection.connection.post_send_single_response(self.active_connection.connection.send(message_type, request, controls))
-                            result = self.active_connection.connection.result
-                        except LDAPOperationResult as e:  # raise_exceptions has raise an exception. It must be redirected to the original connection thread
-                            exc = e
-
-                        with pool.lock:
-                            if exc:
-                                pool._incoming[counter] = (exc, None)
-                            else:
-                                pool._incoming[counter] = (response, result)
-                self.original_connection.busy = False
-                pool.request_queue.task_done()
+                    self.active_connection.execute(pool, counter, message_type, request, controls)
             if self.original_connection.usage:
                 pool.terminated_usage += self.active_connection.connection.usage
             self.active_connection.running = False
@@ -193,13 +327,19 @@ class ReusableThreadedStrategy(BaseStrategy):
     class ReusableConnection(object):
         """
         Container for the Restartable connection. it includes a thread and a lock to execute the connection in the pool
+        With pipeline greater than 1 the connection is an AsyncThreaded connection returning futures and the responses are
+        delivered by its receiver thread, the window semaphore limits the requests in flight
         """
-        def __init__(self, connection, request_queue):
+        def __init__(self, connection, request_queue, pipeline=REUSABLE_THREADED_PIPELINE):
 
             self.original_connection = connection
             self.request_queue = request_queue
+            self.pipeline = pipeline
+            self.window = BoundedSemaphore(pipeline) if pipeline > 1 else None
             self.running = False
-            self.busy = False
+            self.outstanding = 0  # requests dispatched to this connection and not yet completed
+            self.completed = 0
+            self.response_time = 0.0  # total seconds waited for the responses
             self.connection = None
             self.creation_time = None
             self.new_connection()
@@ -210,9 +350,15 @@ class ReusableThreadedStrategy(BaseStrategy):
             s += 'running ' if self.running else '-halted'
             s += ' - ' + ('busy' if self.busy else ' available')
             s += ' - ' + ('creation time: ' + self.creation_time.isoformat())
+            s += ' - outstanding: ' + str(self.outstanding)
+            s += ' - completed: ' + str(self.completed)
 
             return s
 
+        @property
+        def busy(self):
+            return self.outstanding > 0
+
         def new_connection(self):
             from ..core.connection import Connection
             # noinspection PyProtectedMember
@@ -221,7 +367,7 @@ class ReusableThreadedStrategy(BaseStrategy):
                                          password=self.original_connection.password,
                                          version=self.original_connection.version,
                                          authentication=self.original_connection.authentication,
-                                         client_strategy=STRATEGY_SYNC_RESTARTABLE,
+                                         client_strategy=STRATEGY_ASYNC_THREADED if self.window else STRATEGY_SYNC_RESTARTABLE,
                                          raise_exceptions=self.original_connection.raise_exceptions,
                                          check_names=self.original_connection.check_names,
                                          auto_referrals=self.original_connection.auto_referrals,
@@ -230,7 +376,13 @@ class ReusableThreadedStrategy(BaseStrategy):
                                          collect_usage=True if self.original_connection._usage else False,
                                          read_only=self.original_connection.read_only,
                                          auto_bind=self.original_connection.auto_bind,
-                                         lazy=True)
+                                         lazy=True,
+                                         fast_decoder=self.original_connection.fast_decoder,
+                                         fast_encoder=self.original_connection.fast_encoder,
+                                         lazy_attributes=self.original_connection.lazy_attributes,
+                                         optimize_filters=self.original_connection.optimize_filters,
+                                         indexed_attributes=self.original_connection.indexed_attributes,
+                                         return_futures=True if self.window else False)
 
             if self.original_connection.server_pool:
                 self.connection.server_pool = self.original_connection.server_pool
@@ -238,6 +390,74 @@ class ReusableThreadedStrategy(BaseStrategy):
 
             self.creation_time = datetime.now()
 
+        def close(self):
+            """
+            Unbind the connection when the requests in flight are completed
+            """
+            self.wait_in_flight()
+            if self.connection.bound:
+                try:
+                    self.connection.unbind()
+                except LDAPExceptionError:
+                    pass
+
+        def wait_in_flight(self):
+            """
+            Wait for the responses of all the requests in flight
+            """
+            if self.window:
+                for _ in range(self.pipeline):
+                    self.window.acquire()
+                for _ in range(self.pipeline):
+                    self.window.release()
+
+        # noinspection PyProtectedMember
+        def execute(self, pool, counter, message_type, request, controls):
+            """
+            Send the request, the response is delivered to the pool when received
+            """
+            if self.window:
+                self.window.acquire()
+            start = monotonic()
+            try:
+                if pool.open_pool and self.connection.closed:
+                    self.connection.open()
+                if pool.bind_pool and not self.connection.bound:
+                    self.connection.bind()
+                if pool.tls_pool and not self.connection.tls_started:
+                    self.connection.start_tls()
+                self.connection._fire_deferred()  # force deferred operations
+                if message_type == 'searchRequest':
+                    response = self.connection.post_send_search(self.connection.send(message_type, request, controls))
+                else:
+                    response = self.connection.post_send_single_response(self.connection.send(message_type, request, controls))
+            except LDAPExceptionError as e:  # the exception must be redirected to the original connection thread
+                self._complete(pool, counter, start, e, None)
+                return
+
+            if self.window:
+                response.add_done_callback(lambda future: self._complete_future(pool, counter, message_type, start, future))
+            else:
+                self._complete(pool, counter, start, response, self.connection.result)
+
+        def _complete_future(self, pool, counter, message_type, start, future):
+            try:
+                response, result = future.result()
+            except LDAPExceptionError as e:
+                self._complete(pool, counter, start, e, None)
+                return
+
+            if message_type != 'searchRequest':  # as returned by post_send_single_response() of the sync strategy
+                response = response + [result]
+            self._complete(pool, counter, start, response, result)
+
+        def _complete(self, pool, counter, start, response, result):
+            pool._completed(self, monotonic() - start)
+            pool._deliver(counter, response, result)
+            if self.window:
+                self.window.release()
+            self.request_queue.task_done()
+
     def __init__(self, ldap_connection):
         BaseStrategy.__init__(self, ldap_connection)
         self.sync = False
@@ -291,7 +511,8 @@ class ReusableThreadedStrategy(BaseStrategy):
                     if self.pool.counter > LDAP_MAX_INT:
                         self.pool.counter = 1
                     counter = self.pool.counter
-                self.pool.request_queue.put((counter, message_type, request, controls))
+                    self.pool._register(counter)
+                    self.pool._dispatch(counter, message_type, request, controls)
             return counter
         raise LDAPConnectionPoolNotStartedError('reusable connection pool not started')
 
@@ -302,20 +523,15 @@ class ReusableThreadedStrategy(BaseStrategy):
             return None
         elif counter == -3:  # bogus startTls extended request
             return list(), {'result': 0, 'referrals': None, 'responseName': '1.3.6.1.4.1.1466.20037', 'type': 'extendedResp', 'description': 'success', 'responseValue': 'None', 'dn': '', 'message': ''}
-        response = None
-        result = None
-        while timeout >= 0:  # waiting for completed message to appear in _incoming
-            try:
-                with self.connection.strategy.pool.lock:
-                    response, result = self.connection.strategy.pool._incoming.pop(counter)
-            except KeyError:
-                sleep(RESPONSE_SLEEPTIME)
-                timeout -= RESPONSE_SLEEPTIME
-                continue
-            break
-
-        if isinstance(response, LDAPOperationResult):
-            raise response  # an exception has been raised with raise_connections
+        with self.pool.lock:
+            event = self.pool._waiting.get(counter)
+        if event:  # waiting for the pooled connection to deliver the response in _incoming
+            event.wait(timeout)
+        with self.pool.lock:
+            response, result = self.pool._incoming.pop(counter, (None, None))
+
+        if isinstance(response, LDAPExceptionError):
+            raise response  # an exception has been raised in the pooled connection, LDAPOperationResult with raise_exceptions
 
         return response, result
 
@@ -24,12 +24,11 @@
 # If not, see <http://www.gnu.org/licenses/>.
 
 import socket
-from pyasn1.codec.ber import decoder
 
-from .. import SESSION_TERMINATED_BY_SERVER, RESPONSE_COMPLETE, SOCKET_SIZE, RESULT_REFERRAL
+from .. import SESSION_TERMINATED_BY_SERVER, RESPONSE_COMPLETE, RESULT_REFERRAL
 from ..core.exceptions import LDAPSocketReceiveError, communication_exception_factory, LDAPExceptionError, LDAPExtensionError, LDAPOperationResult
 from ..strategy.baseStrategy import BaseStrategy
-from ..protocol.rfc4511 import LDAPMessage
+from .messageFramer import MessageFramer
 
 
 # noinspection PyProtectedMember
@@ -39,6 +38,7 @@ class SyncWaitStrategy(BaseStrategy):
     Requests return a boolean value to indicate the result of the requested Operation
     Connection.response will contain the whole LDAP response for the messageId requested in a dict form
     Connection.request will contain the result LDAP message in a dict form
+    Responses of other outstanding requests (i.e. pipelined requests) received while waiting are kept until requested
     """
 
     def __init__(self, ldap_connection):
@@ -47,8 +47,13 @@ class SyncWaitStrategy(BaseStrategy):
         self.no_real_dsa = False
         self.pooled = False
         self.can_stream = False
+        self._framer = MessageFramer()
+        self._pending = dict()  # responses received for other outstanding requests, by messageId
+        self._discarded = set()  # messageId of the requests whose responses are dropped when received
 
     def open(self, reset_usage=True):
+        self._pending = dict()
+        self._discarded = set()
         BaseStrategy.open(self, reset_usage)
         try:
             self.connection.refresh_dsa_info()
@@ -66,42 +71,25 @@ class SyncWaitStrategy(BaseStrategy):
         Checks if the socket is closed
         """
         messages = []
-        receiving = True
-        unprocessed = b''
-        data = b''
-        get_more_data = True
-        exc = None
-        while receiving:
-            if get_more_data:
-                try:
-                    data = self.connection.socket.recv(SOCKET_SIZE)
-                except (OSError, socket.error, AttributeError) as e:
-                    self.connection.last_error = 'error receiving data: ' + str(e)
-                    exc = e
-
-                if exc:
-                    try:  # try to close the connection before raising exception
-                        self.close()
-                    except (socket.error, LDAPExceptionError):
-                        pass
-                    raise communication_exception_factory(LDAPSocketReceiveError, exc)(self.connection.last_error)
-
-                unprocessed += data
-            if len(data) > 0:
-                length = BaseStrategy.compute_ldap_message_size(unprocessed)
-                if length == -1:  # too few data to decode message length
-                    get_more_data = True
-                    continue
-                if len(unprocessed) < length:
-                    get_more_data = True
-                else:
-                    messages.append(unprocessed[:length])
-                    unprocessed = unprocessed[length:]
-                    get_more_data = False
-                    if len(unprocessed) == 0:
-                        receiving = False
-            else:
-                receiving = False
+        while not messages:
+            exc = None
+            received = 0
+            try:
+                received = self._framer.receive(self.connection.socket)
+            except (OSError, socket.error, AttributeError) as e:
+                self.connection.last_error = 'error receiving data: ' + str(e)
+                exc = e
+
+            if exc:
+                try:  # try to close the connection before raising exception
+                    self.close()
+                except (socket.error, LDAPExceptionError):
+                    pass
+                raise communication_exception_factory(LDAPSocketReceiveError, exc)(self.connection.last_error)
+
+            if not received:  # socket closed by server
+                break
+            messages = self._framer.messages()
 
         return messages
 
@@ -133,43 +121,50 @@ class SyncWaitStrategy(BaseStrategy):
         self.connection.last_error = 'error receiving response'
         raise LDAPSocketReceiveError(self.connection.last_error)
 
+    def _discard(self, message_id):
+        BaseStrategy._discard(self, message_id)
+        responses = self._pending.pop(message_id, None)
+        if not responses or responses[-1]['type'] in ['searchResEntry', 'searchResRef', 'intermediateResponse']:  # the response is not complete
+            self._discarded.add(message_id)
+
     def _get_response(self, message_id):
         """
         Performs the capture of LDAP response for SyncWaitStrategy
         """
-        ldap_responses = []
-        response_complete = False
+        ldap_responses = self._pending.pop(message_id, [])
+        response_complete = True if ldap_responses and ldap_responses[-1]['type'] not in ['searchResEntry', 'searchResRef', 'intermediateResponse'] else False
         while not response_complete:
             responses = self.receiving()
             if responses:
                 for response in responses:
-                    while len(response) > 0:
-                        if self.connection._usage:
-                            self.connection._usage.received_message(len(response))
-                        ldap_resp, unprocessed = decoder.decode(response, asn1Spec=LDAPMessage())
-                        if int(ldap_resp['messageID']) == message_id:
-                            dict_response = self.decode_response(ldap_resp)
-                            ldap_responses.append(dict_response)
-                            if dict_response['type'] not in ['searchResEntry', 'searchResRef', 'intermediateResponse']:
-                                response_complete = True
-                        elif int(ldap_resp['messageID']) == 0:  # 0 is reserved for 'Unsolicited Notification' from server as per RFC4511 (paragraph 4.4)
-                            dict_response = self.decode_response(ldap_resp)
-                            if dict_response['responseName'] == '1.3.6.1.4.1.1466.20036':  # Notice of Disconnection as per RFC4511 (paragraph 4.4.1)
-                                return SESSION_TERMINATED_BY_SERVER
-                            else:
-                                self.connection.last_error = 'unknown unsolicited notification from server'
-                                raise LDAPSocketReceiveError(self.connection.last_error)
-                        elif int(ldap_resp['messageID']) != message_id and self.decode_response(ldap_resp)['type'] == 'extendedResp':
-                            self.connection.last_error = 'multiple extended responses to a single extended request'
-                            raise LDAPExtensionError(self.connection.last_error)
-                            #pass  # ignore message with invalid messageId when receiving multiple extendedResp. This is not allowed by RFC4511 but some LDAP server do it
+                    if self.connection._usage:
+                        self.connection._usage.received_message(len(response))
+                    response_id, dict_response = self.decode_message(response)
+                    if response_id == message_id:
+                        ldap_responses.append(dict_response)
+                        if dict_response['type'] not in ['searchResEntry', 'searchResRef', 'intermediateResponse']:
+                            response_complete = True
+                    elif response_id == 0:  # 0 is reserved for 'Unsolicited Notification' from server as per RFC4511 (paragraph 4.4)
+                        if dict_response['responseName'] == '1.3.6.1.4.1.1466.20036':  # Notice of Disconnection as per RFC4511 (paragraph 4.4.1)
+                            return SESSION_TERMINATED_BY_SERVER
                         else:
-                            self.connection.last_error = 'invalid messageId received'
-                            raise LDAPSocketReceiveError(self.connection.last_error)
-                        response = unprocessed
-                        if response:  # if this statement is removed unprocessed data will be processed as another message
-                            self.connection.last_error = 'unprocessed substrate error'
+                            self.connection.last_error = 'unknown unsolicited notification from server'
                             raise LDAPSocketReceiveError(self.connection.last_error)
+                    elif response_id in self._discarded:  # response of a discarded request
+                        if dict_response['type'] not in ['searchResEntry', 'searchResRef', 'intermediateResponse']:
+                            self._discarded.discard(response_id)
+                    elif response_id in self._outstanding:  # response of another request in flight, kept until requested
+                        if response_id in self._pending:
+                            self._pending[response_id].append(dict_response)
+                        else:
+                            self._pending[response_id] = [dict_response]
+                    elif response_id != message_id and dict_response['type'] == 'extendedResp':
+                        self.connection.last_error = 'multiple extended responses to a single extended request'
+                        raise LDAPExtensionError(self.connection.last_error)
+                        #pass  # ignore message with invalid messageId when receiving multiple extendedResp. This is not allowed by RFC4511 but some LDAP server do it
+                    else:
+                        self.connection.last_error = 'invalid messageId received'
+                        raise LDAPSocketReceiveError(self.connection.last_error)
             else:
                 return SESSION_TERMINATED_BY_SERVER
 
@@ -0,0 +1,84 @@
+"""
+"""
+
+# Created on 2014.09.29
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# Attribute names received in search entries are canonicalized in a process wide table, so the entries share the same
+# key objects (with the hash already computed) and the lowercase form of each name is computed only once.
+# The table is bounded by ATTRIBUTE_NAMES_TABLE_SIZE, names received when the table is full are used as they are
+
+from threading import Lock
+
+from .. import ATTRIBUTE_NAMES_TABLE_SIZE
+
+
+class AttributeNameTable(object):
+    """
+    Maps the received attribute names (str or raw octets) to a canonical str object
+    lower_names maps each canonical name to its lowercase form
+    """
+
+    def __init__(self, size=ATTRIBUTE_NAMES_TABLE_SIZE):
+        self.size = size
+        self.names = dict()
+        self.lower_names = dict()
+        self.lock = Lock()
+
+    def __repr__(self):
+        return 'AttributeNameTable(size={0.size!r}, names={1})'.format(self, len(self.lower_names))
+
+    def __len__(self):
+        return len(self.lower_names)
+
+    def canonical(self, name):
+        canonical_name = self.names.get(name)
+        if canonical_name is None:
+            canonical_name = self._add(name)
+        return canonical_name
+
+    def lower(self, name):
+        lower_name = self.lower_names.get(name)
+        if lower_name is None:
+            lower_name = name.lower()
+        return lower_name
+
+    def _add(self, name):
+        if isinstance(name, bytes) and str != bytes:  # Python 3, raw octets from the fast decoder
+            decoded_name = name.decode('utf-8', 'ignore')
+        else:
+            decoded_name = name
+        with self.lock:
+            if len(self.names) >= self.size:
+                return self.names.get(decoded_name, decoded_name)
+            canonical_name = self.names.setdefault(decoded_name, decoded_name)
+            self.names[name] = canonical_name
+            self.lower_names.setdefault(canonical_name, canonical_name.lower())
+        return canonical_name
+
+    def clear(self):
+        with self.lock:
+            self.names.clear()
+            self.lower_names.clear()
+
+
+attribute_names = AttributeNameTable()
@@ -25,6 +25,10 @@
 
 import collections
 
+from .attributeNames import attribute_names
+
+lower_names = attribute_names.lower_names  # lowercase form of the canonical attribute names
+
 
 class CaseInsensitiveDict(collections.MutableMapping):
     if bytes == str:  # python2
@@ -34,6 +38,7 @@ class CaseInsensitiveDict(collections.MutableMapping):
 
     def __init__(self, other=None, **kwargs):
         self._store = dict()
+        self._keys = dict()  # lowercase key -> stored key, the case of the first stored key is preserved
         if other or kwargs:
             if other is None:
                 other = dict()
@@ -41,22 +46,29 @@ class CaseInsensitiveDict(collections.MutableMapping):
 
     def _getkey(self, key):
         if isinstance(key, CaseInsensitiveDict.case_insensitive_types):
-            for stored_key in self._store:
-                if isinstance(stored_key, CaseInsensitiveDict.case_insensitive_types):
-                    if key.lower() == stored_key.lower():
-                        key = stored_key
-                        break
+            return self._keys.get(lower_names.get(key) or key.lower(), key)
+        return key
+
+    def _addkey(self, key):
+        if isinstance(key, CaseInsensitiveDict.case_insensitive_types):
+            return self._keys.setdefault(lower_names.get(key) or key.lower(), key)
         return key
 
     def __delitem__(self, key):
-        del self._store[self._getkey(key)]
+        key = self._getkey(key)
+        del self._store[key]
+        if isinstance(key, CaseInsensitiveDict.case_insensitive_types):
+            del self._keys[key.lower()]
 
     def __setitem__(self, key, item):
-        self._store[self._getkey(key)] = item
+        self._store[self._addkey(key)] = item
 
     def __getitem__(self, key):
         return self._store[self._getkey(key)]
 
+    def __contains__(self, key):
+        return self._getkey(key) in self._store
+
     def __iter__(self):
         return self._store.__iter__()
 
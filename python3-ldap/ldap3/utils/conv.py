@@ -39,6 +39,22 @@ def escape_bytes(bytes_value):
     return ('\\' + escaped) if escaped else ''
 
 
+def escape_filter_chars(text):
+    """
+    Escape the characters with a special meaning in the string representation of a search filter (RFC4515)
+    """
+    if isinstance(text, bytearray) or (str != bytes and isinstance(text, bytes)):
+        return escape_bytes(bytes(text))
+    if not isinstance(text, (str, type(u''))):
+        text = str(text)
+    escaped = text.replace('\\', '\\5c')
+    escaped = escaped.replace('*', '\\2a')
+    escaped = escaped.replace('(', '\\28')
+    escaped = escaped.replace(')', '\\29')
+    escaped = escaped.replace('\x00', '\\00')
+    return escaped
+
+
 def prepare_for_stream(value):
     if str != bytes:  # Python 3
         return value
@@ -0,0 +1,115 @@
+"""
+"""
+
+# Created on 2014.09.15
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2013 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+from ..core.exceptions import LDAPInvalidFilterError
+from ..operation.search import FilterNode, parse_filter, AND, OR, NOT, MATCH_APPROX, MATCH_GREATER_OR_EQUAL, MATCH_LESS_OR_EQUAL, MATCH_EXTENSIBLE, MATCH_PRESENT, MATCH_SUBSTRING, MATCH_EQUAL
+from ..protocol.berEncoder import to_octets
+
+
+def _boolean_node(tag, filters):
+    if len(filters) == 1 and isinstance(filters[0], (list, tuple)):  # filters in a sequence
+        filters = filters[0]
+    if not filters:
+        raise LDAPInvalidFilterError('boolean filter without elements')
+    node = FilterNode(tag)
+    for element in filters:
+        if not isinstance(element, FilterNode):
+            raise LDAPInvalidFilterError('invalid element in boolean filter')
+        node.append(element)
+    return node
+
+
+class F(object):
+    """
+    Filter builder, returns the same FilterNode tree produced by parsing a filter string
+    Values are used as they are (no escaping is needed), str() of the returned node is the escaped filter string
+    A FilterNode can be used as search_filter in Connection.search()
+
+    F.and_(F.eq('objectClass', 'person'), F.in_('uid', ['a', 'b', 'c']), F.not_(F.present('mail')))
+    """
+
+    @staticmethod
+    def and_(*filters):
+        return _boolean_node(AND, filters)
+
+    @staticmethod
+    def or_(*filters):
+        return _boolean_node(OR, filters)
+
+    @staticmethod
+    def not_(filter_node):
+        return _boolean_node(NOT, (filter_node, ))
+
+    @staticmethod
+    def eq(attribute, value):
+        return FilterNode(MATCH_EQUAL, {'attr': attribute, 'value': to_octets(value)})
+
+    @staticmethod
+    def ge(attribute, value):
+        return FilterNode(MATCH_GREATER_OR_EQUAL, {'attr': attribute, 'value': to_octets(value)})
+
+    @staticmethod
+    def le(attribute, value):
+        return FilterNode(MATCH_LESS_OR_EQUAL, {'attr': attribute, 'value': to_octets(value)})
+
+    @staticmethod
+    def approx(attribute, value):
+        return FilterNode(MATCH_APPROX, {'attr': attribute, 'value': to_octets(value)})
+
+    @staticmethod
+    def present(attribute):
+        return FilterNode(MATCH_PRESENT, {'attr': attribute})
+
+    @staticmethod
+    def substring(attribute, initial=None, any_=None, final=None):
+        if not initial and not any_ and not final:
+            raise LDAPInvalidFilterError('substring filter without substrings')
+        return FilterNode(MATCH_SUBSTRING, {'attr': attribute,
+                                            'initial': to_octets(initial) if initial else None,
+                                            'any': [to_octets(substring) for substring in any_ if substring] if any_ else [],
+                                            'final': to_octets(final) if final else None})
+
+    @staticmethod
+    def extensible(value, attribute=None, matching_rule=None, dn_attributes=False):
+        if not attribute and not matching_rule:
+            raise LDAPInvalidFilterError('invalid extensible filter')
+        return FilterNode(MATCH_EXTENSIBLE, {'attr': attribute, 'value': to_octets(value), 'matchingRule': matching_rule, 'dnAttributes': True if dn_attributes else None})
+
+    @staticmethod
+    def in_(attribute, values):
+        """
+        Equality match of attribute with any of the values
+        """
+        nodes = [FilterNode(MATCH_EQUAL, {'attr': attribute, 'value': to_octets(value)}) for value in values]
+        if not nodes:
+            raise LDAPInvalidFilterError('no values for attribute ' + attribute)
+        return nodes[0] if len(nodes) == 1 else _boolean_node(OR, nodes)
+
+    @staticmethod
+    def parse(search_filter, schema=None):
+        """
+        FilterNode of a filter string, can be combined with the other nodes
+        """
+        return parse_filter(search_filter, schema).elements[0]
@@ -0,0 +1,272 @@
+"""
+"""
+
+# Created on 2014.09.17
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2013 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# Local evaluation of search filters on the entries returned by a search (in the form of search_result_entry_response_to_dict)
+# The filter is compiled once in a tree of closures, values are compared with the matching rules of the attribute types
+# defined in the schema, or as case insensitive strings when the schema is not available
+
+from ..core.exceptions import LDAPInvalidFilterError
+from ..operation.search import FilterNode, parse_filter, ROOT, AND, OR, NOT, MATCH_APPROX, MATCH_GREATER_OR_EQUAL, MATCH_LESS_OR_EQUAL, MATCH_EXTENSIBLE, MATCH_PRESENT, MATCH_SUBSTRING, MATCH_EQUAL
+from .conv import to_dn
+
+
+def to_text(value):
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'ignore')
+    return value
+
+
+def normalize_case_exact(value):  # insignificant spaces are removed as in RFC4518 (simplified)
+    return ' '.join(to_text(value).split())
+
+
+def normalize_case_ignore(value):
+    return ' '.join(to_text(value).split()).lower()
+
+
+def normalize_numeric_string(value):
+    return ''.join(to_text(value).split())
+
+
+def normalize_telephone_number(value):
+    return ''.join(to_text(value).split()).replace('-', '').lower()
+
+
+def normalize_integer(value):
+    try:
+        return int(to_text(value))
+    except ValueError:
+        return None
+
+
+def normalize_boolean(value):
+    return to_text(value).strip().upper()
+
+
+def normalize_octet_string(value):
+    return bytes(value) if isinstance(value, bytearray) else value
+
+
+def normalize_distinguished_name(value):
+    return ','.join(to_dn(to_text(value), remove_space=True)).lower()
+
+
+def normalize_object_identifier(value):
+    return to_text(value).strip().lower()
+
+
+# matching rules by OID and lowercase name, the normalized values are compared with == and ordering operators
+MATCHING_RULES = dict()
+for _oids, _names, _normalize in [(['2.5.13.0'], ['objectIdentifierMatch'], normalize_object_identifier),
+                                  (['2.5.13.1', '2.5.13.23'], ['distinguishedNameMatch', 'uniqueMemberMatch'], normalize_distinguished_name),
+                                  (['2.5.13.2', '2.5.13.3', '2.5.13.4', '2.5.13.11', '1.3.6.1.4.1.1466.109.114.2', '1.3.6.1.4.1.1466.109.114.3'],
+                                   ['caseIgnoreMatch', 'caseIgnoreOrderingMatch', 'caseIgnoreSubstringsMatch', 'caseIgnoreListMatch', 'caseIgnoreIA5Match', 'caseIgnoreIA5SubstringsMatch'], normalize_case_ignore),
+                                  (['2.5.13.5', '2.5.13.6', '2.5.13.7', '2.5.13.16', '2.5.13.27', '2.5.13.28', '1.3.6.1.4.1.1466.109.114.1'],
+                                   ['caseExactMatch', 'caseExactOrderingMatch', 'caseExactSubstringsMatch', 'bitStringMatch', 'generalizedTimeMatch', 'generalizedTimeOrderingMatch', 'caseExactIA5Match'], normalize_case_exact),
+                                  (['2.5.13.8', '2.5.13.9', '2.5.13.10'], ['numericStringMatch', 'numericStringOrderingMatch', 'numericStringSubstringsMatch'], normalize_numeric_string),
+                                  (['2.5.13.13'], ['booleanMatch'], normalize_boolean),
+                                  (['2.5.13.14', '2.5.13.15'], ['integerMatch', 'integerOrderingMatch'], normalize_integer),
+                                  (['2.5.13.17', '2.5.13.18'], ['octetStringMatch', 'octetStringOrderingMatch'], normalize_octet_string),
+                                  (['2.5.13.20', '2.5.13.21'], ['telephoneNumberMatch', 'telephoneNumberSubstringsMatch'], normalize_telephone_number)]:
+    for _oid in _oids:
+        MATCHING_RULES[_oid] = _normalize
+    for _name in _names:
+        MATCHING_RULES[_name.lower()] = _normalize
+
+DEFAULT_NORMALIZE = normalize_case_ignore
+
+
+def matching_rule(attribute_type, kind, schema):
+    """
+    Returns the matching rule of kind ('equality', 'ordering' or 'substr') for the attribute type, following the superior types
+    """
+    visited = set()
+    while attribute_type is not None and id(attribute_type) not in visited:
+        visited.add(id(attribute_type))
+        rule = getattr(attribute_type, kind, None)
+        if rule:
+            return rule[0] if isinstance(rule, list) else rule
+        superior = attribute_type.superior[0] if attribute_type.superior else None
+        attribute_type = schema.attribute_types.get(superior) if superior else None
+    return None
+
+
+def attribute_normalizer(attribute, kind, schema):
+    if schema and schema.attribute_types is not None and attribute in schema.attribute_types:
+        rule = matching_rule(schema.attribute_types[attribute], kind, schema)
+        if rule is None and kind != 'equality':  # ordering and substring matches use the equality rule as fallback
+            rule = matching_rule(schema.attribute_types[attribute], 'equality', schema)
+        if rule:
+            return MATCHING_RULES.get(rule.lower(), DEFAULT_NORMALIZE)
+    return DEFAULT_NORMALIZE
+
+
+def attribute_names(attribute, schema):
+    """
+    All the names of the attribute type (i.e. cn and commonName)
+    """
+    if schema and schema.attribute_types is not None and attribute in schema.attribute_types and schema.attribute_types[attribute].name:
+        names = [attribute] + [name for name in schema.attribute_types[attribute].name if name.lower() != attribute.lower()]
+        return names
+    return [attribute]
+
+
+def values_getter(attribute, schema):
+    names = attribute_names(attribute, schema)
+    if len(names) == 1:
+        def get_values(entry):
+            return entry['raw_attributes'].get(attribute)
+    else:
+        def get_values(entry):
+            raw_attributes = entry['raw_attributes']
+            for name in names:
+                values = raw_attributes.get(name)
+                if values:
+                    return values
+            return None
+    return get_values
+
+
+def compile_boolean(tag, matchers):
+    if tag == AND:
+        def match(entry):
+            for matcher in matchers:
+                if not matcher(entry):
+                    return False
+            return True
+    elif tag == OR:
+        def match(entry):
+            for matcher in matchers:
+                if matcher(entry):
+                    return True
+            return False
+    else:  # NOT
+        inner_matcher = matchers[0]
+
+        def match(entry):
+            return not inner_matcher(entry)
+    return match
+
+
+def compile_comparison(get_values, normalize, assertion_value, compare):
+    target = normalize(assertion_value)
+    if target is None:  # invalid assertion value for the matching rule (i.e. a non numeric value with integerMatch)
+        return lambda entry: False
+
+    def match(entry):
+        values = get_values(entry)
+        if values:
+            for value in values:
+                normalized = normalize(value)
+                if normalized is not None and compare(normalized, target):
+                    return True
+        return False
+    return match
+
+
+def compile_substring(get_values, normalize, assertion):
+    initial = normalize(assertion['initial']) if assertion['initial'] else None
+    any_substrings = [normalize(substring) for substring in assertion['any']] if assertion['any'] else []
+    final = normalize(assertion['final']) if assertion['final'] else None
+
+    def match_value(value):
+        pos = 0
+        if initial is not None:
+            if not value.startswith(initial):
+                return False
+            pos = len(initial)
+        for substring in any_substrings:
+            pos = value.find(substring, pos)
+            if pos == -1:
+                return False
+            pos += len(substring)
+        if final is not None:
+            return len(value) - len(final) >= pos and value.endswith(final)
+        return True
+
+    def match(entry):
+        values = get_values(entry)
+        if values:
+            for value in values:
+                if match_value(normalize(value)):
+                    return True
+        return False
+    return match
+
+
+def compile_filter_node(filter_node, schema):
+    tag = filter_node.tag
+    if tag in (AND, OR, NOT):
+        if not filter_node.elements:
+            raise LDAPInvalidFilterError('boolean filter without elements')
+        return compile_boolean(tag, [compile_filter_node(element, schema) for element in filter_node.elements])
+
+    assertion = filter_node.assertion
+    if tag == MATCH_PRESENT:
+        get_values = values_getter(assertion['attr'], schema)
+        return lambda entry: bool(get_values(entry))
+    elif tag == MATCH_EQUAL or tag == MATCH_APPROX:  # approximate match is evaluated as equality
+        return compile_comparison(values_getter(assertion['attr'], schema), attribute_normalizer(assertion['attr'], 'equality', schema), assertion['value'], lambda value, target: value == target)
+    elif tag == MATCH_GREATER_OR_EQUAL:
+        return compile_comparison(values_getter(assertion['attr'], schema), attribute_normalizer(assertion['attr'], 'ordering', schema), assertion['value'], lambda value, target: value >= target)
+    elif tag == MATCH_LESS_OR_EQUAL:
+        return compile_comparison(values_getter(assertion['attr'], schema), attribute_normalizer(assertion['attr'], 'ordering', schema), assertion['value'], lambda value, target: value <= target)
+    elif tag == MATCH_SUBSTRING:
+        normalize = attribute_normalizer(assertion['attr'], 'substr', schema)
+        if normalize in (normalize_integer, normalize_octet_string):
+            normalize = normalize_case_exact
+        return compile_substring(values_getter(assertion['attr'], schema), normalize, assertion)
+    elif tag == MATCH_EXTENSIBLE:
+        if not assertion['attr'] or assertion['dnAttributes']:
+            raise LDAPInvalidFilterError('extensible match without attribute or with dn attributes cannot be evaluated locally')
+        if assertion['matchingRule']:
+            if assertion['matchingRule'].lower() not in MATCHING_RULES:
+                raise LDAPInvalidFilterError('unknown matching rule ' + assertion['matchingRule'])
+            normalize = MATCHING_RULES[assertion['matchingRule'].lower()]
+        else:
+            normalize = attribute_normalizer(assertion['attr'], 'equality', schema)
+        return compile_comparison(values_getter(assertion['attr'], schema), normalize, assertion['value'], lambda value, target: value == target)
+    else:
+        raise LDAPInvalidFilterError('unknown filter node tag')
+
+
+def compile_matcher(search_filter, schema=None):
+    """
+    Compile the filter (a filter string or a FilterNode) to a function that returns True if the entry matches the filter
+    The entry is a dict with the 'raw_attributes' key, as the entries in connection.response
+    If schema is a SchemaInfo the matching rules and the names of the attribute types are used in comparisons
+    """
+    if isinstance(search_filter, FilterNode):
+        filter_node = search_filter.elements[0] if search_filter.tag == ROOT else search_filter
+    else:
+        filter_node = parse_filter(search_filter, schema).elements[0]
+    return compile_filter_node(filter_node, schema)
+
+
+def match_entry(entry, search_filter, schema=None):
+    """
+    Returns True if the entry matches the filter, use compile_matcher() when the same filter is matched on many entries
+    """
+    return compile_matcher(search_filter, schema)(entry)
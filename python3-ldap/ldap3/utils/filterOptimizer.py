@@ -0,0 +1,158 @@
+"""
+"""
+
+# Created on 2014.09.18
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2013 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# Optimization of the filter tree between parse_filter() and the compilation of the filter
+# Same operator nesting is flattened, duplicate assertions are removed, single element AND and OR are replaced by their element
+# and double negations are removed. Elements of AND and OR keep their order, unless some of them are on indexed attributes
+# The canonical form has the elements of AND and OR sorted, so equivalent filters have the same canonical form
+
+from ..operation.search import FilterNode, filter_tree, filter_node_to_string, ROOT, AND, OR, NOT, MATCH_EXTENSIBLE, MATCH_EQUAL
+
+RANK_INDEXED_EQUALITY = 0
+RANK_INDEXED = 1
+RANK_OTHER = 2
+
+
+def unwrap(filter_node):
+    """
+    Removes single element AND and OR and double negations from the top of the filter node
+    """
+    while True:
+        if filter_node.tag in (AND, OR) and len(filter_node.elements) == 1:
+            filter_node = filter_node.elements[0]
+        elif filter_node.tag == NOT and filter_node.elements and filter_node.elements[0].tag == NOT:
+            filter_node = filter_node.elements[0].elements[0]
+        else:
+            return filter_node
+
+
+def assertion_key(filter_node):
+    """
+    Canonical form of an assertion, attribute names and matching rules are case insensitive
+    """
+    assertion = dict(filter_node.assertion)
+    if assertion['attr']:
+        assertion['attr'] = assertion['attr'].lower()
+    if filter_node.tag == MATCH_EXTENSIBLE and assertion['matchingRule']:
+        assertion['matchingRule'] = assertion['matchingRule'].lower()
+    return filter_node_to_string(FilterNode(filter_node.tag, assertion))
+
+
+class FilterOptimizer(object):
+    """
+    Optimizes filter trees, elements of AND and OR with assertions on indexed_attributes are moved first
+    Elements of AND and OR are not reordered when none of them is on an indexed attribute
+    Optimizers with the same indexed attributes are equal, so they can be part of the filter cache key
+    """
+
+    def __init__(self, indexed_attributes=None):
+        self.indexed_attributes = frozenset([attribute.lower() for attribute in indexed_attributes]) if indexed_attributes else frozenset()
+
+    def __repr__(self):
+        return 'FilterOptimizer(indexed_attributes=' + repr(sorted(self.indexed_attributes)) + ')'
+
+    def __eq__(self, other):
+        return isinstance(other, FilterOptimizer) and self.indexed_attributes == other.indexed_attributes
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.indexed_attributes)
+
+    def rank(self, filter_node):
+        if filter_node.assertion and filter_node.assertion['attr'] and filter_node.assertion['attr'].lower() in self.indexed_attributes:
+            return RANK_INDEXED_EQUALITY if filter_node.tag == MATCH_EQUAL else RANK_INDEXED
+        return RANK_OTHER
+
+    def optimize(self, filter_node):
+        """
+        Returns a new optimized filter tree, the original filter node is not modified
+        """
+        if filter_node.tag == ROOT:
+            root = FilterNode(ROOT)
+            root.append(self._optimize(filter_node.elements[0])[0])
+            return root
+        return self._optimize(filter_node)[0]
+
+    def canonical(self, filter_node):
+        """
+        Returns the canonical form of the filter, equivalent filters have the same canonical form
+        """
+        if filter_node.tag == ROOT:
+            filter_node = filter_node.elements[0]
+        return self._optimize(filter_node)[1]
+
+    def _optimize(self, filter_node):
+        """
+        Returns the optimized filter node and its canonical form
+        """
+        filter_node = unwrap(filter_node)
+        tag = filter_node.tag
+        if tag == NOT:
+            element, key = self._optimize(filter_node.elements[0])
+            optimized_node = FilterNode(NOT)
+            optimized_node.append(element)
+            return optimized_node, '(!' + key + ')'
+        elif tag in (AND, OR):
+            elements = dict()  # canonical form -> optimized element
+            order = []  # canonical forms in the order of the filter
+            pending = list(reversed(filter_node.elements))
+            while pending:
+                element = unwrap(pending.pop())
+                if element.tag == tag:  # flattens same operator nesting
+                    pending.extend(reversed(element.elements))
+                    continue
+                optimized_element, key = self._optimize(element)
+                if optimized_element.tag == tag:  # an element became of the same operator after removing duplicates
+                    pending.extend(reversed(optimized_element.elements))
+                elif key not in elements:
+                    elements[key] = optimized_element
+                    order.append(key)
+            keys = sorted(order)
+            if len(keys) == 1:
+                return elements[keys[0]], keys[0]
+            optimized_node = FilterNode(tag)
+            if any(self.rank(elements[key]) != RANK_OTHER for key in order):  # sort is stable, filter order is kept in the same rank
+                order.sort(key=lambda element_key: self.rank(elements[element_key]))
+            for key in order:
+                optimized_node.append(elements[key])
+            return optimized_node, ('(&' if tag == AND else '(|') + ''.join(keys) + ')'
+        else:
+            return FilterNode(tag, filter_node.assertion), assertion_key(filter_node)
+
+
+def optimize_filter(search_filter, indexed_attributes=None, schema=None):
+    """
+    Returns the optimized filter string
+    """
+    return str(FilterOptimizer(indexed_attributes).optimize(filter_tree(search_filter, schema)))
+
+
+def canonical_filter(search_filter, schema=None):
+    """
+    Returns the canonical form of the filter, can be used as a key to identify equivalent filters
+    """
+    return FilterOptimizer().canonical(filter_tree(search_filter, schema))
@@ -0,0 +1,99 @@
+"""
+"""
+
+# Created on 2014.09.10
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2013 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+
+import collections
+
+from .attributeNames import attribute_names
+
+lower_names = attribute_names.lower_names  # lowercase form of the canonical attribute names
+
+NOT_DECODED = object()
+
+
+class LazyDict(collections.MutableMapping):
+    """
+    Mapping whose values are decoded only on first access, decoded values are memoized
+    undecoded is a list of (key, value) tuples, decoder(key, value) returns the decoded value
+    if case_insensitive is True string keys are case insensitive as in CaseInsensitiveDict
+    """
+
+    def __init__(self, undecoded, decoder, case_insensitive=False):
+        self._store = dict()  # every key, the value is None until decoded
+        self._undecoded = dict()
+        self._keys = dict() if case_insensitive else None  # lowercase key -> stored key
+        self._decoder = decoder
+        for key, value in undecoded:
+            key = self._addkey(key)
+            self._store[key] = None
+            self._undecoded[key] = value
+
+    def _getkey(self, key):
+        if self._keys is not None and hasattr(key, 'lower'):
+            return self._keys.get(lower_names.get(key) or key.lower(), key)
+        return key
+
+    def _addkey(self, key):
+        if self._keys is not None and hasattr(key, 'lower'):
+            return self._keys.setdefault(lower_names.get(key) or key.lower(), key)
+        return key
+
+    def __delitem__(self, key):
+        key = self._getkey(key)
+        del self._store[key]
+        self._undecoded.pop(key, None)
+        if self._keys is not None and hasattr(key, 'lower'):
+            del self._keys[key.lower()]
+
+    def __setitem__(self, key, item):
+        key = self._addkey(key)
+        self._undecoded.pop(key, None)
+        self._store[key] = item
+
+    def __getitem__(self, key):
+        key = self._getkey(key)
+        value = self._undecoded.get(key, NOT_DECODED)
+        if value is not NOT_DECODED:  # removed from undecoded only after storing the decoded value, safe when shared between threads
+            self._store[key] = self._decoder(key, value)
+            self._undecoded.pop(key, None)
+        return self._store[key]
+
+    def __contains__(self, key):
+        return self._getkey(key) in self._store
+
+    def __iter__(self):
+        return self._store.__iter__()
+
+    def __len__(self):
+        return len(self._store)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def __str__(self):
+        return str(dict(self.items()))
+
+    def copy(self):
+        return dict(self.items())
@@ -0,0 +1,90 @@
+"""
+"""
+
+# Created on 2014.09.19
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2013 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# On disk cache of the server schema, the cached SchemaInfo is used only if the modifyTimestamp of the subschema entry is unchanged
+# Each server and subschema entry has its own file in the cache directory, files are replaced atomically so concurrent
+# processes can share the same directory. Cache files are pickled, the cache directory must not be writable by untrusted users
+
+from hashlib import sha1
+from tempfile import mkstemp
+import os
+
+try:
+    import cPickle as pickle  # Python 2
+except ImportError:
+    import pickle
+
+SCHEMA_CACHE_VERSION = 1  # change when the pickled classes are modified
+
+
+def schema_cache_file(cache_directory, server_name, schema_entry):
+    return os.path.join(cache_directory, 'schema-' + sha1((server_name + '|' + schema_entry).encode('utf-8')).hexdigest() + '.pickle')
+
+
+def load_cached_schema(cache_directory, server_name, schema_entry, modify_timestamp):
+    """
+    Returns the cached SchemaInfo if present and still valid, else None
+    """
+    try:
+        with open(schema_cache_file(cache_directory, server_name, schema_entry), 'rb') as cache_file:
+            cached = pickle.load(cache_file)
+    except Exception:  # missing or unreadable file, the schema is read from the server
+        return None
+
+    if isinstance(cached, dict) and cached.get('version') == SCHEMA_CACHE_VERSION and cached.get('server') == server_name and cached.get('schema_entry') == schema_entry and cached.get('modify_timestamp') == modify_timestamp:
+        return cached.get('schema')
+
+    return None
+
+
+def save_cached_schema(cache_directory, server_name, schema_entry, modify_timestamp, schema_info):
+    """
+    Writes the SchemaInfo in the cache directory, returns False if the cache file cannot be written
+    """
+    cached = {'version': SCHEMA_CACHE_VERSION,
+              'server': server_name,
+              'schema_entry': schema_entry,
+              'modify_timestamp': modify_timestamp,
+              'schema': schema_info}
+    temp_path = None
+    try:
+        if not os.path.isdir(cache_directory):
+            os.makedirs(cache_directory)
+        temp_descriptor, temp_path = mkstemp(dir=cache_directory, suffix='.tmp')
+        with os.fdopen(temp_descriptor, 'wb') as temp_file:
+            pickle.dump(cached, temp_file, pickle.HIGHEST_PROTOCOL)
+        cache_path = schema_cache_file(cache_directory, server_name, schema_entry)
+        try:
+            os.replace(temp_path, cache_path)
+        except AttributeError:  # Python 2
+            if os.name == 'nt' and os.path.exists(cache_path):
+                os.remove(cache_path)
+            os.rename(temp_path, cache_path)
+    except (IOError, OSError, pickle.PicklingError):
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False
+
+    return True
@@ -0,0 +1,38 @@
+"""
+"""
+
+# Created on 2014.09.23
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# pytest configuration of the test package
+
+import sys
+
+collect_ignore = []
+if sys.version_info < (3, 5):  # coroutines with async and await are a syntax error before Python 3.5
+    collect_ignore.append('testAsyncIoStrategy.py')
+if sys.version_info < (3, 4):  # the selectors module is new in Python 3.4
+    collect_ignore.append('testIoLoop.py')
+try:
+    import concurrent.futures
+except ImportError:  # Python 2 without the futures package
+    collect_ignore.append('testAsyncFutures.py')
@@ -0,0 +1,192 @@
+"""
+"""
+
+# Created on 2014.09.23
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# Local stand-in LDAP server used by the tests of the strategies, answers to the requests are built directly in BER
+# Bind, search, compare and modify always succeed, except:
+#   bind of cn=wrong fails with invalidCredentials
+#   search and modify of cn=missing fail with noSuchObject
+#   search of cn=disconnect gets a Notice of Disconnection
+#   search of cn=malformed gets a message that is not a valid LDAPMessage
+#   search of cn=close and unbind close the connection
+#   search of the root DSE returns an entry with vendorName
+
+import socket
+from threading import Thread, Timer, Lock, Event
+from time import sleep
+
+from ldap3.protocol.berDecoder import decode_message_fast, decode_tag, TAG_INTEGER, TAG_OCTET_STRING
+from ldap3.protocol.berEncoder import encode_sequence, encode_integer, encode_octet_string, TAG_ENUMERATED, TAG_SET
+from ldap3.strategy.messageFramer import MessageFramer
+
+NOTICE_OF_DISCONNECTION = '1.3.6.1.4.1.1466.20036'
+
+
+def reply(message_id, protocol_op):
+    return bytes(encode_sequence([encode_integer(message_id), protocol_op]))
+
+
+def ldap_result(tag, result_code=0, extra=b''):
+    return encode_sequence([encode_integer(result_code, TAG_ENUMERATED), encode_octet_string(''), encode_octet_string(''), extra], tag)
+
+
+def search_result_entry(dn, attributes=None):
+    """
+    searchResEntry with the attributes dict, the default entry has only cn with the dn as value
+    """
+    if attributes is None:
+        attributes = {'cn': [dn]}
+    return encode_sequence([encode_octet_string(dn), encode_sequence([encode_sequence([encode_octet_string(name), encode_sequence([encode_octet_string(value) for value in values], TAG_SET)]) for name, values in attributes.items()])], 0x64)
+
+
+def request_dn(request, ldap_message=None):
+    """
+    Returns the dn of the request (the base of a search) as bytes
+    """
+    if ldap_message is None:
+        ldap_message = decode_message_fast(request)
+    start = ldap_message['start']
+    if ldap_message['protocolOp'] == 0x60:  # bindRequest, the name follows the version
+        _, start = decode_tag(request, start, TAG_INTEGER)
+    dn_start, dn_stop = decode_tag(request, start, TAG_OCTET_STRING)
+    return request[dn_start: dn_stop]
+
+
+def replies_to(request):
+    """
+    Returns the replies to the request, None if the connection must be closed
+    """
+    ldap_message = decode_message_fast(request)
+    message_id = ldap_message['messageID']
+    operation = ldap_message['protocolOp']
+    if operation == 0x42:  # unbindRequest
+        return None
+    dn = request_dn(request, ldap_message)
+    if operation == 0x60:  # bindRequest
+        return reply(message_id, ldap_result(0x61, 49 if dn == b'cn=wrong' else 0))
+    elif operation == 0x63:  # searchRequest
+        if dn == b'cn=close':
+            return None
+        elif dn == b'cn=missing':
+            return reply(message_id, ldap_result(0x65, 32))
+        elif dn == b'cn=disconnect':
+            return reply(0, ldap_result(0x78, 2, encode_octet_string(NOTICE_OF_DISCONNECTION, 0x8a)))
+        elif dn == b'cn=malformed':
+            return reply(message_id, encode_octet_string(''))  # an octet string is not a protocolOp
+        elif dn == b'':  # root DSE
+            return reply(message_id, search_result_entry('', {'vendorName': ['stand-in']})) + reply(message_id, ldap_result(0x65))
+        return reply(message_id, search_result_entry(dn)) + reply(message_id, ldap_result(0x65))
+    elif operation == 0x66:  # modifyRequest
+        return reply(message_id, ldap_result(0x67, 32 if dn == b'cn=missing' else 0))
+    elif operation == 0x6e:  # compareRequest
+        return reply(message_id, ldap_result(0x6f, 6))  # compareTrue
+    return None
+
+
+class StandInServer(Thread):
+    """
+    Stand-in LDAP server listening on a local port, each client is served in its own thread
+    The replies to the requests received together are sent after latency seconds, in reverse order if reverse is True
+    If delay() returns a number of seconds for a request its reply is sent by a timer, so it doesn't block the other requests
+    If delay() returns an Event the reply is sent when the event is set
+    """
+    def __init__(self, latency=0.0, reverse=False, backlog=10):
+        Thread.__init__(self)
+        self.latency = latency
+        self.reverse = reverse
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(backlog)
+        self.port = self.listener.getsockname()[1]
+        self.daemon = True
+        self.lock = Lock()
+        self.accepted = 0
+        self.clients = 0  # clients connected
+
+    def run(self):
+        while True:
+            try:
+                client, _ = self.listener.accept()
+            except (OSError, socket.error):  # listener closed
+                break
+            client_thread = Thread(target=self.serve, args=(client, ))
+            client_thread.daemon = True
+            client_thread.start()
+
+    def stop(self):
+        self.listener.close()
+
+    def replies_to(self, request):
+        return replies_to(request)
+
+    def delay(self, request):
+        return None
+
+    def serve(self, client):
+        """
+        Serve the client socket until it's closed, can be used with a socket not accepted by the server
+        """
+        with self.lock:
+            self.accepted += 1
+            self.clients += 1
+        framer = MessageFramer()
+        send_lock = Lock()
+
+        def send(data):
+            with send_lock:
+                try:
+                    client.sendall(data)
+                except (OSError, socket.error):
+                    pass
+
+        def send_when_set(event, data):
+            event.wait()
+            send(data)
+
+        connected = True
+        while connected and framer.receive(client):
+            replies = []
+            for request in framer.messages():
+                data = self.replies_to(request)
+                if data is None:
+                    connected = False
+                    break
+                delay = self.delay(request)
+                if delay is None:
+                    replies.append(data)
+                elif data:
+                    timer = Thread(target=send_when_set, args=(delay, data)) if isinstance(delay, Event) else Timer(delay, send, (data, ))
+                    timer.daemon = True
+                    timer.start()
+            if replies:
+                if self.latency:
+                    sleep(self.latency)
+                send(b''.join(reversed(replies) if self.reverse else replies))
+        try:
+            client.shutdown(socket.SHUT_RDWR)
+        except (OSError, socket.error):
+            pass
+        client.close()
+        with self.lock:
+            self.clients -= 1
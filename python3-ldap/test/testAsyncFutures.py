@@ -0,0 +1,114 @@
+"""
+"""
+
+# Created on 2014.09.20
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from concurrent.futures import as_completed, wait
+
+from ldap3 import Server, Connection, STRATEGY_ASYNC_THREADED, STRATEGY_SYNC
+from ldap3.core.exceptions import LDAPNoSuchObjectResult, LDAPSessionTerminatedByServer, LDAPUnknownStrategyError
+from test.standInServer import StandInServer, request_dn
+
+
+class HoldingServer(StandInServer):
+    """
+    The requests received together are answered in reverse order, requests with the hold base are not answered
+    """
+    def __init__(self, hold=None):
+        StandInServer.__init__(self, reverse=True)
+        self.hold = hold
+
+    def replies_to(self, request):
+        return b'' if self.hold is not None and request_dn(request) == self.hold else StandInServer.replies_to(self, request)
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.server = None
+        self.connection = None
+
+    def tearDown(self):
+        if self.connection:
+            self.connection.unbind()
+        if self.server:
+            self.server.stop()
+
+    def listen(self, hold=None, **connection_parameters):
+        self.server = HoldingServer(hold)
+        self.server.start()
+        self.connection = Connection(Server('127.0.0.1', port=self.server.port), client_strategy=STRATEGY_ASYNC_THREADED, return_futures=True, **connection_parameters)
+        self.connection.open()
+
+    def test_fan_out_searches(self):
+        self.listen()
+        completed = []
+        futures = dict()
+        for number in range(500):
+            future = self.connection.search('cn=user%d,o=test' % number, '(objectClass=*)', attributes=['cn'])
+            future.add_done_callback(completed.append)
+            futures[future] = 'cn=user%d,o=test' % number
+        for future in as_completed(futures, timeout=10):
+            response, result = future.result()
+            self.assertEqual(result['description'], 'success')
+            self.assertEqual(response[0]['dn'], futures[future])
+        self.assertEqual(len(completed), 500)
+        self.assertEqual(self.connection.strategy._outstanding, dict())
+
+    def test_get_response_with_future(self):
+        self.listen()
+        future = self.connection.search('cn=test', '(objectClass=*)')
+        response, result = self.connection.get_response(future)
+        self.assertEqual(response[0]['dn'], 'cn=test')
+        self.assertEqual(self.connection.result, result)
+        self.assertTrue(isinstance(future.message_id, int))
+
+    def test_operation_result_exception(self):
+        self.listen(raise_exceptions=True)
+        future = self.connection.search('cn=missing', '(objectClass=*)')
+        self.assertTrue(isinstance(future.exception(timeout=10), LDAPNoSuchObjectResult))
+
+    def test_pending_futures_fail_when_closed(self):
+        self.listen(hold=b'cn=held')
+        futures = [self.connection.search('cn=held', '(objectClass=*)') for _ in range(10)]
+        answered = self.connection.search('cn=answered', '(objectClass=*)')
+        self.assertEqual(answered.result(timeout=10)[0][0]['dn'], 'cn=answered')
+        self.connection.search('cn=close', '(objectClass=*)')  # the server closes the connection
+        done, not_done = wait(futures, timeout=10)
+        self.assertEqual(len(not_done), 0)
+        for future in done:
+            self.assertTrue(isinstance(future.exception(), LDAPSessionTerminatedByServer))
+
+    def test_pending_futures_fail_on_malformed_message(self):
+        self.listen(hold=b'cn=held')
+        futures = [self.connection.search('cn=held', '(objectClass=*)') for _ in range(10)]
+        futures.append(self.connection.search('cn=malformed', '(objectClass=*)'))
+        done, not_done = wait(futures, timeout=10)
+        self.assertEqual(len(not_done), 0)
+        for future in done:
+            self.assertTrue(isinstance(future.exception(), LDAPSessionTerminatedByServer))
+        self.assertFalse(self.connection.listening)
+        self.assertTrue(self.connection.last_error.startswith('error receiving data'))
+
+    def test_only_with_async_threaded(self):
+        self.assertRaises(LDAPUnknownStrategyError, Connection, Server('localhost'), client_strategy=STRATEGY_SYNC, return_futures=True)
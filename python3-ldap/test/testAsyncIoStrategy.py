@@ -0,0 +1,161 @@
+"""
+"""
+
+# Created on 2014.09.20
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import asyncio
+
+from ldap3 import Server, Connection, STRATEGY_ASYNCIO, GET_DSA_INFO
+from ldap3.core.exceptions import LDAPNoSuchObjectResult, LDAPSessionTerminatedByServer, LDAPUnknownStrategyError, LDAPSocketReceiveError
+from ldap3.strategy.messageFramer import MessageFramer
+from test.standInServer import reply, replies_to
+
+
+async def stand_in_server(reader, writer):
+    """
+    Local stand-in LDAP server, the requests received together are answered in reverse order
+    """
+    framer = MessageFramer()
+    while True:
+        data = await reader.read(65536)
+        if not data:
+            break
+        framer.feed(data)
+        replies = []
+        for request in framer.messages():
+            response = replies_to(request)
+            if response is None:  # unbind
+                writer.close()
+                return
+            replies.insert(0, response)
+        writer.write(b''.join(replies))
+        await writer.drain()
+        if replies and replies[0][:5] == reply(0, b'')[:5]:  # Notice of Disconnection sent
+            writer.close()
+            return
+    writer.close()
+
+
+def run_with_stand_in_server(test, **connection_parameters):
+    async def run():
+        server = await asyncio.start_server(stand_in_server, '127.0.0.1', 0)
+        try:
+            port = server.sockets[0].getsockname()[1]
+            connection = Connection(Server('127.0.0.1', port=port, get_info=connection_parameters.pop('get_info', None)), user='cn=admin', password='password', client_strategy=STRATEGY_ASYNCIO, **connection_parameters)
+            return await asyncio.wait_for(test(connection), 60)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(run())
+    finally:
+        loop.close()
+
+
+class Test(unittest.TestCase):
+    def test_bind_search_unbind(self):
+        async def test(connection):
+            await connection.open()
+            self.assertTrue(await connection.bind())
+            self.assertTrue(connection.bound)
+            self.assertTrue(await connection.search('cn=test,o=test', '(objectClass=*)', attributes=['cn']))
+            self.assertEqual(connection.response[0]['dn'], 'cn=test,o=test')
+            self.assertEqual(connection.response[0]['attributes']['cn'], ['cn=test,o=test'])
+            self.assertEqual(connection.result['description'], 'success')
+            self.assertTrue(await connection.compare('cn=test,o=test', 'cn', 'test'))
+            self.assertTrue(connection.unbind())
+            self.assertTrue(connection.closed)
+
+        run_with_stand_in_server(test)
+
+    def test_concurrent_operations_are_demultiplexed(self):
+        async def search(connection, dn):
+            await connection.search(dn, '(objectClass=*)', attributes=['cn'])
+            return connection.response[0]['dn']  # response of this search, read before returning to the event loop
+
+        async def test(connection):
+            await connection.open()
+            await connection.bind()
+            dns = ['cn=user%d,o=test' % number for number in range(2000)]
+            self.assertEqual(await asyncio.gather(*[search(connection, dn) for dn in dns]), dns)
+            self.assertEqual(await asyncio.gather(*[connection.modify(dn, {'sn': (2, ['x'])}) for dn in dns[:100]]), [True] * 100)
+            self.assertEqual(connection.strategy._outstanding, dict())
+            connection.unbind()
+
+        run_with_stand_in_server(test, fast_decoder=True)
+
+    def test_failed_operations(self):
+        async def test(connection):
+            await connection.open()
+            self.assertFalse(await connection.search('cn=missing', '(objectClass=*)'))
+            self.assertEqual(connection.result['result'], 32)
+            connection.raise_exceptions = True
+            with self.assertRaises(LDAPNoSuchObjectResult):
+                await connection.search('cn=missing', '(objectClass=*)')
+            connection.user = 'cn=wrong'
+            connection.raise_exceptions = False
+            self.assertFalse(await connection.bind())
+            self.assertFalse(connection.bound)
+            connection.unbind()
+
+        run_with_stand_in_server(test)
+
+    def test_notice_of_disconnection(self):
+        async def test(connection):
+            await connection.open()
+            pending = asyncio.ensure_future(connection.search('cn=test', '(objectClass=*)'))
+            with self.assertRaises(LDAPSessionTerminatedByServer):
+                await connection.search('cn=disconnect', '(objectClass=*)')
+            self.assertTrue(connection.closed)
+            with self.assertRaises(LDAPSessionTerminatedByServer):  # outstanding operations fail too
+                await pending
+
+        run_with_stand_in_server(test)
+
+    def test_malformed_message(self):
+        async def test(connection):
+            await connection.open()
+            with self.assertRaises(LDAPSocketReceiveError):
+                await asyncio.wait_for(connection.search('cn=malformed', '(objectClass=*)'), 10)
+            self.assertTrue(connection.closed)
+            self.assertTrue(connection.last_error.startswith('error receiving data'))
+
+        run_with_stand_in_server(test)
+
+    def test_server_info_read_on_open(self):
+        async def test(connection):
+            await connection.open()
+            self.assertEqual(connection.server.info.vendor_name, ['stand-in'])
+            self.assertTrue(await connection.bind())
+            self.assertEqual(connection.result['type'], 'bindResponse')  # result of the bind, not of the info refresh
+            connection.unbind()
+
+        run_with_stand_in_server(test, get_info=GET_DSA_INFO)
+
+    def test_unavailable_options(self):
+        for parameters in [{'lazy': True}, {'auto_bind': True}]:
+            with self.assertRaises(LDAPUnknownStrategyError):
+                Connection(Server('127.0.0.1'), client_strategy=STRATEGY_ASYNCIO, **parameters)
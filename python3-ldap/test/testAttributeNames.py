@@ -0,0 +1,76 @@
+"""
+"""
+
+# Created on 2014.09.29
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from binascii import unhexlify
+
+from ldap3 import Server, Connection
+from ldap3.utils.attributeNames import AttributeNameTable, attribute_names
+from ldap3.utils.caseInsensitiveDictionary import CaseInsensitiveDict
+
+# searchResEntry with cn, sn and mail attributes
+entry = '30380201026433040b636e3d612c6f3d746573743024300b0402636e310504034a6f65300b0402736e310504034a6f65300804046d61696c3100'
+
+
+def decode(fast_decoder):
+    connection = Connection(Server('localhost'), fast_decoder=fast_decoder)
+    return connection.strategy.decode_message(unhexlify(entry))[1]
+
+
+class Test(unittest.TestCase):
+    def test_canonical_name_is_shared(self):
+        table = AttributeNameTable()
+        name = table.canonical(''.join(['object', 'Class']))
+        self.assertTrue(table.canonical(''.join(['object', 'Class'])) is name)
+        self.assertTrue(table.canonical(b'objectClass') is name)
+        self.assertEqual(table.lower(name), 'objectclass')
+        self.assertEqual(table.lower('NotInTable'), 'notintable')
+        self.assertEqual(len(table), 1)
+
+    def test_table_is_bounded(self):
+        table = AttributeNameTable(2)
+        for name in ('a', 'b', 'c'):
+            self.assertEqual(table.canonical(name), name)
+        self.assertEqual(len(table), 2)
+        self.assertFalse('c' in table.lower_names)
+        table.clear()
+        self.assertEqual(len(table), 0)
+
+    def test_decoded_entries_share_attribute_names(self):
+        for fast_decoder in (True, False):
+            first = decode(fast_decoder)
+            second = decode(fast_decoder)
+            for name in ('attributes', 'raw_attributes'):
+                for first_name, second_name in zip(first[name], second[name]):
+                    self.assertTrue(first_name is second_name)
+                    self.assertTrue(first_name is attribute_names.canonical(first_name))
+            self.assertEqual(first['attributes']['CN'], ['Joe'])
+            self.assertEqual(first['attributes']['mail'], None)
+
+    def test_case_insensitive_dict_with_canonical_names(self):
+        cid = CaseInsensitiveDict()
+        cid[attribute_names.canonical('givenName')] = 'Joe'
+        self.assertEqual(cid['GIVENNAME'], 'Joe')
+        self.assertEqual(list(cid.keys()), ['givenName'])
@@ -0,0 +1,109 @@
+"""
+"""
+
+# Created on 2014.09.02
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from binascii import unhexlify
+
+from ldap3 import Server, Connection
+from ldap3.protocol.rfc4512 import SchemaInfo
+
+# LDAPMessages captured from the wire, the searchResEntry has utf-8 values, a binary value, an empty attribute, an empty value and a value with long form length
+captures = {
+    'entry': '308202150201026482020e0421636e3d4ac3b67267204dc3bc6c6c65722c6f753d70656f706c652c6f3d74657374308201e7302b040b6f626a656374436c617373311c0403746f70040670'
+             '6572736f6e040d696e65744f7267506572736f6e30150402636e310f040d4ac3b67267204dc3bc6c6c6572300f0402736e310904074dc3bc6c6c65723020040a6f626a65637447554944'
+             '31120410000102030405060708090a0b0c0d0e0f300f040b6465736372697074696f6e3100301a04046d61696c31120400040e6a6d406578616d706c652e636f6d3082013f04096a7065'
+             '6750686f746f318201300482012c' + '00' * 300,
+    'entry_big_message_id': '30230203011170641c040c7569643d612c6f3d74657374300c300a04037569643103040161',
+    'done': '300c02010265070a010004000400',
+    'done_error': '3020020105651b0a012004066f3d74657374040e6e6f2073756368206f626a656374',
+    'done_referral': '305502010765500a010a04000400a347041f6c6461703a2f2f6f746865722e6578616d706c652e636f6d2f6f3d7465737404246c646170733a2f2f74686972642e6578616d706c'
+                     '652e636f6d3a3633362f6f3d74657374',
+    'done_paged': '305802010365070a010004000400a04a30250416312e322e3834302e3131333535362e312e342e333139040b30090201000404010203ff30210418312e332e362e312e342e312e'
+                  '343230332e312e392e312e3101010104023000',
+    'reference': '302e020104732904276c6461703a2f2f7265662e6578616d706c652e636f6d2f6f753d782c6f3d746573743f3f737562',
+    'bind_response': '300c02010161070a010004000400'  # not handled by the fast decoder
+}
+
+schema_attributes = {'attributeTypes': ["( 2.5.4.0 NAME 'objectClass' EQUALITY objectIdentifierMatch SYNTAX 1.3.6.1.4.1.1466.115.121.1.38 )",
+                                        "( 2.5.4.3 NAME ( 'cn' 'commonName' ) SUP name )",
+                                        "( 2.5.4.4 NAME ( 'sn' 'surname' ) SUP name )",
+                                        "( 2.5.4.41 NAME 'name' EQUALITY caseIgnoreMatch SUBSTR caseIgnoreSubstringsMatch SYNTAX 1.3.6.1.4.1.1466.115.121.1.15{32768} )",
+                                        "( 2.5.4.13 NAME 'description' EQUALITY caseIgnoreMatch SYNTAX 1.3.6.1.4.1.1466.115.121.1.15{1024} )",
+                                        "( 0.9.2342.19200300.100.1.3 NAME ( 'mail' 'rfc822Mailbox' ) EQUALITY caseIgnoreIA5Match SYNTAX 1.3.6.1.4.1.1466.115.121.1.26{256} )",
+                                        "( 0.9.2342.19200300.100.1.60 NAME 'jpegPhoto' SYNTAX 1.3.6.1.4.1.1466.115.121.1.28 )",
+                                        "( 1.2.840.113556.1.4.2 NAME 'objectGUID' SYNTAX '1.3.6.1.4.1.1466.115.121.1.40' SINGLE-VALUE )",
+                                        "( 0.9.2342.19200300.100.1.1 NAME ( 'uid' 'userid' ) EQUALITY caseIgnoreMatch SYNTAX 1.3.6.1.4.1.1466.115.121.1.15{256} )"]}
+
+
+def decode(capture, fast_decoder, check_names=False, lazy_attributes=False):
+    connection = Connection(Server('localhost'), fast_decoder=fast_decoder, check_names=check_names, lazy_attributes=lazy_attributes)
+    if check_names:
+        connection.server._schema_info = SchemaInfo('cn=schema', dict(schema_attributes))
+    return connection.strategy.decode_message(unhexlify(capture))
+
+
+class Test(unittest.TestCase):
+    def test_fast_decoder_matches_pyasn1(self):
+        for name, capture in captures.items():
+            self.assertEqual(decode(capture, True), decode(capture, False), name)
+
+    def test_fast_decoder_matches_pyasn1_with_schema(self):
+        for name, capture in captures.items():
+            self.assertEqual(decode(capture, True, check_names=True), decode(capture, False, check_names=True), name)
+
+    def test_lazy_attributes_match_eager_decoding(self):
+        for fast_decoder in (True, False):
+            for check_names in (True, False):
+                _, eager = decode(captures['entry'], fast_decoder, check_names)
+                _, lazy = decode(captures['entry'], fast_decoder, check_names, lazy_attributes=True)
+                self.assertEqual(lazy['dn'], eager['dn'])
+                for name in ('attributes', 'raw_attributes'):
+                    self.assertEqual(list(lazy[name]), list(eager[name]))
+                    for attribute_name in eager[name]:
+                        self.assertEqual(lazy[name][attribute_name.upper()], eager[name][attribute_name])
+
+    def test_fast_decoder_search_result_entry(self):
+        message_id, response = decode(captures['entry'], True)
+        self.assertEqual(message_id, 2)
+        self.assertEqual(response['type'], 'searchResEntry')
+        self.assertEqual(response['attributes']['CN'], ['J\xf6rg M\xfcller'] if str != bytes else ['J\xc3\xb6rg M\xc3\xbcller'])
+        self.assertEqual(response['raw_attributes']['objectGUID'], [unhexlify('000102030405060708090a0b0c0d0e0f')])
+        self.assertEqual(response['raw_attributes']['jpegPhoto'], [b'\x00' * 300])
+        self.assertEqual(response['attributes']['mail'], ['jm@example.com'])
+        self.assertEqual(response['attributes']['description'], None)
+
+    def test_fast_decoder_message_id(self):
+        message_id, _ = decode(captures['entry_big_message_id'], True)
+        self.assertEqual(message_id, 70000)
+
+    def test_fast_decoder_paged_search_control(self):
+        _, response = decode(captures['done_paged'], True)
+        self.assertEqual(response['controls']['1.2.840.113556.1.4.319']['value'], {'size': 0, 'cookie': b'\x01\x02\x03\xff'})
+        self.assertTrue(response['controls']['1.3.6.1.4.1.4203.1.9.1.1']['criticality'])
+
+    def test_fast_decoder_falls_back_to_pyasn1(self):
+        message_id, response = decode(captures['bind_response'], True)
+        self.assertEqual(message_id, 1)
+        self.assertEqual(response['type'], 'bindResponse')
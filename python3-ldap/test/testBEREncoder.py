@@ -0,0 +1,145 @@
+"""
+"""
+
+# Created on 2014.09.05
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from pyasn1.codec.ber import encoder
+
+from ldap3 import SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_SCOPE_BASE_OBJECT, SEARCH_DEREFERENCE_ALWAYS, SEARCH_NEVER_DEREFERENCE_ALIASES, MODIFY_ADD, MODIFY_REPLACE, MODIFY_DELETE, MODIFY_INCREMENT
+from ldap3.core.exceptions import LDAPInvalidFilterError
+from ldap3.operation.search import search_operation, fast_search_operation, prepare_search_operation
+from ldap3.operation.modify import modify_operation, fast_modify_operation
+from ldap3.operation.add import add_operation, fast_add_operation
+from ldap3.protocol.berEncoder import encode_ldap_message
+from ldap3.protocol.rfc4511 import LDAPMessage, MessageID, ProtocolOp
+from ldap3.protocol.convert import build_controls_list
+from ldap3.strategy.baseStrategy import BaseStrategy
+from ldap3.utils.conv import escape_filter_chars
+
+filters = ['(cn=test)',
+           '(cn=J\xf6rg M\xfcller)',
+           '(cn=\\2a\\28\\29\\5c)',
+           '(objectClass=*)',
+           '(cn=a*)',
+           '(cn=*a)',
+           '(cn=a*b*c*d)',
+           '(cn=*b*c*)',
+           '(uidNumber>=1000)',
+           '(uidNumber<=0)',
+           '(cn~=test)',
+           '(cn:=test)',
+           '(cn:dn:=test)',
+           '(cn:caseExactMatch:=Test)',
+           '(cn:dn:2.5.13.5:=Test)',
+           '(:caseExactMatch:=Test)',
+           '(:dn:2.5.13.5:=Test)',
+           '(!(cn=test))',
+           '(&(objectClass=person)(cn=test))',
+           '(|(cn=a)(cn=b)(cn=c))',
+           '(&(|(cn=a)(sn=b))(!(mail=*))(description=' + 'x' * 300 + '))']
+
+
+def pyasn1_message(message_id, message_type, request, controls=None):
+    ldap_message = LDAPMessage()
+    ldap_message['messageID'] = MessageID(message_id)
+    ldap_message['protocolOp'] = ProtocolOp().setComponentByName(message_type, request)
+    message_controls = build_controls_list(controls)
+    if message_controls is not None:
+        ldap_message['controls'] = message_controls
+    return ldap_message
+
+
+class Test(unittest.TestCase):
+    def test_search_request(self):
+        for search_filter in filters:
+            for attributes in (None, ['cn', 'sn'], ['*', '+']):
+                parameters = ('o=test', search_filter, SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, attributes, 0, 0, False)
+                self.assertEqual(bytes(fast_search_operation(*parameters).encoded), encoder.encode(search_operation(*parameters)), search_filter)
+
+    def test_search_request_limits(self):
+        for size_limit in (1, 127, 128, 255, 256, 65535, 2147483647):
+            parameters = ('cn=J\xf6rg,o=test', '(cn=*)', SEARCH_SCOPE_BASE_OBJECT, SEARCH_NEVER_DEREFERENCE_ALIASES, ['cn'], size_limit, size_limit, True)
+            self.assertEqual(bytes(fast_search_operation(*parameters).encoded), encoder.encode(search_operation(*parameters)), size_limit)
+
+    def test_modify_request(self):
+        changes = {'cn': (MODIFY_REPLACE, ['J\xf6rg', b'\x00\xff']),
+                   'sn': (MODIFY_ADD, 'single'),
+                   'description': (MODIFY_DELETE, []),
+                   'uidNumber': (MODIFY_INCREMENT, [1]),
+                   'jpegPhoto': (MODIFY_REPLACE, [b'\xff' * 70000])}
+        self.assertEqual(bytes(fast_modify_operation('cn=test,o=test', changes).encoded), encoder.encode(modify_operation('cn=test,o=test', changes)))
+
+    def test_add_request(self):
+        attributes = {'objectClass': ['top', 'person', 'inetOrgPerson'],
+                      'cn': 'J\xf6rg',
+                      'userPassword': b'\x00\x01\x02',
+                      'uidNumber': 1000}
+        self.assertEqual(bytes(fast_add_operation('cn=test,o=test', attributes).encoded), encoder.encode(add_operation('cn=test,o=test', attributes)))
+
+    def test_ldap_message_envelope(self):
+        controls = [('1.2.840.113556.1.4.319', False, b'\x30\x05\x02\x01\x0a\x04\x00'), ('1.2.840.113556.1.4.417', True, b'')]
+        for message_id in (0, 1, 127, 128, 255, 256, 70000, 2147483647):
+            for message_controls in (None, controls):
+                parameters = ('o=test', '(cn=test)', SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, ['cn'], 0, 0, False)
+                fast_message = encode_ldap_message(message_id, fast_search_operation(*parameters).encoded, message_controls)
+                self.assertEqual(bytes(fast_message), encoder.encode(pyasn1_message(message_id, 'searchRequest', search_operation(*parameters), message_controls)))
+
+    def test_request_dict(self):
+        changes = {'cn': (MODIFY_REPLACE, ['J\xf6rg', 'Joe'])}
+        request = fast_modify_operation('cn=test,o=test', changes).request_dict
+        request['type'] = 'modifyRequest'
+        self.assertEqual(request, BaseStrategy.decode_request(pyasn1_message(1, 'modifyRequest', modify_operation('cn=test,o=test', changes))))
+        attributes = {'objectClass': ['top', 'person'], 'cn': 'J\xf6rg'}
+        request = fast_add_operation('cn=test,o=test', attributes).request_dict
+        request['type'] = 'addRequest'
+        self.assertEqual(request, BaseStrategy.decode_request(pyasn1_message(1, 'addRequest', add_operation('cn=test,o=test', attributes))))
+
+    def test_prepared_search_request(self):
+        filter_template = '(&(objectClass=person)(|(uid=%s)(cn=*%s*)(cn:dn:=%s)))'
+        template = prepare_search_operation('o=test', filter_template, SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, ['cn'], 0, 0, False)
+        for parameters in [('a', 'b', 'c'), ('J\xf6rg', '*(x)\\', ''), ('x' * 200, 'y' * 70000, b'\x00\xff')]:
+            search_filter = filter_template % tuple(escape_filter_chars(parameter) for parameter in parameters)
+            expected = fast_search_operation('o=test', search_filter, SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, ['cn'], 0, 0, False)
+            request = template.request(parameters)
+            self.assertEqual(bytes(request.encoded), bytes(expected.encoded))
+            self.assertEqual(request.request_dict, expected.request_dict)
+
+    def test_prepared_search_empty_substrings(self):
+        for filter_template, parameters, search_filter in [('(cn=%s*)', ('', ), '(cn=*)'),
+                                                           ('(cn=a*%s*b)', ('', ), '(cn=a*b)'),
+                                                           ('(cn=%s*%s)', ('', ''), '(cn=*)'),
+                                                           ('(&(cn=%s*)(sn=*%s))', ('x', ''), '(&(cn=x*)(sn=*))')]:
+            template = prepare_search_operation('o=test', filter_template, SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, ['cn'], 0, 0, False)
+            expected = fast_search_operation('o=test', search_filter, SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, ['cn'], 0, 0, False)
+            self.assertEqual(bytes(template.request(parameters).encoded), bytes(expected.encoded), filter_template)
+
+    def test_prepared_search_request_without_parameters(self):
+        template = prepare_search_operation('o=test', '(cn=100%)', SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, None, 0, 0, False)
+        self.assertEqual(bytes(template.request(()).encoded), encoder.encode(search_operation('o=test', '(cn=100%)', SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, None, 0, 0, False)))
+
+    def test_prepared_search_invalid_parameters(self):
+        self.assertRaises(LDAPInvalidFilterError, prepare_search_operation, 'o=test', '(%s=test)', SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, None, 0, 0, False)
+        template = prepare_search_operation('o=test', '(cn=%s)', SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, None, 0, 0, False)
+        self.assertRaises(LDAPInvalidFilterError, template.request, ('a', 'b'))
@@ -24,6 +24,17 @@ import unittest
 from ldap3.utils.caseInsensitiveDictionary import CaseInsensitiveDict
 
 
+class CountingKey(str):
+    """
+    String key that counts how many times it's lowered
+    """
+    lowered = 0
+
+    def lower(self):
+        CountingKey.lowered += 1
+        return str.lower(self)
+
+
 class Test(unittest.TestCase):
     def test_create_empty_case_insensitive_dict(self):
         cid = CaseInsensitiveDict()
@@ -288,4 +299,26 @@ class Test(unittest.TestCase):
         self.assertFalse('one' in key_list)
         self.assertFalse('TWO' in key_list)
         self.assertFalse('TWO' in key_list)
-        self.assertFalse(4 in key_list)
\ No newline at end of file
+        self.assertFalse(4 in key_list)
+
+    def test_delete_and_add_key_with_different_case(self):
+        cid = CaseInsensitiveDict()
+        cid['oNe'] = 1
+        del cid['ONE']
+        cid['One'] = 2
+        self.assertEqual(list(cid.keys()), ['One'])
+        self.assertEqual(cid['one'], 2)
+        self.assertFalse('oNe' in cid._store)
+
+    def test_lookup_uses_keys_index(self):
+        # a linear scan of the stored keys would lower them on each lookup
+        CountingKey.lowered = 0
+        names = [CountingKey('attributeName' + str(i)) for i in range(1000)]
+        cid = CaseInsensitiveDict()
+        for name in names:
+            cid[name] = name
+        self.assertEqual(CountingKey.lowered, len(names))  # each stored key is lowered once when added
+        for name in names:
+            self.assertEqual(cid[str(name).upper()], name)
+            self.assertTrue(str(name).lower() in cid)
+        self.assertEqual(CountingKey.lowered, len(names))
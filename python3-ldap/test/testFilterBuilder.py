@@ -0,0 +1,84 @@
+"""
+"""
+
+# Created on 2014.09.15
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+
+import unittest
+
+from pyasn1.codec.ber import encoder
+
+from ldap3 import F, SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, LDAPInvalidFilterError, LDAPAttributeError
+from ldap3.operation.search import encode_filter, parse_filter, search_operation, fast_search_operation
+from ldap3.protocol.rfc4512 import SchemaInfo
+
+built_filters = [(F.eq('cn', 'test'), '(cn=test)'),
+                 (F.eq('cn', 'J\xf6rg M\xfcller'), '(cn=J\xf6rg M\xfcller)'),
+                 (F.eq('cn', '*()\\'), '(cn=\\2a\\28\\29\\5c)'),
+                 (F.eq('objectGUID', b'\x00\xff\x10'), '(objectGUID=\\00\\ff\\10)'),
+                 (F.present('objectClass'), '(objectClass=*)'),
+                 (F.substring('cn', initial='a'), '(cn=a*)'),
+                 (F.substring('cn', final='a'), '(cn=*a)'),
+                 (F.substring('cn', initial='a', any_=['b', 'c'], final='d'), '(cn=a*b*c*d)'),
+                 (F.substring('cn', any_=['b', 'c']), '(cn=*b*c*)'),
+                 (F.ge('uidNumber', 1000), '(uidNumber>=1000)'),
+                 (F.le('uidNumber', 0), '(uidNumber<=0)'),
+                 (F.approx('cn', 'test'), '(cn~=test)'),
+                 (F.extensible('test', 'cn'), '(cn:=test)'),
+                 (F.extensible('test', 'cn', dn_attributes=True), '(cn:dn:=test)'),
+                 (F.extensible('Test', 'cn', 'caseExactMatch'), '(cn:caseExactMatch:=Test)'),
+                 (F.extensible('Test', matching_rule='2.5.13.5', dn_attributes=True), '(:dn:2.5.13.5:=Test)'),
+                 (F.not_(F.eq('cn', 'test')), '(!(cn=test))'),
+                 (F.and_(F.eq('objectClass', 'person'), F.eq('cn', 'test')), '(&(objectClass=person)(cn=test))'),
+                 (F.or_([F.eq('cn', 'a'), F.eq('cn', 'b')]), '(|(cn=a)(cn=b))'),
+                 (F.in_('cn', ['a', 'b', 'c']), '(|(cn=a)(cn=b)(cn=c))'),
+                 (F.in_('cn', ['a']), '(cn=a)'),
+                 (F.and_(F.parse('(|(cn=a)(sn=b))'), F.not_(F.present('mail'))), '(&(|(cn=a)(sn=b))(!(mail=*)))')]
+
+
+class Test(unittest.TestCase):
+    def test_built_filters_encoding(self):
+        for filter_node, search_filter in built_filters:
+            self.assertEqual(bytes(encode_filter(filter_node)), bytes(encode_filter(parse_filter(search_filter, None).elements[0])), search_filter)
+
+    def test_built_filters_string(self):
+        for filter_node, search_filter in built_filters:
+            self.assertEqual(str(filter_node), search_filter)
+
+    def test_search_request_with_built_filter(self):
+        filter_node = F.and_(F.eq('objectClass', 'person'), F.in_('uid', ['user%d' % index for index in range(5000)]))
+        parameters = ('o=test', filter_node, SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, ['cn'], 0, 0, False)
+        request = fast_search_operation(*parameters)
+        self.assertEqual(bytes(request.encoded), encoder.encode(search_operation(*parameters)))
+        self.assertEqual(request.request_dict['filter'], str(filter_node))
+
+    def test_invalid_built_filters(self):
+        self.assertRaises(LDAPInvalidFilterError, F.and_)
+        self.assertRaises(LDAPInvalidFilterError, F.in_, 'cn', [])
+        self.assertRaises(LDAPInvalidFilterError, F.substring, 'cn')
+        self.assertRaises(LDAPInvalidFilterError, F.and_, '(cn=a)')
+
+    def test_built_filter_checked_with_schema(self):
+        schema = SchemaInfo('cn=schema', {'attributeTypes': ["( 2.5.4.3 NAME 'cn' SYNTAX 1.3.6.1.4.1.1466.115.121.1.15 )"]})
+        fast_search_operation('o=test', F.eq('CN', 'a'), SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, None, 0, 0, False, schema)
+        self.assertRaises(LDAPAttributeError, fast_search_operation, 'o=test', F.eq('sn', 'a'), SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, None, 0, 0, False, schema)
@@ -0,0 +1,78 @@
+"""
+"""
+
+# Created on 2014.09.14
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+
+import unittest
+
+from pyasn1.codec.ber import encoder
+
+from ldap3 import SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS
+from ldap3.core.usage import ConnectionUsage
+from ldap3.operation.search import FilterCache, filter_cache, build_filter, build_encoded_filter, compile_filter, parse_filter, search_operation, fast_search_operation
+from ldap3.protocol.rfc4512 import SchemaInfo
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        filter_cache.clear()
+
+    def test_cache_hits_and_misses(self):
+        usage = ConnectionUsage()
+        compiled_filter = build_filter('(&(cn=test)(sn=a*))', None, usage)
+        self.assertTrue(build_filter('(&(cn=test)(sn=a*))', None, usage) is compiled_filter)
+        self.assertEqual(encoder.encode(compiled_filter), encoder.encode(compile_filter(parse_filter('(&(cn=test)(sn=a*))', None).elements[0])))
+        build_encoded_filter('(&(cn=test)(sn=a*))', None, usage)  # encoded filters are cached separately
+        self.assertEqual(usage.filter_cache_hits, 1)
+        self.assertEqual(usage.filter_cache_misses, 2)
+
+    def test_cache_key_includes_schema(self):
+        usage = ConnectionUsage()
+        schema = SchemaInfo('cn=schema', {'attributeTypes': ["( 2.5.4.3 NAME 'cn' SYNTAX 1.3.6.1.4.1.1466.115.121.1.15 )"]})
+        build_filter('(cn=test)', None, usage)
+        build_filter('(cn=test)', schema, usage)
+        build_filter('(cn=test)', schema, usage)
+        self.assertEqual(usage.filter_cache_hits, 1)
+        self.assertEqual(usage.filter_cache_misses, 2)
+
+    def test_least_recently_used_filter_is_evicted(self):
+        cache = FilterCache(2)
+        cache.add('a', 1)
+        cache.add('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.add('c', 3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_disabled_cache(self):
+        cache = FilterCache(0)
+        cache.add('a', 1)
+        self.assertEqual(cache.get('a'), None)
+
+    def test_cached_search_requests(self):
+        parameters = ('o=test', '(|(cn=a)(cn=b))', SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, ['cn'], 0, 0, False)
+        for _ in range(2):
+            self.assertEqual(encoder.encode(search_operation(*parameters)), bytes(fast_search_operation(*parameters).encoded))
@@ -0,0 +1,115 @@
+"""
+"""
+
+# Created on 2014.09.17
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+
+import unittest
+
+from ldap3 import F, LDAPInvalidFilterError
+from ldap3.protocol.rfc4512 import SchemaInfo
+from ldap3.utils.filterEvaluator import compile_matcher, match_entry
+
+schema_attributes = {'attributeTypes': ["( 2.5.4.0 NAME 'objectClass' EQUALITY objectIdentifierMatch SYNTAX 1.3.6.1.4.1.1466.115.121.1.38 )",
+                                        "( 2.5.4.41 NAME 'name' EQUALITY caseIgnoreMatch SUBSTR caseIgnoreSubstringsMatch SYNTAX 1.3.6.1.4.1.1466.115.121.1.15{32768} )",
+                                        "( 2.5.4.3 NAME ( 'cn' 'commonName' ) SUP name )",
+                                        "( 1.3.6.1.1.1.1.0 NAME 'uidNumber' EQUALITY integerMatch ORDERING integerOrderingMatch SYNTAX 1.3.6.1.4.1.1466.115.121.1.27 SINGLE-VALUE )",
+                                        "( 0.9.2342.19200300.100.1.1 NAME ( 'uid' 'userid' ) EQUALITY caseExactMatch SUBSTR caseExactSubstringsMatch SYNTAX 1.3.6.1.4.1.1466.115.121.1.15{256} )",
+                                        "( 2.5.4.20 NAME 'telephoneNumber' EQUALITY telephoneNumberMatch SUBSTR telephoneNumberSubstringsMatch SYNTAX 1.3.6.1.4.1.1466.115.121.1.50{32} )",
+                                        "( 2.5.4.31 NAME 'member' SUP distinguishedName )",
+                                        "( 2.5.4.49 NAME 'distinguishedName' EQUALITY distinguishedNameMatch SYNTAX 1.3.6.1.4.1.1466.115.121.1.12 )"]}
+
+entry = {'dn': 'cn=J\xf6rg M\xfcller,o=test',
+         'raw_attributes': {'objectClass': [b'top', b'person', b'inetOrgPerson'],
+                            'cn': [b'J\xc3\xb6rg  M\xc3\xbcller'],
+                            'uid': [b'JMueller'],
+                            'uidNumber': [b'1000'],
+                            'telephoneNumber': [b'+39 02-1234-567'],
+                            'member': [b'CN=Admin, O=Test'],
+                            'description': []}}
+
+
+def schema():
+    return SchemaInfo('cn=schema', dict(schema_attributes))
+
+
+class Test(unittest.TestCase):
+    def test_match_without_schema(self):
+        for search_filter, expected in [('(cn=j\xf6rg m\xfcller)', True),
+                                        ('(cn=other)', False),
+                                        ('(objectClass=*)', True),
+                                        ('(description=*)', False),
+                                        ('(mail=*)', False),
+                                        ('(cn=J*)', True),
+                                        ('(cn=*m\xfcller)', True),
+                                        ('(cn=j*rg*ll*)', True),
+                                        ('(cn=j*ll*rg)', False),
+                                        ('(uid=jm*ller)', True),
+                                        ('(uid=jm*muel*)', False),
+                                        ('(cn~=J\xf6rg M\xfcller)', True),
+                                        ('(&(objectClass=person)(uid=jmueller))', True),
+                                        ('(&(objectClass=person)(uid=other))', False),
+                                        ('(|(uid=other)(objectClass=inetOrgPerson))', True),
+                                        ('(!(objectClass=person))', False),
+                                        ('(uid:=JMUELLER)', True),
+                                        ('(uid:caseExactMatch:=jmueller)', False)]:
+            self.assertEqual(match_entry(entry, search_filter), expected, search_filter)
+
+    def test_match_with_schema(self):
+        schema_info = schema()
+        for search_filter, expected in [('(commonName=j\xf6rg m\xfcller)', True),
+                                        ('(uid=jmueller)', False),
+                                        ('(userid=JMueller)', True),
+                                        ('(uid=JM*)', True),
+                                        ('(uid=jm*)', False),
+                                        ('(uidNumber>=999)', True),
+                                        ('(uidNumber>=1001)', False),
+                                        ('(uidNumber<=1000)', True),
+                                        ('(uidNumber<=99)', False),
+                                        ('(uidNumber=01000)', True),
+                                        ('(uidNumber=abc)', False),
+                                        ('(telephoneNumber=+39021234567)', True),
+                                        ('(telephoneNumber=*1234*)', True),
+                                        ('(member=cn=admin,o=test)', True),
+                                        ('(objectClass=PERSON)', True),
+                                        ('(uid:caseIgnoreMatch:=jmueller)', True)]:
+            self.assertEqual(match_entry(entry, search_filter, schema_info), expected, search_filter)
+
+    def test_ordering_without_schema_is_string_based(self):
+        self.assertFalse(match_entry(entry, '(uidNumber>=999)'))
+        self.assertTrue(match_entry(entry, '(uidNumber>=0999)'))
+
+    def test_filter_node(self):
+        matcher = compile_matcher(F.and_(F.eq('objectClass', 'person'), F.in_('uid', ['a', 'jmueller', 'b'])))
+        self.assertTrue(matcher(entry))
+        self.assertFalse(matcher({'raw_attributes': {'objectClass': [b'person'], 'uid': [b'c']}}))
+
+    def test_compiled_matcher_is_reusable(self):
+        matcher = compile_matcher('(&(objectClass=person)(cn=*m\xfcller))', schema())
+        entries = [entry, {'raw_attributes': {'objectClass': [b'person'], 'commonName': [b'Hans M\xc3\xbcller']}}, {'raw_attributes': {'objectClass': [b'person'], 'cn': [b'Hans']}}]
+        self.assertEqual([matcher(current_entry) for current_entry in entries], [True, True, False])
+
+    def test_unsupported_filters(self):
+        self.assertRaises(LDAPInvalidFilterError, compile_matcher, '(cn:dn:=test)')
+        self.assertRaises(LDAPInvalidFilterError, compile_matcher, '(:caseExactMatch:=test)')
+        self.assertRaises(LDAPInvalidFilterError, compile_matcher, '(cn:1.2.3.4:=test)')
@@ -0,0 +1,101 @@
+"""
+"""
+
+# Created on 2014.09.18
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+
+import unittest
+
+from pyasn1.codec.ber import encoder
+
+from ldap3 import F, SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS
+from ldap3.core.usage import ConnectionUsage
+from ldap3.operation.search import filter_cache, build_encoded_filter, encode_filter, parse_filter, search_operation, fast_search_operation, prepare_search_operation
+from ldap3.utils.filterOptimizer import FilterOptimizer, optimize_filter, canonical_filter
+
+optimized_filters = [('(cn=test)', '(cn=test)'),
+                     ('(&(cn=a))', '(cn=a)'),
+                     ('(|(&(|(cn=a))))', '(cn=a)'),
+                     ('(&(&(cn=a)(sn=b))(&(uid=c)))', '(&(cn=a)(sn=b)(uid=c))'),
+                     ('(|(cn=a)(|(cn=b)(|(cn=c))))', '(|(cn=a)(cn=b)(cn=c))'),
+                     ('(&(cn=a)(cn=a)(CN=a))', '(cn=a)'),
+                     ('(&(cn=a)(cn=A))', '(&(cn=a)(cn=A))'),
+                     ('(&(sn=b)(cn=a))', '(&(sn=b)(cn=a))'),
+                     ('(!(!(cn=a)))', '(cn=a)'),
+                     ('(&(sn=b)(!(!(&(cn=a)(uid=c)))))', '(&(sn=b)(cn=a)(uid=c))'),
+                     ('(&(cn=a)(|(&(x=1)(y=2))(&(y=2)(x=1))))', '(&(cn=a)(x=1)(y=2))'),
+                     ('(|(cn=a)(&(cn=a)(sn=b)))', '(|(cn=a)(&(cn=a)(sn=b)))'),
+                     ('(&(cn=*a*)(cn=\\2a)(cn:caseExactMatch:=a)(cn:CASEEXACTMATCH:=a))', '(&(cn=*a*)(cn=\\2a)(cn:caseExactMatch:=a))')]
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        filter_cache.clear()
+
+    def test_optimize_filter(self):
+        for search_filter, expected in optimized_filters:
+            self.assertEqual(optimize_filter(search_filter), expected, search_filter)
+
+    def test_optimization_is_idempotent(self):
+        for search_filter, expected in optimized_filters:
+            self.assertEqual(optimize_filter(expected), expected, search_filter)
+
+    def test_canonical_form(self):
+        self.assertEqual(canonical_filter('(&(CN=a)(|(sn=b)(uid=c)))'), canonical_filter('(&(|(uid=c)(sn=b)(sn=b))(&(cn=a)))'))
+        self.assertEqual(canonical_filter('(&(CN=a)(|(sn=b)(uid=c)))'), '(&(cn=a)(|(sn=b)(uid=c)))')
+        self.assertNotEqual(canonical_filter('(cn=a)'), canonical_filter('(cn=A)'))
+        self.assertEqual(canonical_filter(F.and_(F.eq('sn', 'b'), F.eq('cn', 'a'))), canonical_filter('(&(cn=a)(sn=b))'))
+
+    def test_indexed_attributes_first(self):
+        self.assertEqual(optimize_filter('(&(cn=a*)(objectClass=person)(description=x)(uid=c)(uid=*))', ['uid', 'CN']), '(&(uid=c)(cn=a*)(uid=*)(objectClass=person)(description=x))')
+        self.assertEqual(FilterOptimizer(['uid', 'cn']), FilterOptimizer(['CN', 'UID']))
+        self.assertEqual(canonical_filter('(&(description=x)(uid=c))'), FilterOptimizer(['uid']).canonical(parse_filter('(&(uid=c)(description=x))', None)))
+
+    def test_original_filter_node_is_not_modified(self):
+        filter_node = F.and_(F.and_(F.eq('cn', 'a'), F.eq('cn', 'a')), F.eq('sn', 'b'))
+        FilterOptimizer().optimize(filter_node)
+        self.assertEqual(str(filter_node), '(&(&(cn=a)(cn=a))(sn=b))')
+
+    def test_optimized_search_requests(self):
+        optimizer = FilterOptimizer(['uid'])
+        parameters = ('o=test', '(&(&(cn=a)(cn=a))(|(sn=b))(uid=c))', SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, ['cn'], 0, 0, False, None, None)
+        encoded = bytes(fast_search_operation(*parameters, optimizer=optimizer).encoded)
+        self.assertEqual(encoded, encoder.encode(search_operation(*parameters, optimizer=optimizer)))
+        self.assertEqual(encoded, bytes(fast_search_operation('o=test', '(&(uid=c)(cn=a)(sn=b))', *parameters[2:]).encoded))
+
+    def test_optimized_prepared_search(self):
+        template = prepare_search_operation('o=test', '(&(&(cn=%s)(sn=%s))(&(cn=%s)))', SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, ['cn'], 0, 0, False, optimizer=FilterOptimizer())
+        expected = fast_search_operation('o=test', '(&(cn=a)(sn=b)(cn=c))', SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, ['cn'], 0, 0, False)
+        self.assertEqual(bytes(template.request(('a', 'b', 'c')).encoded), bytes(expected.encoded))
+
+    def test_optimized_filters_are_cached(self):
+        usage = ConnectionUsage()
+        optimizer = FilterOptimizer()
+        encoded_filter = build_encoded_filter('(&(cn=a)(&(sn=b)))', None, usage, optimizer)
+        self.assertEqual(encoded_filter, bytes(encode_filter(parse_filter('(&(cn=a)(sn=b))', None).elements[0])))
+        build_encoded_filter('(&(cn=a)(&(sn=b)))', None, usage)  # not optimized filters are cached separately
+        build_encoded_filter('(&(cn=a)(&(sn=b)))', None, usage, FilterOptimizer())
+        build_encoded_filter(F.and_(F.eq('sn', 'b'), F.eq('cn', 'a')), None, usage, optimizer)  # equivalent built filters share the canonical form
+        build_encoded_filter(F.and_(F.eq('cn', 'a'), F.eq('sn', 'b'), F.eq('sn', 'b')), None, usage, optimizer)
+        self.assertEqual(usage.filter_cache_hits, 2)
+        self.assertEqual(usage.filter_cache_misses, 3)
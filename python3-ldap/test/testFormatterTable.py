@@ -0,0 +1,112 @@
+"""
+"""
+
+# Created on 2014.09.20
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+
+import unittest
+import pickle
+
+from ldap3 import FORMATTER_TABLES_SIZE
+from ldap3.protocol.rfc4512 import SchemaInfo
+from ldap3.protocol.convert import find_attribute_formatter, format_attribute_values, format_unicode, format_binary, format_integer
+
+schema_attributes = {'attributeTypes': ["( 2.5.4.0 NAME 'objectClass' EQUALITY objectIdentifierMatch SYNTAX 1.3.6.1.4.1.1466.115.121.1.38 )",
+                                        "( 2.5.4.3 NAME ( 'cn' 'commonName' ) SUP name )",
+                                        "( 2.5.4.41 NAME 'name' EQUALITY caseIgnoreMatch SUBSTR caseIgnoreSubstringsMatch SYNTAX 1.3.6.1.4.1.1466.115.121.1.15{32768} )",
+                                        "( 0.9.2342.19200300.100.1.60 NAME 'jpegPhoto' SYNTAX 1.3.6.1.4.1.1466.115.121.1.28 )",
+                                        "( 1.2.840.113556.1.4.2 NAME 'objectGUID' SYNTAX '1.3.6.1.4.1.1466.115.121.1.40' SINGLE-VALUE )",
+                                        "( 1.3.6.1.1.1.1.0 NAME 'uidNumber' EQUALITY integerMatch SYNTAX 1.3.6.1.4.1.1466.115.121.1.27 SINGLE-VALUE )"]}
+
+
+def upper_formatter(raw_value):
+    return raw_value.decode('utf-8').upper()
+
+
+def schema():
+    return SchemaInfo('cn=schema', dict(schema_attributes))
+
+
+class Test(unittest.TestCase):
+    def test_table_matches_attribute_formatters(self):
+        schema_info = schema()
+        formatter_table = schema_info.formatter_table()
+        for name in ['objectClass', 'cn', 'commonName', 'name', 'jpegPhoto', 'objectGUID', 'uidNumber', 'unknown']:
+            self.assertEqual(formatter_table.formatter(name), find_attribute_formatter(schema_info, name, None), name)
+        self.assertEqual(formatter_table.formatter('UIDNUMBER'), (format_integer, True))
+        self.assertEqual(formatter_table.formatter('jpegPhoto'), (format_binary, False))
+
+    def test_format_values(self):
+        formatter_table = schema().formatter_table()
+        self.assertEqual(formatter_table.format('uidNumber', [b'1000']), 1000)
+        self.assertEqual(formatter_table.format('cn', [b'J\xc3\xb6rg', b'a']), ['J\xf6rg', 'a'] if str != bytes else [u'J\xf6rg', u'a'])
+        self.assertEqual(format_attribute_values(schema(), 'uidNumber', [b'1000'], None), 1000)
+
+    def test_unknown_attributes_are_added_when_formatted(self):
+        formatter_table = schema().formatter_table()
+        self.assertFalse('other' in formatter_table)
+        self.assertEqual(formatter_table.formatter('Other'), (format_unicode, False))
+        self.assertTrue('other' in formatter_table)
+
+    def test_table_is_built_once(self):
+        schema_info = schema()
+        self.assertTrue(schema_info.formatter_table() is schema_info.formatter_table())
+        self.assertFalse(schema_info.formatter_table() is schema().formatter_table())
+
+    def test_custom_formatter(self):
+        schema_info = schema()
+        custom_formatter = {'cn': upper_formatter, '1.3.6.1.4.1.1466.115.121.1.27': format_unicode}
+        formatter_table = schema_info.formatter_table(custom_formatter)
+        self.assertTrue(formatter_table is not schema_info.formatter_table())  # built again when the custom formatter changes
+        formatter_table = schema_info.formatter_table(custom_formatter)
+        self.assertEqual(formatter_table.format('commonName', [b'abc']), ['ABC'])
+        self.assertEqual(formatter_table.format('uidNumber', [b'1000']), '1000')
+        self.assertEqual(formatter_table.format('name', [b'abc']), ['abc'])
+
+    def test_alternating_custom_formatters(self):
+        schema_info = schema()
+        first_formatter = {'cn': upper_formatter}
+        second_formatter = {'name': upper_formatter}
+        first_table = schema_info.formatter_table(first_formatter)
+        second_table = schema_info.formatter_table(second_formatter)
+        for _ in range(10):
+            self.assertTrue(schema_info.formatter_table(first_formatter) is first_table)
+            self.assertTrue(schema_info.formatter_table(second_formatter) is second_table)
+
+    def test_custom_formatter_tables_are_bounded(self):
+        schema_info = schema()
+        formatter_table = schema_info.formatter_table()
+        first_table = schema_info.formatter_table({'cn': upper_formatter})
+        for _ in range(FORMATTER_TABLES_SIZE * 2):
+            schema_info.formatter_table({'cn': upper_formatter})
+        self.assertEqual(len(schema_info._custom_formatter_tables), FORMATTER_TABLES_SIZE)
+        custom_formatter = {'cn': upper_formatter}
+        self.assertTrue(schema_info.formatter_table(custom_formatter) is schema_info.formatter_table(custom_formatter))
+        self.assertFalse(schema_info.formatter_table(custom_formatter) is first_table)
+        self.assertTrue(schema_info.formatter_table() is formatter_table)
+
+    def test_pickled_schema_has_no_table(self):
+        schema_info = schema()
+        schema_info.formatter_table({'cn': lambda raw_value: raw_value})
+        unpickled_schema = pickle.loads(pickle.dumps(schema_info))
+        self.assertEqual(unpickled_schema.formatter_table().format('uidNumber', [b'7']), 7)
@@ -0,0 +1,181 @@
+"""
+"""
+
+# Created on 2014.09.23
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import selectors
+import threading
+from threading import Thread
+
+from ldap3 import Server, Connection, IoLoop, STRATEGY_ASYNC_THREADED, STRATEGY_MULTIPLEXED, STRATEGY_SYNC, GET_NO_INFO
+from ldap3.core.exceptions import LDAPUnknownStrategyError, LDAPSessionTerminatedByServer, LDAPStartTLSError, LDAPSSLConfigurationError
+from ldap3.strategy.asyncThreaded import AsyncThreadedStrategy
+from ldap3.strategy.messageFramer import MessageFramer
+from test.standInServer import StandInServer
+
+CONNECTIONS = 50
+
+
+class SelectorServer(StandInServer):
+    """
+    Serves many connections in a single thread, so the threads of the client can be counted
+    """
+    def __init__(self):
+        StandInServer.__init__(self, backlog=CONNECTIONS)
+        self.stopped = False
+
+    def run(self):
+        selector = selectors.DefaultSelector()
+        selector.register(self.listener, selectors.EVENT_READ)
+        while not self.stopped:
+            for key, _ in selector.select(0.1):
+                if key.fileobj is self.listener:
+                    client, _ = self.listener.accept()
+                    selector.register(client, selectors.EVENT_READ, MessageFramer())
+                elif not key.data.receive(key.fileobj) or not self.answer(key.fileobj, key.data):
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()
+        selector.close()
+        self.listener.close()
+
+    def stop(self):
+        self.stopped = True
+        self.join()
+
+    def answer(self, client, framer):
+        for request in framer.messages():
+            data = self.replies_to(request)
+            if data is None:
+                return False
+            client.sendall(data)
+        return True
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.server = SelectorServer()
+        self.server.start()
+        self.io_loop = IoLoop()
+
+    def tearDown(self):
+        self.io_loop.close()
+        self.server.stop()
+
+    def connection(self, **parameters):
+        parameters.setdefault('client_strategy', STRATEGY_ASYNC_THREADED)
+        connection = Connection(Server('127.0.0.1', port=self.server.port, get_info=GET_NO_INFO), io_loop=self.io_loop, **parameters)
+        connection.open()
+        connection.bind()
+        return connection
+
+    def test_many_connections_in_one_thread(self):
+        threads = threading.active_count()
+        connections = [self.connection() for _ in range(CONNECTIONS)]
+        self.assertEqual(threading.active_count(), threads + 1)
+        self.assertEqual(len(self.io_loop), CONNECTIONS)
+        self.assertFalse([thread for thread in threading.enumerate() if isinstance(thread, AsyncThreadedStrategy.ReceiverSocketThread)])
+        for _ in range(3):
+            message_ids = [connection.search('cn=user%d,o=test' % number, '(objectClass=*)', attributes=['cn']) for number, connection in enumerate(connections)]
+            for number, (connection, message_id) in enumerate(zip(connections, message_ids)):
+                response, result = connection.get_response(message_id)
+                self.assertEqual(result['description'], 'success')
+                self.assertEqual(response[0]['dn'], 'cn=user%d,o=test' % number)
+        for connection in connections:
+            connection.unbind()
+        self.assertEqual(len(self.io_loop), 0)
+        self.assertEqual(threading.active_count(), threads + 1)
+
+    def test_reopened_connections(self):
+        for _ in range(5):
+            connections = [self.connection(return_futures=True) for _ in range(10)]
+            futures = [connection.search('o=test', '(objectClass=*)') for connection in connections]
+            self.assertEqual([future.result(10)[1]['description'] for future in futures], ['success'] * 10)
+            for connection in connections:
+                connection.unbind()
+        self.assertEqual(len(self.io_loop), 0)
+
+    def test_multiplexed_strategy(self):
+        connection = self.connection(client_strategy=STRATEGY_MULTIPLEXED)
+        errors = []
+
+        def searches(number):
+            try:
+                for search in range(10):
+                    dn = 'cn=user%d-%d,o=test' % (number, search)
+                    connection.search(dn, '(objectClass=*)')
+                    self.assertEqual(connection.response[0]['dn'], dn)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [Thread(target=searches, args=(number, )) for number in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        self.assertEqual(errors, [])
+        connection.unbind()
+
+    def test_closed_by_server(self):
+        closing = self.connection(return_futures=True)
+        other = self.connection()
+        future = closing.search('cn=close', '(objectClass=*)')
+        with self.assertRaises(LDAPSessionTerminatedByServer):
+            future.result(10)
+        self.assertTrue(closing.closed)
+        self.assertEqual(len(self.io_loop), 1)
+        response, result = other.get_response(other.search('o=test', '(objectClass=*)'))
+        self.assertEqual(result['description'], 'success')
+        other.unbind()
+
+    def test_malformed_message(self):
+        malformed = self.connection(return_futures=True)
+        other = self.connection(return_futures=True)
+        future = malformed.search('cn=malformed', '(objectClass=*)')
+        with self.assertRaises(LDAPSessionTerminatedByServer):
+            future.result(10)
+        self.assertTrue(malformed.closed)
+        self.assertTrue(malformed.last_error.startswith('error receiving data'))
+        self.assertTrue(self.io_loop.thread.is_alive())
+        response, result = other.search('o=test', '(objectClass=*)').result(10)
+        self.assertEqual(result['description'], 'success')
+        other.unbind()
+
+    def test_not_available(self):
+        with self.assertRaises(LDAPUnknownStrategyError):
+            Connection(Server('127.0.0.1'), client_strategy=STRATEGY_SYNC, io_loop=self.io_loop)
+        with self.assertRaises(LDAPSSLConfigurationError):
+            Connection(Server('127.0.0.1', use_ssl=True), client_strategy=STRATEGY_ASYNC_THREADED, io_loop=self.io_loop)
+        with self.assertRaises(LDAPSSLConfigurationError):
+            Connection([Server('127.0.0.1'), Server('127.0.0.1', use_ssl=True)], client_strategy=STRATEGY_MULTIPLEXED, io_loop=self.io_loop)
+        connection = self.connection()
+        with self.assertRaises(LDAPStartTLSError):
+            connection.start_tls()
+        connection.unbind()
+
+    def test_close(self):
+        connection = self.connection()
+        connection.unbind()
+        thread = self.io_loop.thread
+        self.io_loop.close()
+        self.assertFalse(thread.is_alive())
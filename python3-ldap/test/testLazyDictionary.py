@@ -0,0 +1,66 @@
+# Created on 2014.09.10
+#
+# @author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from ldap3.utils.lazyDictionary import LazyDict
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.decoded = []
+
+    def decoder(self, key, value):
+        self.decoded.append(key)
+        return value.upper()
+
+    def test_values_decoded_on_first_access(self):
+        lazy = LazyDict([('one', 'a'), ('two', 'b')], self.decoder)
+        self.assertEqual(self.decoded, [])
+        self.assertEqual(lazy['one'], 'A')
+        self.assertEqual(lazy['one'], 'A')
+        self.assertEqual(self.decoded, ['one'])
+        self.assertEqual(len(lazy), 2)
+        self.assertEqual(list(lazy), ['one', 'two'])
+
+    def test_case_insensitive_keys(self):
+        lazy = LazyDict([('oNe', 'a'), ('tWo', 'b')], self.decoder, case_insensitive=True)
+        self.assertEqual(lazy['ONE'], 'A')
+        self.assertEqual(lazy['one'], 'A')
+        self.assertTrue('TWO' in lazy)
+        self.assertFalse('three' in lazy)
+        self.assertRaises(KeyError, lazy.__getitem__, 'three')
+        self.assertEqual(self.decoded, ['oNe'])
+        self.assertEqual(list(lazy), ['oNe', 'tWo'])
+
+    def test_case_sensitive_keys(self):
+        lazy = LazyDict([('oNe', 'a')], self.decoder)
+        self.assertRaises(KeyError, lazy.__getitem__, 'one')
+
+    def test_set_and_delete_values(self):
+        lazy = LazyDict([('oNe', 'a'), ('tWo', 'b')], self.decoder, case_insensitive=True)
+        lazy['ONE'] = 'x'
+        lazy['three'] = 'y'
+        self.assertEqual(lazy['one'], 'x')
+        self.assertEqual(lazy.pop('TWO'), 'B')
+        del lazy['Three']
+        self.assertEqual(list(lazy), ['oNe'])
+        self.assertEqual(lazy, {'oNe': 'x'})
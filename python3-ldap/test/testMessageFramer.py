@@ -0,0 +1,167 @@
+"""
+"""
+
+# Created on 2014.09.12
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+
+import unittest
+import socket
+from threading import Thread
+
+from ldap3 import Server, Connection
+from ldap3.protocol.berEncoder import encode_sequence, encode_integer, encode_octet_string
+from ldap3.strategy.messageFramer import MessageFramer
+
+
+def ldap_message(message_id, size):
+    return bytes(encode_sequence([encode_integer(message_id), encode_octet_string(b'x' * size, 0x44)]))
+
+
+class CountingSocket(object):
+    def __init__(self, sock):
+        self.sock = sock
+        self.receives = 0
+
+    def recv_into(self, buffer, size):
+        self.receives += 1
+        return self.sock.recv_into(buffer, size)
+
+
+class StandInServer(Thread):
+    """
+    Local stand-in LDAP server, sends data to the first client connected
+    """
+    def __init__(self, data):
+        Thread.__init__(self)
+        self.data = data
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(1)
+        self.port = self.listener.getsockname()[1]
+        self.daemon = True
+
+    def run(self):
+        client, _ = self.listener.accept()
+        client.sendall(self.data)
+        client.recv(1)  # wait for the client to close the connection
+        client.close()
+        self.listener.close()
+
+
+def receive_from_stand_in_server(message, max_receive_size, receive_buffer_size=None):
+    stand_in_server = StandInServer(message)
+    stand_in_server.start()
+    connection = Connection(Server('127.0.0.1', port=stand_in_server.port, max_receive_size=max_receive_size, receive_buffer_size=receive_buffer_size))
+    connection.open()
+    connection.socket = CountingSocket(connection.socket)
+    received = []
+    while not received:
+        received = connection.strategy.receiving()
+    receives = connection.socket.receives
+    connection.socket = connection.socket.sock
+    connection.strategy.close()
+    stand_in_server.join()
+    return received, receives
+
+
+def send_in_chunks(sock, data, chunk_size):
+    for pos in range(0, len(data), chunk_size):
+        sock.sendall(data[pos: pos + chunk_size])
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.client, self.server = socket.socketpair()
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def receive_all(self, framer, count):
+        messages = []
+        while len(messages) < count:
+            self.assertTrue(framer.receive(self.client) > 0)
+            messages.extend(framer.messages())
+        return messages
+
+    def test_split_messages(self):
+        messages = [ldap_message(message_id, size) for message_id, size in enumerate([0, 1, 120, 127, 128, 255, 256, 5000, 70000], 1)]
+        for chunk_size in (1, 3, 1000, 4096):
+            framer = MessageFramer(receive_size=512)
+            sender = Thread(target=send_in_chunks, args=(self.server, b''.join(messages), chunk_size))
+            sender.start()
+            self.assertEqual(self.receive_all(framer, len(messages)), messages)
+            sender.join()
+            self.assertEqual(framer.pending, 0)
+
+    def test_large_message(self):
+        message = ldap_message(1, 2 * 1024 * 1024)
+        framer = MessageFramer()
+        sender = Thread(target=send_in_chunks, args=(self.server, message, 65536))
+        sender.start()
+        self.assertEqual(self.receive_all(framer, 1), [message])
+        sender.join()
+
+    def test_feed(self):
+        messages = [ldap_message(message_id, size) for message_id, size in enumerate([0, 127, 128, 5000, 70000], 1)]
+        data = b''.join(messages)
+        framer = MessageFramer(receive_size=512)
+        received = []
+        for pos in range(0, len(data), 1000):
+            framer.feed(data[pos: pos + 1000])
+            received.extend(framer.messages())
+        self.assertEqual(received, messages)
+        self.assertEqual(framer.pending, 0)
+
+    def test_reset(self):
+        framer = MessageFramer()
+        self.server.sendall(ldap_message(1, 10)[:5])
+        framer.receive(self.client)
+        self.assertEqual(framer.messages(), [])
+        self.assertEqual(framer.pending, 5)
+        framer.reset()
+        self.assertEqual(framer.pending, 0)
+
+    def test_sync_strategy_receiving(self):
+        connection = Connection(Server('localhost'))
+        connection.socket = self.client
+        messages = [ldap_message(1, 10), ldap_message(2, 10000)]
+        data = b''.join(messages) + ldap_message(3, 10)[:4]
+        sender = Thread(target=send_in_chunks, args=(self.server, data, 4096))
+        sender.start()
+        received = []
+        while len(received) < 2:
+            received.extend(connection.strategy.receiving())
+        sender.join()
+        self.assertEqual(received, messages)
+        self.server.sendall(ldap_message(3, 10)[4:])
+        self.assertEqual(connection.strategy.receiving(), [ldap_message(3, 10)])
+
+    def test_size_aware_receive(self):
+        message = ldap_message(1, 2 * 1024 * 1024)
+        received, fixed_size_receives = receive_from_stand_in_server(message, 4096)  # same as receiving SOCKET_SIZE bytes each time
+        self.assertEqual(received, [message])
+        received, size_aware_receives = receive_from_stand_in_server(message, 1048576, receive_buffer_size=1048576)
+        self.assertEqual(received, [message])
+        self.assertTrue(fixed_size_receives >= len(message) // 4096)
+        self.assertTrue(size_aware_receives * 4 < fixed_size_receives, (size_aware_receives, fixed_size_receives))
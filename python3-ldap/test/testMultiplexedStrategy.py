@@ -0,0 +1,126 @@
+"""
+"""
+
+# Created on 2014.09.22
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import sys
+from random import random
+from threading import Thread
+
+from ldap3 import Server, Connection, STRATEGY_MULTIPLEXED, GET_NO_INFO
+from ldap3.core.exceptions import LDAPUnknownStrategyError, LDAPStartTLSError, LDAPPipelineError, LDAPNoSuchObjectResult
+from ldap3.protocol.berDecoder import decode_message_fast
+from test.standInServer import StandInServer
+
+THREADS = 30
+SEARCHES = 20
+
+
+class RandomDelayServer(StandInServer):
+    """
+    Each search is answered by its own timer after a random delay, so responses arrive out of order
+    """
+    def delay(self, request):
+        return random() / 100 if decode_message_fast(request)['protocolOp'] == 0x63 else None  # searchRequest
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.server = RandomDelayServer()
+        self.server.start()
+        self.connection = Connection(Server('127.0.0.1', port=self.server.port, get_info=GET_NO_INFO), user='cn=admin', password='password', client_strategy=STRATEGY_MULTIPLEXED, auto_bind=True)
+
+    def tearDown(self):
+        self.connection.unbind()
+        self.server.stop()
+
+    def run_threads(self, target):
+        errors = []
+
+        def run(number):
+            try:
+                target(number)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [Thread(target=run, args=(number, )) for number in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(60)
+        return errors
+
+    def test_shared_by_many_threads(self):
+        def searches(number):
+            for search in range(SEARCHES):
+                dn = 'cn=user%d-%d,o=test' % (number, search)
+                self.assertTrue(self.connection.search(dn, '(objectClass=*)', attributes=['cn']))
+                self.assertEqual(self.connection.response[0]['dn'], dn)
+                self.assertEqual(self.connection.response[0]['attributes']['cn'], [dn])
+                self.assertEqual(self.connection.result['description'], 'success')
+                self.assertEqual(self.connection.request['base'], dn)
+
+        self.assertEqual(self.run_threads(searches), [])
+        self.assertEqual(self.server.accepted, 1)
+        self.assertEqual(self.connection.strategy._futures, dict())
+        self.assertEqual(self.connection.strategy._outstanding, dict())
+
+    def test_results_are_kept_for_each_thread(self):
+        self.assertTrue(self.connection.search('cn=main,o=test', '(objectClass=*)'))
+
+        def failing(number):
+            self.assertFalse(self.connection.search('cn=missing', '(objectClass=*)'))
+            self.assertEqual(self.connection.result['result'], 32)
+
+        self.assertEqual(self.run_threads(failing), [])
+        self.assertEqual(self.connection.result['description'], 'success')
+        self.assertEqual(self.connection.response[0]['dn'], 'cn=main,o=test')
+
+    def test_message_ids_are_unique(self):
+        def next_ids(number):
+            ids[number] = [Server.next_message_id() for _ in range(2000)]
+
+        ids = dict()
+        if hasattr(sys, 'setswitchinterval'):  # switch threads as often as possible to expose races
+            interval = sys.getswitchinterval()
+            sys.setswitchinterval(1e-6)
+            try:
+                self.assertEqual(self.run_threads(next_ids), [])
+            finally:
+                sys.setswitchinterval(interval)
+        else:
+            self.assertEqual(self.run_threads(next_ids), [])
+        message_ids = [message_id for thread_ids in ids.values() for message_id in thread_ids]
+        self.assertEqual(len(message_ids), THREADS * 2000)
+        self.assertEqual(len(set(message_ids)), len(message_ids))
+
+    def test_raise_exceptions(self):
+        self.connection.raise_exceptions = True
+        self.assertRaises(LDAPNoSuchObjectResult, self.connection.search, 'cn=missing', '(objectClass=*)')
+        self.assertTrue(self.connection.search('cn=user,o=test', '(objectClass=*)'))
+
+    def test_not_available(self):
+        self.assertRaises(LDAPStartTLSError, self.connection.start_tls)
+        self.assertRaises(LDAPPipelineError, self.connection.pipeline().__enter__)
+        self.assertRaises(LDAPUnknownStrategyError, Connection, Server('127.0.0.1'), client_strategy=STRATEGY_MULTIPLEXED, lazy=True)
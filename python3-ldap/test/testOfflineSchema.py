@@ -0,0 +1,98 @@
+"""
+"""
+
+# Created on 2014.09.28
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from ldap3 import Server, Connection, GET_NO_INFO, OFFLINE_SCHEMA_OPENLDAP, OFFLINE_SCHEMA_DS389, OFFLINE_SCHEMA_AD, OFFLINE_SCHEMA_EDIR, SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS
+from ldap3.core.exceptions import LDAPAttributeError
+from ldap3.operation.search import search_operation
+from ldap3.protocol.convert import format_attribute_values
+
+OFFLINE_SCHEMAS = [OFFLINE_SCHEMA_OPENLDAP, OFFLINE_SCHEMA_DS389, OFFLINE_SCHEMA_AD, OFFLINE_SCHEMA_EDIR]
+
+
+class Test(unittest.TestCase):
+    def test_offline_schemas_are_loaded(self):
+        for offline_schema in OFFLINE_SCHEMAS:
+            server = Server('localhost', get_info=offline_schema)
+            self.assertTrue(server.info.schema_entry, offline_schema)
+            self.assertTrue(server.info.supported_controls, offline_schema)
+            self.assertEqual(server.schema.schema_entry, server.info.schema_entry[0], offline_schema)
+            for name in ('objectClass', 'cn', 'sn', 'mail', 'member', 'description'):
+                self.assertTrue(name in server.schema.attribute_types, name)
+            for name in ('top', 'person', 'organizationalPerson', 'organizationalUnit'):
+                self.assertTrue(name in server.schema.object_classes, name)
+
+    def test_offline_schema_without_connection(self):
+        server = Server('localhost', get_info=OFFLINE_SCHEMA_OPENLDAP)
+        connection = Connection(server)
+        self.assertTrue(connection.closed)
+        server.get_info_from_server(connection)
+        self.assertEqual(server.info.supported_ldap_versions, ['3'])
+        self.assertTrue('entryUUID' in server.schema.attribute_types)
+
+    def test_vendor_attributes(self):
+        self.assertEqual(Server('localhost', get_info=OFFLINE_SCHEMA_DS389).info.vendor_name, ['389 Project'])
+        self.assertTrue('nsUniqueId' in Server('localhost', get_info=OFFLINE_SCHEMA_DS389).schema.attribute_types)
+        self.assertTrue(Server('localhost', get_info=OFFLINE_SCHEMA_AD).schema.attribute_types['sAMAccountName'].single_value)
+        self.assertTrue('GUID' in Server('localhost', get_info=OFFLINE_SCHEMA_EDIR).schema.attribute_types)
+
+    def test_offline_schema_is_shared(self):
+        first = Server('localhost', get_info=OFFLINE_SCHEMA_AD)
+        second = Server('other', get_info=OFFLINE_SCHEMA_AD)
+        self.assertTrue(first.schema is second.schema)
+        self.assertFalse(first.info is second.info)
+        self.assertFalse(first.schema is Server('localhost', get_info=OFFLINE_SCHEMA_AD, lazy_schema=True).schema)
+
+    def test_lazy_offline_schema(self):
+        eager = Server('localhost', get_info=OFFLINE_SCHEMA_EDIR).schema
+        lazy = Server('localhost', get_info=OFFLINE_SCHEMA_EDIR, lazy_schema=True).schema
+        self.assertTrue(lazy.lazy)
+        self.assertEqual(sorted(lazy.attribute_types), sorted(eager.attribute_types))
+        self.assertEqual(lazy.attribute_types['uidNumber'].syntax, eager.attribute_types['uidNumber'].syntax)
+
+    def test_format_with_offline_schema(self):
+        schema = Server('localhost', get_info=OFFLINE_SCHEMA_OPENLDAP).schema
+        self.assertEqual(format_attribute_values(schema, 'uidNumber', [b'1000'], None), 1000)
+        self.assertEqual(format_attribute_values(schema, 'mail', [b'jm@example.com'], None), ['jm@example.com'])
+
+    def test_validate_with_offline_schema(self):
+        schema = Server('localhost', get_info=OFFLINE_SCHEMA_OPENLDAP).schema
+        search_operation('o=test', '(&(objectClass=inetOrgPerson)(uid=test))', SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, ['cn', 'mail'], 0, 0, False, schema)
+        self.assertRaises(LDAPAttributeError, search_operation, 'o=test', '(sAMAccountName=test)', SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, None, 0, 0, False, schema)
+
+    def test_names_not_checked_with_partial_schema(self):
+        for offline_schema in OFFLINE_SCHEMAS:
+            connection = Connection(Server('localhost', get_info=offline_schema))
+            self.assertTrue(connection.server.schema.partial, offline_schema)
+            self.assertEqual(connection._check_names_schema, None, offline_schema)
+        connection = Connection(Server('localhost', get_info=OFFLINE_SCHEMA_AD))
+        search_operation('o=test', '(employeeID=1)', SEARCH_SCOPE_WHOLE_SUBTREE, SEARCH_DEREFERENCE_ALWAYS, ['proxyAddresses', 'thumbnailPhoto'], 0, 0, False, connection._check_names_schema)
+        self.assertEqual(format_attribute_values(connection.server.schema, 'proxyAddresses', [b'smtp:jm@example.com'], None), ['smtp:jm@example.com'])
+
+    def test_no_info(self):
+        server = Server('localhost', get_info=GET_NO_INFO)
+        self.assertEqual(server.info, None)
+        self.assertEqual(server.schema, None)
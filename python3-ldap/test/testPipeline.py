@@ -0,0 +1,170 @@
+"""
+"""
+
+# Created on 2014.09.20
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from ldap3 import Server, Connection, STRATEGY_ASYNC_THREADED, STRATEGY_LDIF_PRODUCER, MODIFY_REPLACE
+from ldap3.core.exceptions import LDAPPipelineError, LDAPNoSuchObjectResult
+from ldap3.protocol.berDecoder import decode_message_fast
+from test.standInServer import StandInServer
+
+LATENCY = 0.01
+
+
+class WindowServer(StandInServer):
+    """
+    The requests received together are answered in reverse order after LATENCY seconds
+    If window is set modifies are answered only when window of them are waiting, so they must be sent without waiting for the previous responses
+    """
+    def __init__(self):
+        StandInServer.__init__(self, latency=LATENCY, reverse=True)
+        self.window = None
+        self.held = []
+        self.max_held = 0
+
+    def replies_to(self, request):
+        data = StandInServer.replies_to(self, request)
+        if self.window and decode_message_fast(request)['protocolOp'] == 0x66:  # modifyRequest
+            self.held.append(data)
+            self.max_held = max(self.max_held, len(self.held))
+            if len(self.held) < self.window:
+                return b''
+            data = b''.join(self.held)
+            self.held = []
+        return data
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.server = WindowServer()
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def connection(self, **parameters):
+        connection = Connection(Server('127.0.0.1', port=self.server.port), user='cn=admin', password='password', **parameters)
+        connection.open()
+        connection.bind()
+        return connection
+
+    def test_pipelined_modifies(self):
+        connection = self.connection()
+        dns = ['cn=user%d,o=test' % number for number in range(100)]
+        self.server.window = 20
+        with connection.pipeline(window=20) as pipeline:
+            for dn in dns:
+                self.assertTrue(isinstance(connection.modify(dn, {'sn': (MODIFY_REPLACE, ['x'])}), int))
+        self.assertEqual(self.server.max_held, 20)
+        self.assertEqual(len(pipeline.results), 100)
+        self.assertEqual([result['type'] for _, result in pipeline.results], ['modifyResponse'] * 100)
+        self.assertEqual(pipeline.error, None)
+        self.server.window = None
+        self.assertTrue(connection.modify(dns[0], {'sn': (MODIFY_REPLACE, ['y'])}))  # back to one request at a time
+        connection.unbind()
+
+    def test_results_in_order(self):
+        connection = self.connection()
+        with connection.pipeline(window=8) as pipeline:
+            for number in range(30):
+                connection.search('cn=user%d,o=test' % number, '(objectClass=*)', attributes=['cn'])
+        self.assertEqual([response[0]['dn'] for response, _ in pipeline.results], ['cn=user%d,o=test' % number for number in range(30)])
+        connection.unbind()
+
+    def test_continue_on_error(self):
+        connection = self.connection()
+        with connection.pipeline() as pipeline:
+            for dn in ['cn=a', 'cn=missing', 'cn=b']:
+                connection.modify(dn, {'sn': (MODIFY_REPLACE, ['x'])})
+        self.assertEqual(pipeline.error, 1)
+        self.assertEqual([result['result'] for _, result in pipeline.results], [0, 32, 0])
+        connection.unbind()
+
+    def test_stop_on_error(self):
+        connection = self.connection()
+        with connection.pipeline(window=1, stop_on_error=True) as pipeline:
+            message_ids = [connection.modify(dn, {'sn': (MODIFY_REPLACE, ['x'])}) for dn in ['cn=a', 'cn=missing', 'cn=b', 'cn=c']]
+        self.assertEqual(pipeline.error, 1)
+        self.assertEqual(message_ids[2:], [0, 0])
+        self.assertEqual(pipeline.results[2:], [None, None])
+        connection.unbind()
+
+    def test_raise_exceptions(self):
+        connection = self.connection(raise_exceptions=True)
+        def modifies():
+            with connection.pipeline():
+                for dn in ['cn=a', 'cn=missing', 'cn=b']:
+                    connection.modify(dn, {'sn': (MODIFY_REPLACE, ['x'])})
+
+        self.assertRaises(LDAPNoSuchObjectResult, modifies)
+        connection.unbind()
+
+    def failed_pipeline(self, connection):
+        """
+        The pipeline is exited by an exception while requests are in flight, the first result raises an exception too
+        """
+        def modifies():
+            with connection.pipeline(window=10):
+                for dn in ['cn=missing', 'cn=a', 'cn=b', 'cn=c']:
+                    connection.modify(dn, {'sn': (MODIFY_REPLACE, ['x'])})
+                raise ValueError('error in the pipeline')
+
+        self.assertRaises(ValueError, modifies)
+        self.assertEqual(connection.strategy._outstanding, dict())
+
+    def test_responses_dropped_after_exception(self):
+        connection = self.connection(raise_exceptions=True)
+        self.failed_pipeline(connection)
+        self.assertTrue(connection.modify('cn=d', {'sn': (MODIFY_REPLACE, ['x'])}))  # late responses are received and dropped
+        self.assertEqual(connection.strategy._pending, dict())
+        self.assertEqual(connection.strategy._discarded, set())
+        connection.unbind()
+
+    def test_responses_dropped_after_exception_async_threaded(self):
+        connection = self.connection(client_strategy=STRATEGY_ASYNC_THREADED, raise_exceptions=True)
+        self.failed_pipeline(connection)
+        response, result = connection.get_response(connection.modify('cn=d', {'sn': (MODIFY_REPLACE, ['x'])}))
+        self.assertEqual(result['description'], 'success')
+        self.assertEqual(connection.strategy._responses, dict())
+        self.assertEqual(connection.strategy._discarded, set())
+        connection.unbind()
+
+    def test_async_threaded(self):
+        connection = self.connection(client_strategy=STRATEGY_ASYNC_THREADED)
+        with connection.pipeline(window=10) as pipeline:
+            for number in range(50):
+                connection.modify('cn=user%d,o=test' % number, {'sn': (MODIFY_REPLACE, ['x'])})
+        self.assertEqual([result['description'] for _, result in pipeline.results], ['success'] * 50)
+        connection.unbind()
+
+    def test_not_available(self):
+        connection = self.connection()
+        def pipelined_bind():
+            with connection.pipeline():
+                connection.bind()
+
+        self.assertRaises(LDAPPipelineError, pipelined_bind)
+        connection.unbind()
+        self.assertRaises(LDAPPipelineError, Connection(Server('localhost'), client_strategy=STRATEGY_LDIF_PRODUCER).pipeline().__enter__)
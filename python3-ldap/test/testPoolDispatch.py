@@ -0,0 +1,154 @@
+"""
+"""
+
+# Created on 2014.09.20
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from threading import Event, Timer
+
+from ldap3 import Server, Connection, STRATEGY_REUSABLE_THREADED, POOL_DISPATCH_SHARED, POOL_DISPATCH_LEAST_OUTSTANDING, POOL_DISPATCH_SERVER_AFFINITY, GET_NO_INFO
+from ldap3.core.exceptions import LDAPUnknownStrategyError
+from ldap3.protocol.berDecoder import decode_message_fast
+from test.standInServer import StandInServer, request_dn
+
+class DelayingServer(StandInServer):
+    """
+    Each search is answered by its own timer after search_latency seconds, searches in o=slow are held until release()
+    The base of the searches received and the releases are logged in order
+    """
+    def __init__(self, search_latency=0.0):
+        StandInServer.__init__(self)
+        self.search_latency = search_latency
+        self.released = Event()
+        self.log = []
+
+    def release(self):
+        with self.lock:
+            self.log.append('release')
+        self.released.set()
+
+    def delay(self, request):
+        if decode_message_fast(request)['protocolOp'] == 0x63:  # searchRequest
+            dn = request_dn(request)
+            with self.lock:
+                self.log.append(dn.decode('utf-8'))
+            return self.released if dn.endswith(b'o=slow') else self.search_latency
+        return None
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.server = DelayingServer()
+        self.server.start()
+        self.pool_number = getattr(Test, 'pool_number', 0) + 1
+        Test.pool_number = self.pool_number
+
+    def tearDown(self):
+        self.server.release()
+        self.server.stop()
+
+    def connection(self, server=None, **parameters):
+        connection = Connection(server or Server('127.0.0.1', port=self.server.port, get_info=GET_NO_INFO), client_strategy=STRATEGY_REUSABLE_THREADED, pool_name='dispatch %d' % self.pool_number, **parameters)
+        connection.open()
+        connection.bind()
+        return connection
+
+    def search(self, connection, search_base):
+        return connection.search(search_base, '(objectClass=*)', attributes=['cn'])
+
+    def search_behind_slow(self, connection, release_after):
+        """
+        Send two held searches followed by fast searches, the held searches are released after release_after seconds
+        (None releases them when the fast responses are received), returns the log of the server
+        """
+        slow = [self.search(connection, 'cn=user%d,o=slow' % number) for number in range(2)]
+        fast = [self.search(connection, 'cn=user%d,o=fast' % number) for number in range(6)]
+        if release_after is not None:
+            timer = Timer(release_after, self.server.release)
+            timer.start()
+        for number, counter in enumerate(fast):
+            response, result = connection.get_response(counter)
+            self.assertEqual(response[0]['dn'], 'cn=user%d,o=fast' % number)
+        if release_after is None:
+            self.server.release()
+        else:
+            timer.join()
+        for number, counter in enumerate(slow):
+            response, result = connection.get_response(counter)
+            self.assertEqual(response[0]['dn'], 'cn=user%d,o=slow' % number)
+        with self.server.lock:
+            return list(self.server.log)
+
+    def test_shared_dispatch(self):
+        connection = self.connection(pool_size=3)
+        pool = connection.strategy.pool
+        counters = [self.search(connection, 'cn=user%d,o=test' % number) for number in range(30)]
+        self.assertEqual([connection.get_response(counter)[0][0]['dn'] for counter in counters], ['cn=user%d,o=test' % number for number in range(30)])
+        self.assertEqual(pool.dispatch, POOL_DISPATCH_SHARED)
+        self.assertEqual(pool.started_requests, 30)
+        self.assertEqual(sum(reusable_connection.completed for reusable_connection in pool.connections), 30)
+        self.assertEqual(pool.queue_depth, 0)
+        self.assertTrue(0.0 <= pool.average_wait_time <= pool.max_wait_time)
+        connection.strategy.terminate()
+
+    def test_least_outstanding(self):
+        connection = self.connection(pool_size=2, pool_dispatch=POOL_DISPATCH_LEAST_OUTSTANDING)
+        pool = connection.strategy.pool
+        counters = [self.search(connection, 'cn=user%d,o=slow' % number) for number in range(2)]
+        self.assertEqual([reusable_connection.outstanding for reusable_connection in pool.connections], [1, 1])
+        self.server.release()
+        for counter in counters:
+            connection.get_response(counter)
+        self.assertEqual([reusable_connection.completed for reusable_connection in pool.connections], [1, 1])
+        self.assertEqual([reusable_connection.outstanding for reusable_connection in pool.connections], [0, 0])
+        connection.strategy.terminate()
+
+    def test_head_of_line_blocking(self):
+        connection = self.connection(pool_size=2)
+        blocked = self.search_behind_slow(connection, 0.2)  # both pooled connections wait for the held searches
+        connection.strategy.terminate()
+        self.assertEqual(blocked.index('release'), 2)
+        self.pool_number += 1
+        self.server.released.clear()
+        del self.server.log[:]
+        connection = self.connection(pool_size=2, pool_dispatch=POOL_DISPATCH_LEAST_OUTSTANDING, pool_pipeline=4)
+        pipelined = self.search_behind_slow(connection, None)  # the fast searches are pipelined behind the held ones
+        self.assertEqual(pipelined.index('release'), 8)
+        connection.strategy.terminate()
+
+    def test_server_affinity(self):
+        slow_server = DelayingServer(search_latency=0.05)
+        slow_server.start()
+        connection = self.connection(Server('127.0.0.1', port=slow_server.port, get_info=GET_NO_INFO), pool_size=2, pool_dispatch=POOL_DISPATCH_SERVER_AFFINITY)
+        pool = connection.strategy.pool
+        pool.connections[1].connection.server = Server('127.0.0.1', port=self.server.port, get_info=GET_NO_INFO)  # the second pooled connection uses the fast server
+        for number in range(20):
+            connection.get_response(self.search(connection, 'cn=user%d,o=test' % number))
+        self.assertEqual([reusable_connection.completed for reusable_connection in pool.connections], [1, 19])
+        self.assertTrue(pool.response_time(pool.connections[0].connection.server) > pool.response_time(pool.connections[1].connection.server))
+        connection.strategy.terminate()
+        slow_server.stop()
+
+    def test_invalid_parameters(self):
+        self.assertRaises(LDAPUnknownStrategyError, Connection, Server('127.0.0.1'), client_strategy=STRATEGY_REUSABLE_THREADED, pool_dispatch=99)
+        self.assertRaises(LDAPUnknownStrategyError, Connection, Server('127.0.0.1'), client_strategy=STRATEGY_REUSABLE_THREADED, pool_pipeline=0)
@@ -0,0 +1,167 @@
+"""
+"""
+
+# Created on 2014.09.20
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from threading import Event, Timer
+from time import sleep
+
+from ldap3 import Server, Connection, STRATEGY_REUSABLE_THREADED, POOL_DISPATCH_LEAST_OUTSTANDING, GET_NO_INFO, REUSABLE_THREADED_POOL_SIZE
+from ldap3.core.exceptions import LDAPConnectionPoolSizeError
+from ldap3.protocol.berDecoder import decode_message_fast
+from ldap3.strategy.baseStrategy import monotonic
+from ldap3.strategy.reusableThreaded import ReusableThreadedStrategy
+from test.standInServer import StandInServer
+
+SLOW = 0.5
+
+
+class HoldingServer(StandInServer):
+    """
+    Searches are held until release(), received counts the searches received
+    """
+    def __init__(self):
+        StandInServer.__init__(self)
+        self.released = Event()
+        self.received = 0
+
+    def release(self):
+        self.released.set()
+
+    def delay(self, request):
+        if decode_message_fast(request)['protocolOp'] == 0x63:  # searchRequest
+            with self.lock:
+                self.received += 1
+            return self.released
+        return None
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.server = HoldingServer()
+        self.server.start()
+        self.pool_name = 'sizing %s' % self.id()
+
+    def tearDown(self):
+        self.server.release()
+        self.server.stop()
+
+    def connection(self, **parameters):
+        connection = Connection(Server('127.0.0.1', port=self.server.port, get_info=GET_NO_INFO), client_strategy=STRATEGY_REUSABLE_THREADED, pool_name=self.pool_name, **parameters)
+        connection.open()
+        connection.bind()
+        return connection
+
+    def send_searches(self, connection, number):
+        return [connection.search('cn=user%d,o=test' % index, '(objectClass=*)') for index in range(number)]
+
+    def check_responses(self, connection, counters):
+        for index, counter in enumerate(counters):
+            response, result = connection.get_response(counter)
+            self.assertEqual(response[0]['dn'], 'cn=user%d,o=test' % index)
+
+    def searches(self, connection, number):
+        """
+        Perform number searches at the same time
+        """
+        self.check_responses(connection, self.send_searches(connection, number))
+
+    def wait_for(self, condition, timeout=5):
+        deadline = monotonic() + timeout
+        while not condition() and monotonic() < deadline:
+            sleep(0.01)
+        return condition()
+
+    def test_grows_when_requests_are_waiting(self):
+        connection = self.connection(pool_min_size=1, pool_max_size=4)
+        pool = connection.strategy.pool
+        self.assertEqual(len(pool.connections), 1)
+        counters = self.send_searches(connection, 4)
+        self.assertTrue(self.wait_for(lambda: self.server.received == 4))  # held by the server at the same time, so sent by 4 connections
+        self.assertEqual(len(pool.connections), 4)
+        self.assertEqual(self.server.clients, 4)
+        self.server.release()
+        self.check_responses(connection, counters)
+        connection.strategy.terminate()
+
+    def test_does_not_grow_over_max_size(self):
+        connection = self.connection(pool_min_size=1, pool_max_size=2, pool_dispatch=POOL_DISPATCH_LEAST_OUTSTANDING)
+        counters = self.send_searches(connection, 6)
+        self.assertTrue(self.wait_for(lambda: self.server.received == 2))
+        self.server.release()
+        self.check_responses(connection, counters)
+        self.assertEqual(len(connection.strategy.pool.connections), 2)
+        self.assertEqual(self.server.received, 6)
+        connection.strategy.terminate()
+
+    def test_grows_on_wait_time(self):
+        connection = self.connection(pool_min_size=1, pool_max_size=3)
+        pool = connection.strategy.pool
+        pool.grow_queue_depth = 1000
+        pool.grow_wait_time = SLOW / 2
+        timer = Timer(SLOW, self.server.release)
+        timer.start()
+        self.searches(connection, 3)
+        timer.join()
+        self.assertTrue(pool.max_wait_time >= SLOW / 2)
+        self.assertEqual(len(pool.connections), 3)
+        connection.strategy.terminate()
+
+    def test_shrinks_when_idle(self):
+        connection = self.connection(pool_min_size=1, pool_max_size=4, pool_idle_timeout=SLOW / 5, pool_pipeline=2)
+        pool = connection.strategy.pool
+        counters = self.send_searches(connection, 8)
+        self.assertTrue(len(pool.connections) > 1)
+        sleep(SLOW)  # idle timeout is shorter than the time the requests are held, in flight requests are not interrupted
+        self.server.release()
+        self.check_responses(connection, counters)
+        self.assertTrue(self.wait_for(lambda: len(pool.connections) == 1 and self.server.clients == 1))
+        self.searches(connection, 1)
+        connection.strategy.terminate()
+        self.assertTrue(self.wait_for(lambda: self.server.clients == 0))
+
+    def test_resized_without_terminating(self):
+        connection = self.connection(pool_size=2)
+        pool = connection.strategy.pool
+        self.server.release()
+        self.searches(connection, 2)
+        connections = list(pool.connections)
+        resized = Connection(Server('127.0.0.1', port=self.server.port, get_info=GET_NO_INFO), client_strategy=STRATEGY_REUSABLE_THREADED, pool_name=self.pool_name, pool_min_size=3, pool_max_size=5)
+        self.assertTrue(resized.strategy.pool is pool)
+        self.assertTrue(pool.started)
+        self.assertEqual((pool.min_size, pool.max_size), (3, 5))
+        self.assertEqual(pool.connections[:2], connections)
+        self.assertEqual(len(pool.connections), 3)
+        connection.strategy.terminate()
+
+    def test_sizes(self):
+        def sizes(**parameters):
+            return ReusableThreadedStrategy.ConnectionPool.sizes(Connection(Server('127.0.0.1'), **parameters))
+
+        self.assertEqual(sizes(), (REUSABLE_THREADED_POOL_SIZE, REUSABLE_THREADED_POOL_SIZE, REUSABLE_THREADED_POOL_SIZE))
+        self.assertEqual(sizes(pool_size=5), (5, 5, 5))
+        self.assertEqual(sizes(pool_min_size=2, pool_max_size=100), (2, 2, 100))
+        self.assertEqual(sizes(pool_size=20, pool_min_size=2, pool_max_size=10), (10, 2, 10))
+        self.assertRaises(LDAPConnectionPoolSizeError, Connection, Server('127.0.0.1'), pool_min_size=0)
+        self.assertRaises(LDAPConnectionPoolSizeError, Connection, Server('127.0.0.1'), pool_min_size=5, pool_max_size=2)
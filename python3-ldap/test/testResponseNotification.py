@@ -0,0 +1,113 @@
+"""
+"""
+
+# Created on 2014.09.20
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import socket
+from threading import Thread
+from time import sleep
+
+from ldap3 import Server, Connection, STRATEGY_ASYNC_THREADED, STRATEGY_REUSABLE_THREADED
+from ldap3.strategy import baseStrategy
+from ldap3.strategy.baseStrategy import monotonic
+from test.standInServer import reply, ldap_result
+
+
+def delayed(delay, function, *args):
+    """
+    Call function in a new thread after delay seconds, returns the thread
+    """
+    def run():
+        sleep(delay)
+        function(*args)
+
+    thread = Thread(target=run)
+    thread.start()
+    return thread
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.polls = []
+        baseStrategy.sleep = self.polling_sleep  # get_response() polls the responses only if it's not notified
+        self.client, self.server = socket.socketpair()
+        self.connection = Connection(Server('localhost'), client_strategy=STRATEGY_ASYNC_THREADED)
+        self.connection.socket = self.client
+        self.connection.closed = False
+        self.connection.strategy._responses = dict()
+        self.connection.strategy._start_listen()
+
+    def tearDown(self):
+        baseStrategy.sleep = sleep
+        self.connection.strategy.close()
+        self.server.close()
+
+    def polling_sleep(self, seconds):
+        self.polls.append(seconds)
+        sleep(seconds)
+
+    def test_async_threaded_response_is_notified(self):
+        for message_id in range(1, 11):
+            self.connection.strategy._outstanding[message_id] = {'type': 'searchRequest'}
+            thread = delayed(0.01, self.server.sendall, reply(message_id, ldap_result(0x65)))
+            response, result = self.connection.get_response(message_id)
+            thread.join()
+            self.assertEqual(result['type'], 'searchResDone')
+            self.assertEqual(response, [])
+        self.assertEqual(self.polls, [])
+
+    def test_async_threaded_timeout(self):
+        self.connection.strategy._outstanding[1] = {'type': 'searchRequest'}
+        start = monotonic()
+        self.assertEqual(self.connection.get_response(1, timeout=0.2), (None, None))
+        self.assertTrue(0.2 <= monotonic() - start < 2)
+
+    def test_async_threaded_stops_waiting_when_closed_by_server(self):
+        self.connection.strategy._outstanding[1] = {'type': 'searchRequest'}
+        thread = delayed(0.05, self.server.shutdown, socket.SHUT_RDWR)
+        start = monotonic()
+        self.assertEqual(self.connection.get_response(1, timeout=5), (None, None))
+        self.assertTrue(monotonic() - start < 2)
+        thread.join()
+
+    def test_pooled_response_is_notified(self):
+        connection = Connection(Server('localhost'), client_strategy=STRATEGY_REUSABLE_THREADED, pool_name='notification')
+        pool = connection.strategy.pool
+        for counter in range(1, 11):
+            with pool.lock:
+                pool._register(counter)
+            thread = delayed(0.01, pool._deliver, counter, ['entry'], {'result': 0})
+            self.assertEqual(connection.get_response(counter), (['entry'], {'result': 0}))
+            thread.join()
+        self.assertEqual(self.polls, [])
+        self.assertEqual(pool._waiting, dict())
+        self.assertEqual(pool._incoming, dict())
+
+    def test_pooled_timeout(self):
+        connection = Connection(Server('localhost'), client_strategy=STRATEGY_REUSABLE_THREADED, pool_name='notification timeout')
+        with connection.strategy.pool.lock:
+            connection.strategy.pool._register(1)
+        start = monotonic()
+        self.assertEqual(connection.get_response(1, timeout=0.2), (None, None))
+        self.assertTrue(0.2 <= monotonic() - start < 2)
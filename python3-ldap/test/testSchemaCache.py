@@ -0,0 +1,135 @@
+"""
+"""
+
+# Created on 2014.09.19
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+
+import unittest
+import gc
+import os
+import shutil
+from tempfile import mkdtemp
+
+from ldap3 import Server, GET_SCHEMA_INFO
+from ldap3.core.server import schema_registry
+from ldap3.protocol.rfc4512 import DsaInfo
+from ldap3.protocol.rfc4512 import SchemaInfo
+from ldap3.utils.schemaCache import load_cached_schema, save_cached_schema, schema_cache_file
+
+schema_attributes = {'attributeTypes': ["( 2.5.4.3 NAME ( 'cn' 'commonName' ) SUP name )",
+                                        "( 2.5.4.41 NAME 'name' EQUALITY caseIgnoreMatch SUBSTR caseIgnoreSubstringsMatch SYNTAX 1.3.6.1.4.1.1466.115.121.1.15{32768} )"],
+                     'objectClasses': ["( 2.5.6.6 NAME 'person' SUP top STRUCTURAL MUST ( sn $ cn ) MAY ( userPassword $ telephoneNumber $ seeAlso $ description ) )"]}
+
+
+class SchemaServerConnection(object):
+    """
+    Answers the searches performed by Server while reading the schema, counts the full schema reads
+    """
+
+    def __init__(self, modify_timestamp):
+        self.modify_timestamp = modify_timestamp
+        self.schema_reads = 0
+        self.response = None
+        self.closed = False
+
+    def search(self, search_base, search_filter, search_scope=None, attributes=None, get_operational_attributes=False):
+        if search_base == '':
+            self.response = [{'attributes': {'subschemaSubentry': ['cn=schema']}, 'raw_attributes': {'subschemaSubentry': [b'cn=schema']}}]
+        elif attributes == ['modifyTimestamp']:
+            self.response = [{'attributes': {'modifyTimestamp': [self.modify_timestamp]}, 'raw_attributes': {'modifyTimestamp': [self.modify_timestamp.encode('ascii')]}}]
+        else:
+            self.schema_reads += 1
+            attributes = dict(schema_attributes)
+            attributes['modifyTimestamp'] = [self.modify_timestamp]
+            self.response = [{'attributes': attributes}]
+        return True
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.cache_directory = mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_directory)
+
+    def test_save_and_load(self):
+        schema_info = SchemaInfo('cn=schema', dict(schema_attributes))
+        self.assertTrue(save_cached_schema(self.cache_directory, 'ldap://server:389', 'cn=schema', [b'20140919100000Z'], schema_info))
+        cached_schema = load_cached_schema(self.cache_directory, 'ldap://server:389', 'cn=schema', [b'20140919100000Z'])
+        self.assertEqual(cached_schema.attribute_types['commonName'].oid, '2.5.4.3')
+        self.assertEqual(cached_schema.object_classes['person'].must_contain, ['sn', 'cn'])
+        self.assertEqual(os.listdir(self.cache_directory), [os.path.basename(schema_cache_file(self.cache_directory, 'ldap://server:389', 'cn=schema'))])
+
+    def test_changed_timestamp_or_server(self):
+        save_cached_schema(self.cache_directory, 'ldap://server:389', 'cn=schema', [b'20140919100000Z'], SchemaInfo('cn=schema', dict(schema_attributes)))
+        self.assertEqual(load_cached_schema(self.cache_directory, 'ldap://server:389', 'cn=schema', [b'20140919110000Z']), None)
+        self.assertEqual(load_cached_schema(self.cache_directory, 'ldap://other:389', 'cn=schema', [b'20140919100000Z']), None)
+
+    def test_invalid_cache_file(self):
+        with open(schema_cache_file(self.cache_directory, 'ldap://server:389', 'cn=schema'), 'wb') as cache_file:
+            cache_file.write(b'not a schema')
+        self.assertEqual(load_cached_schema(self.cache_directory, 'ldap://server:389', 'cn=schema', [b'20140919100000Z']), None)
+
+    def test_server_uses_cached_schema(self):
+        connection = SchemaServerConnection('20140919100000Z')
+        for _ in range(3):
+            server = Server('server', get_info=GET_SCHEMA_INFO, schema_cache=self.cache_directory, shared_schema=False)
+            server.get_info_from_server(connection)
+            self.assertEqual(server.schema.attribute_types['cn'].superior, ['name'])
+        self.assertEqual(connection.schema_reads, 1)
+        connection.modify_timestamp = '20140919110000Z'  # schema changed in the server
+        server = Server('server', get_info=GET_SCHEMA_INFO, schema_cache=self.cache_directory, shared_schema=False)
+        server.get_info_from_server(connection)
+        self.assertEqual(connection.schema_reads, 2)
+        self.assertEqual(server.schema.modify_time_stamp, ['20140919110000Z'])
+
+    def test_servers_share_schema(self):
+        connection = SchemaServerConnection('20140921100000Z')
+        servers = [Server('replica%d' % index, get_info=GET_SCHEMA_INFO, shared_schema=True) for index in range(3)]
+        for server in servers:
+            server.get_info_from_server(connection)
+        self.assertEqual(connection.schema_reads, 1)
+        self.assertTrue(servers[1].schema is servers[0].schema and servers[2].schema is servers[0].schema)
+        servers[0].get_info_from_server(connection)  # read again by a pooled connection
+        self.assertEqual(connection.schema_reads, 1)
+
+    def test_schema_not_shared(self):
+        connection = SchemaServerConnection('20140921100000Z')
+        vendor_server = Server('vendor', get_info=GET_SCHEMA_INFO, shared_schema=True)
+        vendor_server._dsa_info = DsaInfo({'vendorName': ['Vendor'], 'subschemaSubentry': ['cn=schema']})
+        servers = [Server('server', get_info=GET_SCHEMA_INFO, shared_schema=True), Server('not_shared', get_info=GET_SCHEMA_INFO), Server('lazy', get_info=GET_SCHEMA_INFO, lazy_schema=True, shared_schema=True), vendor_server]
+        for server in servers:
+            server.get_info_from_server(connection)
+        self.assertEqual(connection.schema_reads, 4)
+        connection.modify_timestamp = '20140921110000Z'
+        servers[0].get_info_from_server(connection)
+        self.assertEqual(connection.schema_reads, 5)
+
+    def test_registry_keeps_only_used_schemas(self):
+        connection = SchemaServerConnection('20140921120000Z')
+        server = Server('server', get_info=GET_SCHEMA_INFO, shared_schema=True)
+        server.get_info_from_server(connection)
+        registered = len(schema_registry)
+        del server
+        gc.collect()
+        self.assertEqual(len(schema_registry), registered - 1)
@@ -0,0 +1,83 @@
+"""
+"""
+
+# Created on 2014.09.21
+#
+# Author: Giovanni Cannata
+#
+# Copyright 2014 Giovanni Cannata
+#
+# This file is part of python3-ldap.
+#
+# python3-ldap is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python3-ldap is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with python3-ldap in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+
+import unittest
+
+from ldap3.protocol.rfc4512 import SchemaInfo, AttributeTypeInfo, ObjectClassInfo
+
+syntaxes = ['1.3.6.1.4.1.1466.115.121.1.15', '1.3.6.1.4.1.1466.115.121.1.27', '1.3.6.1.4.1.1466.115.121.1.40', '1.3.6.1.4.1.1466.115.121.1.24', '1.3.6.1.4.1.1466.115.121.1.12', '1.3.6.1.4.1.1466.115.121.1.7']
+
+
+def synthetic_schema(attribute_types=1600, object_classes=260):
+    """
+    Builds the subschema attributes of a schema shaped like the Active Directory schema (same definition format and size)
+    Definitions are generated, not captured from a server
+    """
+    attributes = {'attributeTypes': ["( 2.5.4.3 NAME ( 'cn' 'commonName' ) SYNTAX '1.3.6.1.4.1.1466.115.121.1.15' SINGLE-VALUE )",
+                                     "( 2.5.4.0 NAME 'objectClass' SYNTAX '1.3.6.1.4.1.1466.115.121.1.38' NO-USER-MODIFICATION )",
+                                     "( 1.2.840.113556.1.4.221 NAME 'sAMAccountName' SYNTAX '1.3.6.1.4.1.1466.115.121.1.15' SINGLE-VALUE )",
+                                     "( 1.2.840.113556.1.4.2 NAME 'objectGUID' SYNTAX '1.3.6.1.4.1.1466.115.121.1.40' SINGLE-VALUE NO-USER-MODIFICATION )"],
+                  'objectClasses': ["( 2.5.6.0 NAME 'top' ABSTRACT MUST (objectClass ) MAY (cn $ objectGUID ) )"]}
+    for index in range(attribute_types):
+        definition = "( 1.2.840.113556.1.4.%d NAME 'msDS-SyntheticAttribute%d' SYNTAX '%s'" % (10000 + index, index, syntaxes[index % len(syntaxes)])
+        definition += ' SINGLE-VALUE' if index % 3 else ''
+        definition += ' NO-USER-MODIFICATION' if index % 7 == 0 else ''
+        attributes['attributeTypes'].append(definition + ' )')
+    for index in range(object_classes):
+        may = ' $ '.join(['msDS-SyntheticAttribute%d' % ((index * 13 + offset) % attribute_types) for offset in range(index % 40 + 1)])
+        attributes['objectClasses'].append("( 1.2.840.113556.1.5.%d NAME 'msDS-SyntheticClass%d' SUP top %s MUST (cn ) MAY (%s ) )" % (10000 + index, index, 'AUXILIARY' if index % 4 else 'STRUCTURAL', may))
+    return attributes
+
+
+class Test(unittest.TestCase):
+    def test_lazy_schema_matches_eager_schema(self):
+        eager = SchemaInfo('CN=Aggregate,CN=Schema,CN=Configuration,DC=example,DC=com', synthetic_schema())
+        lazy = SchemaInfo('CN=Aggregate,CN=Schema,CN=Configuration,DC=example,DC=com', synthetic_schema(), lazy=True)
+        for name in ['attribute_types', 'object_classes']:
+            self.assertEqual(list(getattr(lazy, name)), list(getattr(eager, name)))
+            for key in getattr(eager, name):
+                self.assertEqual(repr(getattr(lazy, name)[key.upper()]), repr(getattr(eager, name)[key]), key)
+
+    def test_lazy_schema_parses_on_lookup(self):
+        lazy = SchemaInfo('cn=schema', synthetic_schema(), lazy=True)
+        parser = lazy.attribute_types._decoder
+        self.assertEqual(len(parser._parsed), 0)
+        self.assertTrue('samaccountname' in lazy.attribute_types)
+        self.assertEqual(len(parser._parsed), 0)
+        self.assertTrue(lazy.attribute_types['cn'] is lazy.attribute_types['commonName'])
+        self.assertTrue(lazy.attribute_types['objectGUID'].single_value)
+        self.assertEqual(lazy.object_classes['msDS-SyntheticClass1'].superior, ['top'])
+        self.assertEqual(len(parser._parsed), 2)
+
+    def test_lazy_definition_with_names_after_other_keywords(self):
+        attribute_types = AttributeTypeInfo.from_definition(["( 1.2.3.4 DESC 'test attribute' NAME ( 'first' 'second' ) SYNTAX 1.3.6.1.4.1.1466.115.121.1.15 )", "( 1.2.3.5 SYNTAX 1.3.6.1.4.1.1466.115.121.1.15 )"], lazy=True)
+        self.assertEqual(sorted(attribute_types), ['1.2.3.5', 'first', 'second'])
+        self.assertEqual(attribute_types['second'].description, 'test attribute')
+        self.assertEqual(attribute_types['1.2.3.5'].syntax, '1.3.6.1.4.1.1466.115.121.1.15')
+
+    def test_tokenizer_is_compiled_once(self):
+        self.assertTrue(ObjectClassInfo.definition_pattern() is ObjectClassInfo.definition_pattern())
+        self.assertFalse(ObjectClassInfo.definition_pattern() is AttributeTypeInfo.definition_pattern())
@@ -43,6 +43,7 @@ setup(name='python3-ldap',
                 'ldap3.operation',
                 'ldap3.protocol',
                 'ldap3.protocol.sasl',
+                'ldap3.protocol.schemas',
                 'ldap3.strategy',
                 'ldap3.compat',
                 'ldap3.utils',
@@ -52,6 +53,7 @@ setup(name='python3-ldap',
                 'ldap3.extend.standard'
       ],
       package_dir={'': 'python3-ldap'},
+      package_data={'ldap3.protocol.schemas': ['*.json']},
       install_requires=['pyasn1 == 0.1.7'],
       tests_require=['setuptools', 'tox', 'pep8', 'autopep8', 'sphinx', 'six>=1.5.2', 'pytest'],
       cmdclass = {'test': PyTest},